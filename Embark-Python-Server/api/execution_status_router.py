@@ -1,14 +1,140 @@
 
-from fastapi import APIRouter
-from core.datastore.datastore import custom_workflow_status, workflow_status
-from models.status_models.status import WorkflowItem
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from core.datastore.datastore import StatusInterface, custom_workflow_status, run_state_call, workflow_status
+from core.datastore.run_store import run_store
+from core.datastore.result_store import result_store
+from core.scheduling.run_scheduler import run_scheduler
+from core.metrics.event_loop_monitor import event_loop_lag_monitor
+from services.process_pool.process_pool import framework_process_pool
+from models.status_models.status import StatusQuery, WorkflowItem, WorkflowStatus
+from models.result_models.result import ResultView
+from core.tracing.tracing import span_to_dict, tracing
+from shared.blocking_calls import blocking_io_pool
+from shared.byte_ranges import UnsatisfiableRange, accepts_encoding, parse_byte_range
+from shared.fast_json import RawJSONResponse, dump_models_json
 
 execution_status_router = APIRouter()
 
-@execution_status_router.get("/workflow/")
-async def get_execution_status() -> list[WorkflowItem]:
-    return workflow_status.get_status()
+def get_status_query(
+    run_id: Optional[str] = None,
+    name: Optional[str] = None,
+    status: Optional[List[WorkflowStatus]] = Query(None),
+    updated_after: Optional[float] = Query(None, description="Unix time"),
+    updated_before: Optional[float] = Query(None, description="Unix time"),
+    since_version: Optional[int] = Query(None, ge=0, description="Only items changed after this version"),
+    cursor: Optional[int] = Query(None, ge=0, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+) -> StatusQuery:
+    return StatusQuery(
+        run_id=run_id,
+        name=name,
+        status=status,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        since_version=since_version,
+        cursor=cursor,
+        limit=limit,
+    )
 
-@execution_status_router.get("/custom-workflow/")
-async def get_custom_workflow_status() -> list[WorkflowItem]:
-    return custom_workflow_status.get_status()
+
+async def get_status_response(store: StatusInterface, query: StatusQuery, request: Request) -> Response:
+    """
+    A page of status items. The ETag is the version of the status list, a poller sending it
+    back in If-None-Match gets a 304 without any item being read while nothing changed.
+    """
+    etag = f'"{store.namespace}-{await run_state_call("status.get_version", store.get_version)}"'
+    if etag in [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    page = await run_state_call("status.query", store.query, query)
+    headers = {"ETag": f'"{store.namespace}-{page.version}"', "X-Status-Version": str(page.version)}
+    if page.next_cursor is not None:
+        headers["X-Next-Cursor"] = str(page.next_cursor)
+    # Dumped by pydantic in one pass instead of validated and encoded again by FastAPI
+    return RawJSONResponse(dump_models_json(WorkflowItem, page.items), headers=headers)
+
+
+@execution_status_router.get("/workflow/", response_model=list[WorkflowItem])
+async def get_execution_status(request: Request, query: StatusQuery = Depends(get_status_query)) -> Response:
+    return await get_status_response(workflow_status, query, request)
+
+@execution_status_router.get("/custom-workflow/", response_model=list[WorkflowItem])
+async def get_custom_workflow_status(request: Request, query: StatusQuery = Depends(get_status_query)) -> Response:
+    return await get_status_response(custom_workflow_status, query, request)
+
+
+@execution_status_router.get("/trace/{run_id}")
+async def get_run_trace(run_id: str) -> list[dict]:
+    """Spans of a run kept by the in-process exporter, in the order they finished."""
+    return [span_to_dict(finished_span) for finished_span in tracing.memory_exporter.get_finished_spans(run_id)]
+
+
+@execution_status_router.get("/run/{run_id}")
+async def get_run(run_id: str) -> dict:
+    """State of a run and, once it completed, its result. Answered the same by every server process."""
+    run = await run_state_call("run_store.get", run_store.get, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"No run with id '{run_id}'")
+    return {**run, "result": await run_state_call("run_store.get_result", run_store.get_result, run_id)}
+
+
+@execution_status_router.get("/run/{run_id}/result")
+async def download_run_result(run_id: str, request: Request, view: ResultView = ResultView.FULL) -> StreamingResponse:
+    """
+    Stream the result of a run from the result store: the final answer or the full transcript.
+    Supports single `Range` requests over the uncompressed JSON. Without a range, clients that
+    accept the stored encoding (zstd or gzip) get the compressed bytes as they are.
+    """
+    try:
+        reference = await blocking_io_pool.run("result_store.get_reference", result_store.get_reference, run_id)
+    except ValueError:
+        reference = None
+    if reference is None:
+        raise HTTPException(status_code=404, detail=f"No stored result for run '{run_id}'")
+    size = reference.final_bytes if view == ResultView.FINAL else reference.full_bytes
+    headers = {"Accept-Ranges": "bytes", "Vary": "Accept-Encoding"}
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except UnsatisfiableRange:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    if byte_range is None:
+        if accepts_encoding(request.headers.get("accept-encoding"), reference.codec.value):
+            return StreamingResponse(
+                result_store.iter_stored(reference, view),
+                media_type="application/json",
+                headers={**headers, "Content-Encoding": reference.codec.value},
+            )
+        return StreamingResponse(
+            result_store.iter_range(reference, view, 0, size - 1),
+            media_type="application/json",
+            headers={**headers, "Content-Length": str(size)},
+        )
+    start, end = byte_range
+    return StreamingResponse(
+        result_store.iter_range(reference, view, start, end),
+        status_code=206,
+        media_type="application/json",
+        headers={**headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"},
+    )
+
+
+@execution_status_router.get("/scheduler")
+async def get_scheduler_stats() -> dict:
+    """Runs holding and waiting for an execution slot in this server process."""
+    return run_scheduler.get_stats()
+
+
+@execution_status_router.get("/event-loop")
+async def get_event_loop_stalls() -> dict:
+    """Current event loop lag and the recent stalls of this server process, with their sampled stacks."""
+    return {
+        "lag_seconds": round(event_loop_lag_monitor.lag_seconds, 3),
+        "stalls": event_loop_lag_monitor.get_recent_stalls(),
+    }
+
+
+@execution_status_router.get("/process-pool")
+async def get_process_pool_stats() -> dict:
+    """Framework worker processes of this server process (EXECUTION_MODE=process)."""
+    return framework_process_pool.get_stats()
@@ -0,0 +1,41 @@
+from os import getenv as os_getenv
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from core.metrics.event_loop_monitor import event_loop_lag_monitor
+from core.scheduling.admission import RETRY_AFTER_HEADER, admission_controller
+from core.scheduling.run_scheduler import run_scheduler
+
+# Readiness fails when the event loop lags more than this, every run on it is stalled
+MAX_EVENT_LOOP_LAG_SECONDS = float(os_getenv("HEALTH_MAX_EVENT_LOOP_LAG_SECONDS", "1"))
+
+health_router = APIRouter()
+
+
+@health_router.get("/live")
+async def get_liveness() -> dict:
+    """The process is up and serving requests."""
+    return {"status": "live"}
+
+
+@health_router.get("/ready")
+async def get_readiness():
+    """
+    Whether this replica should get new runs. Answers 503 while it would shed them, so load
+    balancers route around saturated replicas.
+    """
+    # Ready while there is room for at least one more unit of work
+    reason = admission_controller.get_rejection_reason(cost=1)
+    if reason is None and event_loop_lag_monitor.lag_seconds > MAX_EVENT_LOOP_LAG_SECONDS:
+        reason = "event_loop_lag"
+    body = {
+        "status": "ready" if reason is None else "saturated",
+        "reason": reason,
+        "event_loop_lag_seconds": round(event_loop_lag_monitor.lag_seconds, 3),
+        "scheduler": run_scheduler.get_stats(),
+        "admission": admission_controller.get_stats(),
+    }
+    if reason is None:
+        return body
+    return JSONResponse(
+        body, status_code=503, headers={RETRY_AFTER_HEADER: str(admission_controller.get_retry_after_seconds())}
+    )
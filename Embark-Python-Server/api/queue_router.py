@@ -0,0 +1,79 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from models.api_models.workflow import WorkflowModel, CustomWorkflowConfig
+from models.queue_models.queue import Job, JobKind, JobState, PriorityClass
+from core.datastore.datastore import run_state_call
+from core.datastore.run_store import run_store
+from core.queue.work_queue import work_queue
+from core.runs.run_context import new_run_id
+from core.scheduling.tenancy import get_priority, get_tenant
+from api.workflow_router import RUN_ID_HEADER
+from shared.blocking_calls import blocking_io_pool
+
+queue_router = APIRouter()
+
+
+async def submit(kind: JobKind, payload, workflow: str, timeout_seconds: Optional[float], http_request: Request, response: Response) -> dict:
+    run_id = new_run_id()
+    # Queued runs are batch work unless the client asks otherwise
+    job = await blocking_io_pool.run(
+        "work_queue.enqueue",
+        work_queue.enqueue,
+        kind,
+        run_id,
+        payload,
+        timeout_seconds=timeout_seconds,
+        tenant=get_tenant(http_request),
+        workflow=workflow,
+        priority=get_priority(http_request, PriorityClass.BATCH),
+    )
+    await run_state_call("run_store.schedule", run_store.schedule, run_id, kind.value, job.id)
+    response.headers[RUN_ID_HEADER] = run_id
+    return {"run_id": run_id, "job_id": job.id, "state": job.state}
+
+
+@queue_router.post("/workflow/", status_code=202)
+async def submit_workflow(
+    request: List[WorkflowModel],
+    response: Response,
+    http_request: Request,
+    timeout_seconds: Optional[float] = Query(None, gt=0),
+):
+    """
+    Queue a list of workflows for a worker. Follow the run with `GET /status/run/{run_id}`.
+    """
+    payload = [workflow.model_dump(mode="json") for workflow in request]
+    workflow = request[0].workflow.name if request else ""
+    return await submit(JobKind.WORKFLOW, payload, workflow, timeout_seconds, http_request, response)
+
+
+@queue_router.post("/custom-workflow/", status_code=202)
+async def submit_custom_workflow(
+    request: CustomWorkflowConfig,
+    response: Response,
+    http_request: Request,
+    timeout_seconds: Optional[float] = Query(None, gt=0),
+):
+    """
+    Queue a custom workflow for a worker. Follow the run with `GET /status/run/{run_id}`.
+    """
+    workflow = next((node.agent_config.name for node in request.workflows if node.is_entry_point), "")
+    return await submit(JobKind.CUSTOM_WORKFLOW, request.model_dump(mode="json"), workflow, timeout_seconds, http_request, response)
+
+
+@queue_router.get("/job/{job_id}")
+async def get_job(job_id: str) -> Job:
+    job = await blocking_io_pool.run("work_queue.get", work_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job with id '{job_id}'")
+    return job
+
+
+@queue_router.get("/dead-letter/")
+async def get_dead_letter_jobs(limit: int = Query(100, gt=0, le=1000)) -> List[Job]:
+    return await blocking_io_pool.run("work_queue.list_jobs", work_queue.list_jobs, JobState.DEAD, limit)
+
+
+@queue_router.get("/stats")
+async def get_queue_stats() -> dict:
+    return await blocking_io_pool.run("work_queue.get_counts", work_queue.get_counts)
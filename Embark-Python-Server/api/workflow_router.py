@@ -1,60 +1,74 @@
-from typing import List
-from fastapi import APIRouter, HTTPException
+from typing import Any, Awaitable, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from opentelemetry import trace
 from models.api_models.workflow import WorkflowModel, CustomWorkflowConfig
-from services.custom_workflow_executor.custom_workflow_manager import CustomWorkflowManager
-from services.workflow_executors.workflow_executor_manager import WorkflowExecutorManager
-from services.workflow_executors.agent_executor import AgentExecutor
-from core.datastore.datastore import custom_workflow_status, workflow_status
-from models.status_models.status import WorkflowItem, WorkflowStatus
+from core.runs.run_cancellation import CancelReason, run_registry
+from core.runs.run_context import new_run_id
+from core.scheduling.admission import admission_controller, estimate_custom_workflow_cost, estimate_workflows_cost
+from core.scheduling.tenancy import get_priority, get_tenant
+from models.queue_models.queue import PriorityClass
+from services.workflow_runs.workflow_runs import execute_run, run_custom_workflow, run_workflows
+from shared.fast_json import FastJSONResponse
+
+RUN_ID_HEADER = "X-Run-ID"
 
 router = APIRouter()
 
+
+async def execute_run_with_header(run_id: str, kind: str, run: Awaitable[Any], timeout_seconds: Optional[float], http_request: Request) -> FastJSONResponse:
+    try:
+        result = await execute_run(run_id, kind, run, timeout_seconds, http_request)
+    except HTTPException as e:
+        # Error responses do not carry the headers set on `response`
+        e.headers = {**(e.headers or {}), RUN_ID_HEADER: run_id}
+        raise
+    # Serialized as is, skipping the jsonable_encoder pass over the whole result.
+    # A returned response does not carry the headers set on `response` either
+    return FastJSONResponse(result, headers={RUN_ID_HEADER: run_id})
+
+
 @router.post("/workflow/")
-async def execute_workflow(request: List[WorkflowModel]):
+async def execute_workflow(
+    request: List[WorkflowModel],
+    response: Response,
+    http_request: Request,
+    timeout_seconds: Optional[float] = Query(None, gt=0),
+):
 
     """
     Execute a list of workflows using the specified agent execution framework.
 
     Args:
         request (List[WorkflowModel]): A list of workflow models containing workflow and task information.
+        timeout_seconds (Optional[float]): Deadline of the whole run, defaults to RUN_TIMEOUT_SECONDS.
+
+    The X-Priority header overrides the priority class: interactive for a single workflow,
+    batch for several.
 
     Returns:
         dict: Status message and the framework used for execution.
 
     Raises:
-        HTTPException: If an error occurs during workflow execution.
+        HTTPException: If an error occurs during workflow execution or the run is cancelled,
+                       429 with Retry-After when the server is saturated.
     """
-    try:
-        for workflow in request:
-            workflow_status.add_item(
-                WorkflowItem(name=workflow.workflow.name, status=WorkflowStatus.SCHEDULED)
-            )
-
-        for current_workflow in request:
-            workflow_status.update_item(
-                WorkflowItem(name=current_workflow.workflow.name, status=WorkflowStatus.RUNNING)
-            )
-            framework = current_workflow.workflow.agent_execution_framework.lower()
-            executor: AgentExecutor = await WorkflowExecutorManager.get_executor(framework=framework)
-            await executor.execute(workflow=current_workflow.workflow, workflow_task=current_workflow.task)
-            workflow_status.update_item(
-                WorkflowItem(name=current_workflow.workflow.name, status=WorkflowStatus.COMPLETED)
-            )
-        return {"status": "Execution completed", "framework": framework}
-    except HTTPException as http_exc:
-        workflow_status.update_item(
-            WorkflowItem(name=current_workflow.workflow.name, status=WorkflowStatus.FAILED)
-        )
-        raise http_exc
-    except Exception as e:
-        workflow_status.update_item(
-            WorkflowItem(name=current_workflow.workflow.name, status=WorkflowStatus.FAILED)
-        )
-        raise HTTPException(status_code=500, detail=f"Workflow execution failed: {str(e)}")
+    run_id = new_run_id()
+    response.headers[RUN_ID_HEADER] = run_id
+    trace.get_current_span().set_attribute("run.id", run_id)
+    tenant = get_tenant(http_request)
+    priority = get_priority(http_request, PriorityClass.BATCH if len(request) > 1 else PriorityClass.INTERACTIVE)
+    with admission_controller.admit("workflow", estimate_workflows_cost(request)):
+        run = run_workflows(run_id, request, tenant, priority)
+        return await execute_run_with_header(run_id, "workflow", run, timeout_seconds, http_request)
 
 
 @router.post("/custom-workflow/")
-async def execute_custom_workflow(request: CustomWorkflowConfig):
+async def execute_custom_workflow(
+    request: CustomWorkflowConfig,
+    response: Response,
+    http_request: Request,
+    timeout_seconds: Optional[float] = Query(None, gt=0),
+):
 
 
     """
@@ -63,21 +77,24 @@ async def execute_custom_workflow(request: CustomWorkflowConfig):
     Args:
         request (CustomWorkflowConfig): Configuration for the custom workflow, including workflows,
                                         task, and sharing options.
+        timeout_seconds (Optional[float]): Deadline of the whole run, defaults to RUN_TIMEOUT_SECONDS.
 
     Returns:
         Any: The result of the custom workflow execution.
     """
-    try:
-        for workflow in request.workflows:
-            custom_workflow_status.add_item(
-                WorkflowItem(name=workflow.agent_config.name, status=WorkflowStatus.SCHEDULED)
-            )
-        custom_workflow_object = CustomWorkflowManager(request.workflows)
-        result = await custom_workflow_object.execute_workflow(
-            request.task, share_task_among_agents=request.share_task_among_agents
-        )
-        return result
-    except HTTPException as http_exc:
-        raise http_exc
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Custom workflow execution failed: {str(e)}")
\ No newline at end of file
+    run_id = new_run_id()
+    response.headers[RUN_ID_HEADER] = run_id
+    trace.get_current_span().set_attribute("run.id", run_id)
+    tenant = get_tenant(http_request)
+    priority = get_priority(http_request, PriorityClass.INTERACTIVE)
+    with admission_controller.admit("custom_workflow", estimate_custom_workflow_cost(request)):
+        run = run_custom_workflow(run_id, request, tenant, priority)
+        return await execute_run_with_header(run_id, "custom_workflow", run, timeout_seconds, http_request)
+
+
+@router.post("/run/{run_id}/cancel")
+async def cancel_run(run_id: str):
+    """Cancel a running workflow or custom workflow run by the id returned in the X-Run-ID header."""
+    if not await run_registry.cancel(run_id, CancelReason.CANCELLED):
+        raise HTTPException(status_code=404, detail=f"No running run with id '{run_id}'")
+    return {"run_id": run_id, "status": "cancelling"}
\ No newline at end of file
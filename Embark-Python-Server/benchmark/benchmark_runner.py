@@ -0,0 +1,76 @@
+import statistics
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+
+
+class BenchmarkResult(BaseModel):
+    name: str
+    group: str
+    iterations: int
+    mean_ms: Optional[float] = None
+    median_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    min_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    stdev_ms: Optional[float] = None
+    skipped: Optional[str] = None
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, group: str, samples: List[float]) -> BenchmarkResult:
+    samples_ms = [sample * 1000 for sample in samples]
+    return BenchmarkResult(
+        name=name,
+        group=group,
+        iterations=len(samples_ms),
+        mean_ms=round(statistics.fmean(samples_ms), 4),
+        median_ms=round(statistics.median(samples_ms), 4),
+        p95_ms=round(percentile(samples_ms, 0.95), 4),
+        min_ms=round(min(samples_ms), 4),
+        max_ms=round(max(samples_ms), 4),
+        stdev_ms=round(statistics.stdev(samples_ms), 4) if len(samples_ms) > 1 else 0.0,
+    )
+
+
+async def run_benchmark(
+    name: str,
+    group: str,
+    func: Callable[[], Any],
+    iterations: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+) -> BenchmarkResult:
+    """
+    Time `func` (sync or async) `iterations` times after `warmup` untimed calls.
+    `setup` runs before every call and is excluded from the timing.
+    """
+    async def call(target: Callable[[], Any]):
+        value = target()
+        if isinstance(value, Awaitable):
+            value = await value
+        return value
+
+    try:
+        for _ in range(warmup):
+            if setup:
+                await call(setup)
+            await call(func)
+
+        samples = []
+        for _ in range(iterations):
+            if setup:
+                await call(setup)
+            start = time.perf_counter()
+            await call(func)
+            samples.append(time.perf_counter() - start)
+    except NotImplementedError as e:
+        return BenchmarkResult(name=name, group=group, iterations=0, skipped=str(e) or "not implemented")
+
+    return summarize(name, group, samples)
@@ -0,0 +1,49 @@
+"""
+Local MCP stand-in for the benchmark suite.
+
+Serves the tools of the customer management example server over stdio or SSE, so the
+benchmarks can discover and call real MCP tools without any external service.
+
+    python -m benchmark.mcp_stand_in_server --transport stdio
+    python -m benchmark.mcp_stand_in_server --transport sse --port 8001
+
+`--latency-ms` delays tool discovery like a remote server would.
+"""
+import argparse
+import asyncio
+import importlib.util
+from pathlib import Path
+
+EXAMPLE_SERVER_PATH = Path(__file__).resolve().parent.parent / "examples" / "customer_management_use_case" / "mcp_server.py"
+
+
+def load_example_server():
+    # Loaded by path: several installed packages ship a top level `examples` package.
+    spec = importlib.util.spec_from_file_location("customer_management_mcp_server", EXAMPLE_SERVER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.mcp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MCP stand-in server for benchmarks")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    mcp = load_example_server()
+    mcp.settings.port = args.port
+    if args.latency_ms:
+        list_tools = mcp.list_tools
+
+        async def list_tools_with_latency():
+            await asyncio.sleep(args.latency_ms / 1000)
+            return await list_tools()
+
+        mcp._mcp_server.list_tools()(list_tools_with_latency)
+    mcp.run(transport=args.transport)
+
+
+if __name__ == "__main__":
+    main()
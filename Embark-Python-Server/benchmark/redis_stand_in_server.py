@@ -0,0 +1,148 @@
+"""
+Local Redis-protocol stand-in.
+
+Implements the RESP commands used by the Redis state backend in memory, so several server
+workers can share state without a Redis installation.
+
+    python -m benchmark.redis_stand_in_server --port 6379
+    STATE_BACKEND=redis STATE_REDIS_URL=redis://localhost:6379/0 uvicorn main:app --workers 4
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+
+class RedisStandIn:
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.hashes: Dict[str, Dict[str, str]] = {}
+        self.sorted_sets: Dict[str, Dict[str, float]] = {}
+
+    def range_by_score(self, key: str, low: str, high: str, reverse: bool, options: List[str]) -> List[str]:
+        def in_range(score: float) -> bool:
+            above = score > float(low[1:]) if low.startswith("(") else score >= float(low)
+            below = score < float(high[1:]) if high.startswith("(") else score <= float(high)
+            return above and below
+
+        members = sorted(
+            ((score, member) for member, score in self.sorted_sets.get(key, {}).items() if in_range(score)),
+            reverse=reverse,
+        )
+        options = [option.upper() for option in options]
+        if "LIMIT" in options:
+            offset, count = (int(value) for value in options[options.index("LIMIT") + 1:options.index("LIMIT") + 3])
+            members = members[offset:offset + count if count >= 0 else None]
+        if "WITHSCORES" in options:
+            return [item for score, member in members for item in (member, repr(score))]
+        return [member for _, member in members]
+
+    def execute(self, command: str, args: List[str]) -> Any:
+        match command:
+            case "PING":
+                return "PONG"
+            case "AUTH" | "SELECT":
+                return "OK"
+            case "GET":
+                return self.values.get(args[0])
+            case "SET":
+                self.values[args[0]] = args[1]
+                return "OK"
+            case "DEL":
+                return sum(
+                    (self.values.pop(key, None) is not None)
+                    + (self.hashes.pop(key, None) is not None)
+                    + (self.sorted_sets.pop(key, None) is not None)
+                    for key in args
+                )
+            case "INCR":
+                value = int(self.values.get(args[0], "0")) + 1
+                self.values[args[0]] = str(value)
+                return value
+            case "HGET":
+                return self.hashes.get(args[0], {}).get(args[1])
+            case "HSET":
+                fields = self.hashes.setdefault(args[0], {})
+                pairs = list(zip(args[1::2], args[2::2]))
+                added = sum(field not in fields for field, _ in pairs)
+                fields.update(pairs)
+                return added
+            case "HDEL":
+                fields = self.hashes.get(args[0], {})
+                return sum(fields.pop(field, None) is not None for field in args[1:])
+            case "HGETALL":
+                return [item for pair in self.hashes.get(args[0], {}).items() for item in pair]
+            case "HMGET":
+                fields = self.hashes.get(args[0], {})
+                return [fields.get(field) for field in args[1:]]
+            case "ZADD":
+                members = self.sorted_sets.setdefault(args[0], {})
+                pairs = list(zip(args[2::2], (float(score) for score in args[1::2])))
+                added = sum(member not in members for member, _ in pairs)
+                members.update(pairs)
+                return added
+            case "ZREM":
+                members = self.sorted_sets.get(args[0], {})
+                return sum(members.pop(member, None) is not None for member in args[1:])
+            case "ZRANGEBYSCORE":
+                return self.range_by_score(args[0], args[1], args[2], False, args[3:])
+            case "ZREVRANGEBYSCORE":
+                return self.range_by_score(args[0], args[2], args[1], True, args[3:])
+            case _:
+                raise ValueError(f"unknown command '{command}'")
+
+
+def encode_reply(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, list):
+        return f"*{len(reply)}\r\n".encode() + b"".join(encode_reply(item) for item in reply)
+    if reply in ("OK", "PONG"):
+        return f"+{reply}\r\n".encode()
+    data = reply.encode("utf-8")
+    return f"${len(data)}\r\n".encode() + data + b"\r\n"
+
+
+async def read_command(reader: asyncio.StreamReader) -> List[str]:
+    header = await reader.readline()
+    if not header:
+        raise ConnectionError()
+    count = int(header[1:-2])
+    args = []
+    for _ in range(count):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2].decode("utf-8"))
+    return args
+
+
+async def serve(host: str, port: int):
+    store = RedisStandIn()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                command, *args = await read_command(reader)
+                try:
+                    writer.write(encode_reply(store.execute(command.upper(), args)))
+                except Exception as e:
+                    writer.write(f"-ERR {e}\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
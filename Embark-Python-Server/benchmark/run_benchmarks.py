@@ -0,0 +1,529 @@
+"""
+Offline component benchmarks for the Embark server.
+
+Every LLM call is served by the deterministic fake provider (`provider: fake`) and every
+MCP tool by the local stand-in server, so the numbers only measure our own overhead.
+Run from the `Embark-Python-Server` directory:
+
+    python -m benchmark.run_benchmarks --iterations 20 --output benchmark_results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# Keep the frameworks offline.
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+
+from benchmark.benchmark_runner import BenchmarkResult, run_benchmark
+from core.llm.fake_llm_provider.fake_llm import fake_llm_settings
+
+SERVER_ROOT = Path(__file__).resolve().parent.parent
+EXAMPLE_WORKFLOW_PATH = SERVER_ROOT / "examples" / "customer_management_use_case" / "custom_workflow.json"
+MCP_SSE_PORT = 8001
+# Discovery latency of the servers of the wide workflow benchmark
+WIDE_SERVER_LATENCY_MS = 100
+
+
+def get_fake_llm_config():
+    from models.workflow_models.workflow import LLM
+    return LLM(model="fake-model", provider="fake", top_probability=1.0, temperature=0, max_tokens=256)
+
+
+def get_stdio_tool(tool_name: str):
+    from models.workflow_models.workflow import Stdio, Tool
+    return Tool(
+        name=tool_name,
+        connection=Stdio(
+            command=sys.executable,
+            arguments=["-m", "benchmark.mcp_stand_in_server", "--transport", "stdio"],
+        ),
+    )
+
+
+def get_sse_tool(tool_name: str, port: int = MCP_SSE_PORT):
+    from models.workflow_models.workflow import Sse, Tool
+    return Tool(
+        name=tool_name,
+        connection=Sse(connection_url=f"http://localhost:{port}/sse", bearer_token=None),
+    )
+
+
+def get_agent(name: str, tools: list = None):
+    from models.workflow_models.workflow import Agent
+    return Agent(
+        name=name,
+        goal=f"Benchmark agent {name}",
+        detailed_prompt="Answer the request using the available information.",
+        agent_responsibility="Produce the requested answer.",
+        expected_output="A short answer.",
+        tools=tools or [],
+        llm=get_fake_llm_config(),
+    )
+
+
+def get_workflow(framework: str, execution_type: str, agent_count: int = 3):
+    from models.workflow_models.workflow import Workflow
+    return Workflow(
+        name=f"{framework}_benchmark_workflow",
+        description="Benchmark workflow",
+        agents=[get_agent(f"agent_{index}") for index in range(agent_count)],
+        agent_execution_framework=framework,
+        execution_type=execution_type,
+        reflection_additional_instruction=None,
+        reflection_llm_config=get_fake_llm_config(),
+    )
+
+
+def get_example_custom_workflow(framework: str = "langgraph"):
+    from models.api_models.workflow import CustomWorkflowConfig
+    config = json.loads(EXAMPLE_WORKFLOW_PATH.read_text())
+    for node in config["workflows"]:
+        node["agent_execution_framework"] = framework
+        node["agent_config"]["llm"] = get_fake_llm_config().model_dump()
+        node["agent_config"]["tools"] = []
+    return CustomWorkflowConfig(**config)
+
+
+@contextlib.contextmanager
+def fake_llm(**settings):
+    previous = fake_llm_settings.model_dump()
+    for key, value in settings.items():
+        setattr(fake_llm_settings, key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(fake_llm_settings, key, value)
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex(("localhost", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"MCP stand-in server did not start on port {port}")
+
+
+@contextlib.contextmanager
+def mcp_stand_in_server(port: int = MCP_SSE_PORT, latency_ms: float = 0):
+    """Run the SSE stand-in, by default on the port the CrewAI executors connect to at import time."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmark.mcp_stand_in_server", "--transport", "sse", "--port", str(port), "--latency-ms", str(latency_ms)],
+        cwd=SERVER_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        yield
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def benchmark_pydantic_model_builder(iterations: int) -> List[BenchmarkResult]:
+    from shared.pydantic_model_creator import build_pydantic_model_from_dict
+    config = get_example_custom_workflow()
+    nested_format = {
+        "customer": {"name": "str", "age": "int", "address": {"city": "str", "zip": "str"}},
+        "orders": [{"order_id": "str", "amount": "float", "items": [{"sku": "str", "quantity": "int"}]}],
+        "is_priority": "bool",
+    }
+
+    def build_example_models():
+        for node in config.workflows:
+            build_pydantic_model_from_dict(name=node.agent_config.name, data=node.structured_response_format)
+
+    return [
+        await run_benchmark("build_example_models", "pydantic_model_creator", build_example_models, iterations),
+        await run_benchmark(
+            "build_nested_model",
+            "pydantic_model_creator",
+            lambda: build_pydantic_model_from_dict(name="nested", data=nested_format),
+            iterations,
+        ),
+    ]
+
+
+async def benchmark_custom_workflow_routing(iterations: int) -> List[BenchmarkResult]:
+    from services.custom_workflow_executor.custom_workflow_manager import CustomWorkflowManager
+    config = get_example_custom_workflow()
+    manager = CustomWorkflowManager(config.workflows)
+    start_config = manager.agent_config_map[manager.start_node]
+    parent_result = {
+        "customer_name": "John Doe",
+        "product_name": "Washer",
+        "product_model": "W-100",
+        "user_request_description": "Not spinning",
+        "is_insufficient_data": False,
+    }
+
+    def route_all_nodes():
+        for node in manager.agent_config_map.values():
+            if node.child_agent_names:
+                manager.get_valid_child_name(result=parent_result, child_agent_names=node.child_agent_names)
+
+    return [
+        await run_benchmark("manager_init", "custom_workflow_manager", lambda: CustomWorkflowManager(config.workflows), iterations),
+        await run_benchmark("cycle_check", "custom_workflow_manager", lambda: manager.is_cyclic(manager.start_node), iterations),
+        await run_benchmark(
+            "route_entry_node",
+            "custom_workflow_manager",
+            lambda: manager.get_valid_child_name(result=parent_result, child_agent_names=start_config.child_agent_names),
+            iterations,
+        ),
+        await run_benchmark("route_all_nodes", "custom_workflow_manager", route_all_nodes, iterations),
+    ]
+
+
+async def benchmark_get_tools(iterations: int) -> List[BenchmarkResult]:
+    from shared.langgraph.langgraph_agent import LangGraphAgent
+    stdio_tools = [get_stdio_tool("get_product_purchase_details"), get_stdio_tool("get_warranty_details")]
+    sse_tools = [get_sse_tool("get_product_purchase_details"), get_sse_tool("get_warranty_details")]
+    warm_agent = LangGraphAgent()
+
+    return [
+        await run_benchmark("stdio_cold", "base_agent_get_tools", lambda: LangGraphAgent().get_tools(stdio_tools), iterations),
+        await run_benchmark("sse_cold", "base_agent_get_tools", lambda: LangGraphAgent().get_tools(sse_tools), iterations),
+        await run_benchmark("sse_warm", "base_agent_get_tools", lambda: warm_agent.get_tools(sse_tools), iterations),
+    ]
+
+
+async def benchmark_status_store(iterations: int) -> List[BenchmarkResult]:
+    import itertools
+    import tempfile
+    from core.datastore.datastore import WorkflowStatus as WorkflowStatusStore
+    from core.datastore.state_backend import InMemoryStateBackend, SQLiteStateBackend
+    from models.status_models.status import StatusQuery, WorkflowItem, WorkflowStatus
+    item_count = 200
+
+    def add_and_update_items(get_backend):
+        store = WorkflowStatusStore(get_backend())
+        for index in range(item_count):
+            store.add_item(WorkflowItem(name=f"workflow_{index}", status=WorkflowStatus.SCHEDULED))
+        for index in range(item_count):
+            store.update_item(WorkflowItem(name=f"workflow_{index}", status=WorkflowStatus.RUNNING))
+        for index in range(item_count):
+            store.update_item(WorkflowItem(name=f"workflow_{index}", status=WorkflowStatus.COMPLETED))
+        store.get_status()
+        store.backend.close()
+
+    def get_history_store(backend):
+        store = WorkflowStatusStore(backend)
+        for index in range(2000):
+            store.add_item(WorkflowItem(name=f"workflow_{index}", status=WorkflowStatus.COMPLETED))
+        return store
+
+    history_store = get_history_store(InMemoryStateBackend())
+    latest_page = StatusQuery(limit=50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_runs = itertools.count()
+        get_sqlite_backend = lambda: SQLiteStateBackend(f"{directory}/state_{next(sqlite_runs)}.db")
+        sqlite_history_store = get_history_store(get_sqlite_backend())
+        return [
+            await run_benchmark(f"add_update_{item_count}_items", "status_store", lambda: add_and_update_items(InMemoryStateBackend), iterations),
+            await run_benchmark(f"add_update_{item_count}_items_sqlite", "status_store", lambda: add_and_update_items(get_sqlite_backend), iterations),
+            await run_benchmark("get_status_2000_items", "status_store", history_store.get_status, iterations),
+            await run_benchmark("query_page_50_of_2000_items", "status_store", lambda: history_store.query(latest_page), iterations),
+            await run_benchmark(
+                "query_page_50_of_2000_items_sqlite", "status_store", lambda: sqlite_history_store.query(latest_page), iterations
+            ),
+            await run_benchmark("get_version_2000_items", "status_store", history_store.get_version, iterations),
+        ]
+
+
+async def benchmark_serialization(iterations: int) -> List[BenchmarkResult]:
+    import json
+    from fastapi.encoders import jsonable_encoder
+    from models.status_models.status import WorkflowItem, WorkflowStatus
+    from shared import fast_json
+    items = [WorkflowItem(name=f"workflow_{index}", status=WorkflowStatus.COMPLETED) for index in range(500)]
+    result = {
+        f"node_{index}": {"summary": "lorem ipsum " * 50, "scores": list(range(50)), "passed": index % 2 == 0}
+        for index in range(200)
+    }
+    return [
+        await run_benchmark("status_500_items_jsonable_encoder", "serialization", lambda: json.dumps(jsonable_encoder(items)).encode(), iterations),
+        await run_benchmark("status_500_items_dump_json", "serialization", lambda: fast_json.dump_models_json(WorkflowItem, items), iterations),
+        await run_benchmark("result_200_nodes_json", "serialization", lambda: json.dumps(result), iterations),
+        await run_benchmark("result_200_nodes_fast_json", "serialization", lambda: fast_json.dumps_bytes(result), iterations),
+    ]
+
+
+async def benchmark_workflow_executors(iterations: int) -> List[BenchmarkResult]:
+    from services.workflow_executors.executor_implementation.autogen_executor import AutogenExecutor
+    from services.workflow_executors.executor_implementation.crewai_executor import CrewAIExecutor
+    from services.workflow_executors.executor_implementation.langgraph_executor import LangGraphExecutor
+    from shared.agent_cache import agent_cache
+    autogen_workflow = get_workflow("autogen", "round_robin")
+    crewai_workflow = get_workflow("crewai", "sequential")
+    langgraph_workflow = get_workflow("langgraph", "supervisor")
+    # Eight agents across four remote SSE servers, two servers each
+    wide_ports = [MCP_SSE_PORT + 1 + index for index in range(4)]
+    wide_workflow = get_workflow("autogen", "round_robin", agent_count=8)
+    for index, agent in enumerate(wide_workflow.agents):
+        agent.tools = [
+            get_sse_tool("get_product_purchase_details", wide_ports[index % 4]),
+            get_sse_tool("get_warranty_details", wide_ports[(index + 1) % 4]),
+        ]
+
+    async def autogen_setup():
+        executor = AutogenExecutor()
+        agents = await executor.get_agents_for_workflow(autogen_workflow)
+        agents.append(await executor.initialize_reflection(
+            manager_additional_instructions=None,
+            llm=autogen_workflow.reflection_llm_config,
+        ))
+        executor.autogen_agent_instance.get_team(agents, autogen_workflow.execution_type)
+        await executor.autogen_agent_instance.release_agents(agents)
+
+    async def autogen_wide_setup():
+        executor = AutogenExecutor()
+        agents = await executor.get_agents_for_workflow(wide_workflow)
+        await executor.autogen_agent_instance.release_agents(agents)
+
+    async def crewai_setup():
+        executor = CrewAIExecutor()
+        agents, tasks = await executor.get_agents_for_workflow(crewai_workflow)
+        await executor.crewai_agent_instance.get_crew(agents, tasks)
+
+    async def langgraph_setup():
+        await LangGraphExecutor().get_agents_for_workflow(langgraph_workflow)
+
+    results = [
+        await run_benchmark("autogen_setup_cold", "workflow_executor", autogen_setup, iterations, setup=agent_cache.clear),
+        await run_benchmark("autogen_setup_warm", "workflow_executor", autogen_setup, iterations),
+    ]
+    with contextlib.ExitStack() as servers:
+        for port in wide_ports:
+            servers.enter_context(mcp_stand_in_server(port, latency_ms=WIDE_SERVER_LATENCY_MS))
+        results.append(await run_benchmark(
+            "autogen_setup_cold_8_agents_4_servers",
+            "workflow_executor",
+            autogen_wide_setup,
+            iterations,
+            setup=agent_cache.clear,
+        ))
+    results += [
+        await run_benchmark("crewai_setup_cold", "workflow_executor", crewai_setup, iterations, setup=agent_cache.clear),
+        await run_benchmark("crewai_setup_warm", "workflow_executor", crewai_setup, iterations),
+        await run_benchmark("langgraph_setup", "workflow_executor", langgraph_setup, iterations),
+    ]
+
+    with fake_llm(response_suffix="TERMINATE"):
+        results.append(await run_benchmark(
+            "autogen_execute",
+            "workflow_executor",
+            lambda: AutogenExecutor().execute(workflow=autogen_workflow, workflow_task="Benchmark task"),
+            iterations,
+        ))
+    with fake_llm(response_text="Thought: I now know the final answer\nFinal Answer: benchmark result"):
+        results.append(await run_benchmark(
+            "crewai_execute",
+            "workflow_executor",
+            lambda: CrewAIExecutor().execute(workflow=crewai_workflow, workflow_task="Benchmark task"),
+            iterations,
+        ))
+    return results
+
+
+async def benchmark_custom_workflow_executors(iterations: int) -> List[BenchmarkResult]:
+    from services.custom_workflow_executor.custom_workflow_implementation.crewai_executor import CrewAIExecutor
+    from services.custom_workflow_executor.custom_workflow_implementation.langgraph_executor import LangGraphExecutor
+    from services.custom_workflow_executor.custom_workflow_manager import CustomWorkflowManager
+    from shared.pydantic_model_creator import build_pydantic_model_from_dict
+    from shared.agent_cache import agent_cache
+    from shared.mcp_concurrency import mcp_server_limits
+    from core.datastore.routing_stats import get_workflow_key, routing_stats
+    from models.workflow_models.custom_workflow import SpeculationConfig, SpeculationMode
+    from models.workflow_models.workflow import CascadeModel, ModelCascade
+    response_format = build_pydantic_model_from_dict(name="benchmark_node", data={"answer": "str", "is_done": "bool"})
+    config = get_example_custom_workflow("langgraph")
+    default_max_concurrency = mcp_server_limits.max_concurrency
+
+    async def langgraph_node():
+        await LangGraphExecutor().execute(
+            agent=get_agent("langgraph_node"), response_format=response_format, task_message="Benchmark task"
+        )
+
+    # One turn of five independent lookups on the SSE stand-in, run concurrently or one at a time
+    fan_out_agent = get_agent("langgraph_fan_out_node", tools=[get_sse_tool("get_product_purchase_details")])
+
+    def langgraph_tool_fan_out(max_concurrency: int):
+        async def run():
+            fake_llm_settings.tool_calls_per_turn = 5
+            mcp_server_limits.set_max_concurrency(max_concurrency)
+            try:
+                await LangGraphExecutor().execute(agent=fan_out_agent, response_format=response_format, task_message="Benchmark task")
+            finally:
+                fake_llm_settings.tool_calls_per_turn = 0
+                mcp_server_limits.set_max_concurrency(default_max_concurrency)
+        return run
+
+    # A small model answering first, the configured model only when its answer is rejected
+    confident_response_format = build_pydantic_model_from_dict(name="benchmark_node", data={"answer": "str", "confidence": "float"})
+
+    def langgraph_cascade_node(acceptance: Optional[str]):
+        agent = get_agent("langgraph_cascade_node")
+        if acceptance is not None:
+            agent.llm.cascade = ModelCascade(models=[CascadeModel(model="fake-small-model", provider="fake")], acceptance=acceptance)
+
+        async def run():
+            await LangGraphExecutor().execute_with_cascade(
+                agent=agent, response_format=confident_response_format, task_message="Benchmark task"
+            )
+        return run
+
+    async def crewai_node():
+        await CrewAIExecutor().execute(
+            agent=get_agent("crewai_node"), response_format=response_format, task_message="Benchmark task"
+        )
+
+    async def custom_workflow():
+        await CustomWorkflowManager(config.workflows).execute_workflow(
+            config.task, share_task_among_agents=config.share_task_among_agents
+        )
+
+    # Children with MCP tools, cold: their agents are built while the parent generates, or after it
+    routed_config = get_example_custom_workflow("langgraph")
+    for node in routed_config.workflows:
+        if not node.is_entry_point:
+            node.agent_config.tools = [get_stdio_tool("get_warranty_details")]
+
+    def routed_workflow(early_routing: bool):
+        async def run():
+            await CustomWorkflowManager(routed_config.workflows, early_routing=early_routing).execute_workflow(routed_config.task)
+        return run
+
+    # Children that only need the first field of their parent, routing learned from past runs
+    speculative_config = get_example_custom_workflow("langgraph")
+    node_map = {node.agent_config.name: node for node in speculative_config.workflows}
+    for node in speculative_config.workflows:
+        for child_name in node.child_agent_names:
+            node_map[child_name].input_keys_required_from_parent = list(node.structured_response_format)[:1]
+    workflow_key = get_workflow_key(speculative_config.workflows)
+    for node in speculative_config.workflows:
+        if len(node.child_agent_names) > 1:
+            for _ in range(SpeculationConfig().min_samples):
+                routing_stats.record(workflow_key, node.agent_config.name, node.child_agent_names[-1])
+
+    def speculative_workflow(mode: Optional[SpeculationMode]):
+        async def run():
+            await CustomWorkflowManager(
+                speculative_config.workflows, speculation=SpeculationConfig(mode=mode) if mode else None
+            ).execute_workflow(speculative_config.task)
+        return run
+
+    results = [
+        await run_benchmark("langgraph_node_cold", "custom_workflow_executor", langgraph_node, iterations, setup=agent_cache.clear),
+        await run_benchmark("langgraph_node_warm", "custom_workflow_executor", langgraph_node, iterations),
+        await run_benchmark("langgraph_example_workflow", "custom_workflow_executor", custom_workflow, iterations),
+        await run_benchmark("langgraph_node_tool_fan_out_5_concurrent", "custom_workflow_executor", langgraph_tool_fan_out(8), iterations),
+        await run_benchmark("langgraph_node_tool_fan_out_5_server_limit_1", "custom_workflow_executor", langgraph_tool_fan_out(1), iterations),
+    ]
+    with fake_llm(latency_seconds=0.2):
+        for early_routing in (False, True):
+            results.append(await run_benchmark(
+                f"langgraph_routed_workflow_cold_early_routing_{'on' if early_routing else 'off'}",
+                "custom_workflow_executor",
+                routed_workflow(early_routing),
+                iterations,
+                setup=agent_cache.clear,
+            ))
+        for mode in (None, SpeculationMode.PREPARE, SpeculationMode.EXECUTE):
+            results.append(await run_benchmark(
+                f"langgraph_workflow_speculation_{mode.value if mode else 'off'}",
+                "custom_workflow_executor",
+                speculative_workflow(mode),
+                iterations,
+            ))
+    # The fake answers with a confidence of 0, so confidence acceptance always escalates
+    with fake_llm(model_latency_seconds={"fake-small-model": 0.05, "fake-model": 0.3}):
+        for name, acceptance in (("large_model", None), ("cascade_accepted", "schema"), ("cascade_escalated", "confidence")):
+            results.append(await run_benchmark(
+                f"langgraph_node_{name}", "custom_workflow_executor", langgraph_cascade_node(acceptance), iterations
+            ))
+    crewai_answer = json.dumps({"answer": "benchmark result", "is_done": True})
+    with fake_llm(response_text=f"Thought: I now know the final answer\nFinal Answer: {crewai_answer}"):
+        results.append(await run_benchmark("crewai_node", "custom_workflow_executor", crewai_node, iterations))
+    return results
+
+
+BENCHMARK_GROUPS: dict[str, Callable] = {
+    "pydantic_model_creator": benchmark_pydantic_model_builder,
+    "custom_workflow_manager": benchmark_custom_workflow_routing,
+    "base_agent_get_tools": benchmark_get_tools,
+    "status_store": benchmark_status_store,
+    "serialization": benchmark_serialization,
+    "workflow_executor": benchmark_workflow_executors,
+    "custom_workflow_executor": benchmark_custom_workflow_executors,
+}
+
+
+async def run_benchmarks(groups: List[str], iterations: int) -> List[BenchmarkResult]:
+    results = []
+    for group in groups:
+        results.extend(await BENCHMARK_GROUPS[group](iterations))
+    return results
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=SERVER_ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline Embark component benchmark")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM latency per call in seconds")
+    parser.add_argument("--output-tokens", type=int, default=16, help="Fake LLM tokens per free text response")
+    parser.add_argument("--group", action="append", choices=sorted(BENCHMARK_GROUPS), help="Only run these groups")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    fake_llm_settings.latency_seconds = args.latency
+    fake_llm_settings.output_tokens = args.output_tokens
+    groups = args.group or list(BENCHMARK_GROUPS)
+
+    with mcp_stand_in_server():
+        # Framework logging goes to stderr so stdout only carries the report.
+        with contextlib.redirect_stdout(sys.stderr):
+            results = asyncio.run(run_benchmarks(groups, args.iterations))
+
+    report = {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": get_git_commit(),
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "fake_llm": fake_llm_settings.model_dump(),
+        },
+        "results": [result.model_dump() for result in results],
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(report_json)
+    else:
+        print(report_json)
+
+
+if __name__ == "__main__":
+    main()
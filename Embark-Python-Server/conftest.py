@@ -0,0 +1 @@
+# Keeps the server directory on sys.path, tests import modules the way the server does (core.*, shared.*)
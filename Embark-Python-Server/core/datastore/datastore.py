@@ -1,38 +1,243 @@
-from typing import List
-from models.status_models.status import WorkflowItem
+import time
+from itertools import islice
+from os import getenv as os_getenv
+from typing import Any, Callable, Iterator, List, Optional, TypeVar
+from core.datastore.redis_state_backend import RedisStateBackend, RespClient
+from core.datastore.state_backend import InMemoryStateBackend, SQLiteStateBackend, StateBackend
+from core.runs.run_context import get_run_id
+from models.status_models.status import StatusPage, StatusQuery, WorkflowItem, WorkflowStatus as ItemStatus
+from shared import fast_json
+from shared.blocking_calls import blocking_io_pool
+
+T = TypeVar("T")
+
+
+FINISHED_STATUSES = {
+    ItemStatus.COMPLETED.value, ItemStatus.FAILED.value, ItemStatus.BUDGET_EXCEEDED.value, ItemStatus.CANCELLED.value,
+}
+
+
+def get_state_backend(kind: Optional[str] = None) -> StateBackend:
+    """
+    Backend selected by STATE_BACKEND: memory (single process), sqlite (processes of one
+    host, STATE_SQLITE_PATH) or redis (any number of hosts, STATE_REDIS_URL).
+    """
+    kind = (kind or os_getenv("STATE_BACKEND", "memory")).lower()
+    match kind:
+        case "memory":
+            return InMemoryStateBackend()
+        case "sqlite":
+            return SQLiteStateBackend(os_getenv("STATE_SQLITE_PATH", "embark_state.db"))
+        case "redis":
+            client = RespClient.from_url(os_getenv("STATE_REDIS_URL", "redis://localhost:6379/0"))
+            return RedisStateBackend(client, prefix=os_getenv("STATE_REDIS_PREFIX", "embark:"))
+        case _:
+            raise ValueError(f"Unsupported state backend: '{kind}'. Must be 'memory', 'sqlite' or 'redis'.")
+
+
+async def run_state_call(call_name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Call a method of the status or run store from async code. With the SQLite and Redis
+    backends the call runs on the blocking I/O pool, in-memory calls are made inline.
+    """
+    if not state_backend.blocking:
+        return func(*args, **kwargs)
+    return await blocking_io_pool.run(call_name, func, *args, **kwargs)
+
 
 class StatusInterface:
     """
     Base interface for managing a list of WorkflowItems.
+    Items are stored by run id and name in the shared state backend, in the order they
+    were added, so reruns and concurrent runs of a workflow keep their own items.
+
+    Every add and update takes the next version of the list, so readers can tell whether
+    anything changed from the version alone and ask only for the items changed since.
+    Sorted set indexes keep every item by sequence (the order they were added) and by
+    version (the order they changed), and the items of each run, name and status by
+    sequence. A page is read in order from the most selective index, so it costs the items
+    of the page rather than the whole history. Finished items not updated for
+    `retention_seconds` are removed.
     """
-    def __init__(self):
-        self.status_items: List[WorkflowItem] = []
+    namespace = "status"
+
+    def __init__(self, backend: StateBackend, retention_seconds: float = 0):
+        self.backend = backend
+        self.retention_seconds = retention_seconds
+        self.pruned_at = 0.0
+
+    @staticmethod
+    def get_field(run_id: Optional[str], name: str) -> str:
+        return f"{run_id or ''}:{name}"
+
+    def get_index_key(self, index: str, value: Optional[str] = None) -> str:
+        return f"{self.namespace}:{index}" if value is None else f"{self.namespace}:{index}:{value}"
+
+    def get_index_keys(self, run_id: Optional[str], name: str, status: str) -> List[str]:
+        """Every index holding an item."""
+        return [
+            self.get_index_key("by_sequence"),
+            self.get_index_key("by_version"),
+            self.get_index_key("run", run_id or ""),
+            self.get_index_key("name", name),
+            self.get_index_key("status", status),
+        ]
+
+    def to_entry(self, sequence: int, item: WorkflowItem) -> str:
+        # The item is serialized by pydantic directly, without a dict in between
+        return f'{{"sequence":{sequence},"item":{item.model_dump_json()}}}'
+
+    def get_version(self) -> int:
+        version = self.backend.get(f"{self.namespace}:sequence")
+        return int(version) if version is not None else 0
+
+    def next_version(self) -> int:
+        return self.backend.incr(f"{self.namespace}:sequence")
 
     def add_item(self, item: WorkflowItem):
-        self.status_items.append(item)
+        # The store fields are set on the item itself, a copy costs more than the write
+        item.version = self.next_version()
+        item.run_id = item.run_id or get_run_id()
+        item.created_at = item.updated_at = time.time()
+        field = self.get_field(item.run_id, item.name)
+        existing_item = self.backend.hget(self.namespace, field)
+        if existing_item is not None:
+            # Added again by the same run, e.g. a workflow listed twice
+            self.backend.zrem(self.get_index_key("status", fast_json.loads(existing_item)["item"]["status"]), field)
+        self.backend.hset(self.namespace, field, self.to_entry(item.version, item))
+        # The sequence of an item is the version it was added with
+        self.backend.zadd_many(self.get_index_keys(item.run_id, item.name, item.status.value), field, item.version)
+        self.prune()
 
     def get_status(self) -> List[WorkflowItem]:
-        return self.status_items
+        return [WorkflowItem.model_validate(entry["item"]) for entry in self.scan(self.get_index_key("by_sequence"))]
 
     def update_item(self, item: WorkflowItem):
-        for i, existing_item in enumerate(self.status_items):
-            if existing_item.name == item.name:
-                self.status_items[i] = item
+        """Update the item of the same name added by the run, the current run by default."""
+        item.run_id = item.run_id or get_run_id()
+        field = self.get_field(item.run_id, item.name)
+        existing_item = self.backend.hget(self.namespace, field)
+        if existing_item is None:
+            return
+        entry = fast_json.loads(existing_item)
+        item.version = self.next_version()
+        item.created_at = entry["item"].get("created_at")
+        item.updated_at = time.time()
+        self.backend.hset(self.namespace, field, self.to_entry(entry["sequence"], item))
+        self.backend.zadd(self.get_index_key("by_version"), field, item.version)
+        if entry["item"]["status"] != item.status.value:
+            self.backend.zrem(self.get_index_key("status", entry["item"]["status"]), field)
+            self.backend.zadd(self.get_index_key("status", item.status.value), field, entry["sequence"])
+
+    def scan(
+        self,
+        index_key: str,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        reverse: bool = False,
+        batch_size: int = 100,
+    ) -> Iterator[dict]:
+        """Entries of an index in score order, read `batch_size` at a time."""
+        while True:
+            members = self.backend.zrange_by_score(index_key, after=after, before=before, reverse=reverse, limit=batch_size)
+            values = self.backend.hmget(self.namespace, [field for field, _ in members]) if members else []
+            for value in values:
+                # None when removed since the index was read
+                if value is not None:
+                    yield fast_json.loads(value)
+            if len(members) < batch_size:
+                return
+            if reverse:
+                before = members[-1][1]
+            else:
+                after = members[-1][1]
+
+    def get_page_index(self, query: StatusQuery) -> str:
+        """The index with the fewest items that still holds every item matching the query."""
+        if query.run_id is not None:
+            return self.get_index_key("run", query.run_id)
+        if query.name is not None:
+            return self.get_index_key("name", query.name)
+        if query.status is not None and len(query.status) == 1:
+            return self.get_index_key("status", query.status[0].value)
+        return self.get_index_key("by_sequence")
+
+    def query(self, query: StatusQuery) -> StatusPage:
+        """
+        One page of the items matching `query`, newest first. With `since_version`, the
+        items changed after that version instead, oldest change first. Items are read from
+        an index in page order, filters are applied as they are read.
+        """
+        version = self.get_version()
+        statuses = {status.value for status in query.status} if query.status else None
+
+        def matches(item: dict) -> bool:
+            updated_at = item.get("updated_at") or 0
+            return (
+                (query.run_id is None or item.get("run_id") == query.run_id)
+                and (query.name is None or item["name"] == query.name)
+                and (statuses is None or item["status"] in statuses)
+                and (query.updated_after is None or updated_at > query.updated_after)
+                and (query.updated_before is None or updated_at < query.updated_before)
+            )
+
+        batch_size = query.limit + 1
+        if query.since_version is not None:
+            get_key = lambda entry: entry["item"].get("version") or entry["sequence"]
+            after = max(query.since_version, query.cursor or 0)
+            if query.run_id is not None:
+                # The items of one run are few, they are put in version order here
+                run_entries = sorted(self.scan(self.get_index_key("run", query.run_id), batch_size=batch_size), key=get_key)
+                entries = (entry for entry in run_entries if get_key(entry) > after)
+            else:
+                entries = self.scan(self.get_index_key("by_version"), after=after, batch_size=batch_size)
+        else:
+            get_key = lambda entry: entry["sequence"]
+            entries = self.scan(self.get_page_index(query), before=query.cursor, reverse=True, batch_size=batch_size)
+        page = list(islice((entry for entry in entries if matches(entry["item"])), query.limit + 1))
+        next_cursor = get_key(page[query.limit - 1]) if len(page) > query.limit else None
+        return StatusPage(
+            items=[WorkflowItem.model_validate(entry["item"]) for entry in page[:query.limit]],
+            version=version,
+            next_cursor=next_cursor,
+        )
+
+    def remove_entry(self, entry: dict):
+        item = entry["item"]
+        field = self.get_field(item.get("run_id"), item["name"])
+        self.backend.hdel(self.namespace, field)
+        for index_key in self.get_index_keys(item.get("run_id"), item["name"], item["status"]):
+            self.backend.zrem(index_key, field)
+
+    def prune(self):
+        if not self.retention_seconds or time.time() - self.pruned_at < 60:
+            return
+        self.pruned_at = time.time()
+        expired_before = self.pruned_at - self.retention_seconds
+        # Versions follow update times, only the items updated before the cutoff are read
+        for entry in self.scan(self.get_index_key("by_version")):
+            item = entry["item"]
+            if (item.get("updated_at") or 0) >= expired_before:
                 return
+            if item["status"] in FINISHED_STATUSES:
+                self.remove_entry(entry)
 
 class WorkflowStatus(StatusInterface):
     """
     Manages the status of regular workflows.
     """
-    pass
+    namespace = "workflow_status"
 
 class CustomWorkflowStatus(StatusInterface):
     """
     Manages the status of custom workflows.
     """
-    pass
+    namespace = "custom_workflow_status"
 
 
 # Instantiate and use them
-workflow_status = WorkflowStatus()
-custom_workflow_status = CustomWorkflowStatus()
+state_backend = get_state_backend()
+# 0 keeps finished items forever
+status_retention_seconds = float(os_getenv("STATUS_RETENTION_SECONDS", "86400"))
+workflow_status = WorkflowStatus(state_backend, retention_seconds=status_retention_seconds)
+custom_workflow_status = CustomWorkflowStatus(state_backend, retention_seconds=status_retention_seconds)
@@ -0,0 +1,191 @@
+import select
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from core.datastore.state_backend import StateBackend
+
+# Batches of these commands can be sent again after a dropped connection, writes cannot
+READ_ONLY_COMMANDS = {"PING", "GET", "HGET", "HGETALL", "HMGET", "ZRANGEBYSCORE", "ZREVRANGEBYSCORE"}
+
+
+class RespError(Exception):
+    """Error reply sent by a Redis-protocol server."""
+
+
+class RespClient:
+    """
+    Minimal blocking client for the Redis serialisation protocol (RESP2). Enough for the
+    commands used by `RedisStateBackend`, without depending on a Redis client package.
+    """
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock: Optional[socket.socket] = None
+        self.reader = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespClient":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(host=parsed.hostname or "localhost", port=parsed.port or 6379, db=db, password=parsed.password)
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+
+    @staticmethod
+    def encode_command(*args: Any) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode())
+            parts.append(data)
+            parts.append(b"\r\n")
+        return b"".join(parts)
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the server")
+        prefix, payload = line[:1], line[1:-2]
+        match prefix:
+            case b"+":
+                return payload.decode("utf-8")
+            case b"-":
+                raise RespError(payload.decode("utf-8"))
+            case b":":
+                return int(payload)
+            case b"$":
+                length = int(payload)
+                if length == -1:
+                    return None
+                data = self.reader.read(length + 2)
+                return data[:-2].decode("utf-8")
+            case b"*":
+                length = int(payload)
+                if length == -1:
+                    return None
+                return [self.read_reply() for _ in range(length)]
+            case _:
+                raise RespError(f"Unexpected reply: {line!r}")
+
+    def _call(self, *args: Any) -> Any:
+        self.sock.sendall(self.encode_command(*args))
+        return self.read_reply()
+
+    def execute(self, *args: Any) -> Any:
+        return self.execute_many([args])[0]
+
+    def is_closed_by_server(self) -> bool:
+        # No reply is pending between commands, so a readable socket means it was closed
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        return bool(readable)
+
+    def execute_many(self, commands: List[tuple]) -> List[Any]:
+        """
+        Send the commands in one write and read their replies, a single round trip. A batch
+        that failed after any of it was sent is only sent again when it has no writes, a
+        write may have been applied already.
+        """
+        data = b"".join(self.encode_command(*args) for args in commands)
+        can_resend = all(str(args[0]).upper() in READ_ONLY_COMMANDS for args in commands)
+        with self.lock:
+            for attempt in range(2):
+                sent = 0
+                try:
+                    # Reconnect if the server dropped the idle connection since the last command
+                    if self.sock is not None and self.is_closed_by_server():
+                        self.close()
+                    if self.sock is None:
+                        self.connect()
+                    while sent < len(data):
+                        sent += self.sock.send(data[sent:])
+                    return [self.read_reply() for _ in commands]
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt == 1 or (sent and not can_resend):
+                        raise
+
+
+class RedisStateBackend(StateBackend):
+    """State in a Redis (or Redis-protocol compatible) server shared by every process and host."""
+    def __init__(self, client: RespClient, prefix: str = "embark:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.execute("GET", self.prefix + key)
+
+    def set(self, key: str, value: str):
+        self.client.execute("SET", self.prefix + key, value)
+
+    def delete(self, key: str):
+        self.client.execute("DEL", self.prefix + key)
+
+    def incr(self, key: str) -> int:
+        return self.client.execute("INCR", self.prefix + key)
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        return self.client.execute("HGET", self.prefix + key, field)
+
+    def hset(self, key: str, field: str, value: str):
+        self.client.execute("HSET", self.prefix + key, field, value)
+
+    def hdel(self, key: str, field: str):
+        self.client.execute("HDEL", self.prefix + key, field)
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        reply: List[str] = self.client.execute("HGETALL", self.prefix + key) or []
+        return dict(zip(reply[0::2], reply[1::2]))
+
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        if not fields:
+            return []
+        return self.client.execute("HMGET", self.prefix + key, *fields)
+
+    def zadd(self, key: str, member: str, score: float):
+        self.client.execute("ZADD", self.prefix + key, score, member)
+
+    def zadd_many(self, keys: List[str], member: str, score: float):
+        self.client.execute_many([("ZADD", self.prefix + key, score, member) for key in keys])
+
+    def zrem(self, key: str, member: str):
+        self.client.execute("ZREM", self.prefix + key, member)
+
+    def zrange_by_score(
+        self,
+        key: str,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        # "(" makes a bound exclusive
+        low = f"({after}" if after is not None else "-inf"
+        high = f"({before}" if before is not None else "+inf"
+        command = ["ZREVRANGEBYSCORE", self.prefix + key, high, low] if reverse else ["ZRANGEBYSCORE", self.prefix + key, low, high]
+        command.append("WITHSCORES")
+        if limit is not None:
+            command.extend(["LIMIT", 0, limit])
+        reply: List[str] = self.client.execute(*command) or []
+        return [(member, float(score)) for member, score in zip(reply[0::2], reply[1::2])]
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,165 @@
+import gzip
+import re
+import shutil
+import time
+from os import getenv as os_getenv
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from core.metrics.server_metrics import run_result_bytes_total
+from models.result_models.result import ResultCodec, ResultReference, ResultView, RunOutput
+from shared import fast_json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RUN_ID_PATTERN = re.compile(r"[0-9A-Za-z_-]+")
+CHUNK_SIZE = 64 * 1024
+
+
+class CountingWriter:
+    """Compresses what is written to it and counts the uncompressed bytes."""
+    def __init__(self, file: BinaryIO, codec: ResultCodec):
+        if codec == ResultCodec.ZSTD:
+            self.stream = zstandard.ZstdCompressor(level=3).stream_writer(file, closefd=False)
+        else:
+            self.stream = gzip.GzipFile(fileobj=file, mode="wb", compresslevel=6)
+        self.raw_bytes = 0
+
+    def write(self, data: bytes):
+        self.raw_bytes += len(data)
+        self.stream.write(data)
+
+    def close(self):
+        self.stream.close()
+
+
+class ResultStore:
+    """
+    Run results compressed on disk, one directory per run with a `final` and a `full`
+    view. The full transcript is encoded one message at a time and read back in chunks,
+    so neither writing nor downloading a result holds it in memory as a single string.
+
+    Results older than `max_age_seconds` are removed when new ones are written. Every
+    server process of a host shares the directory; several hosts need a shared volume.
+    """
+    def __init__(self, path: str, codec: ResultCodec, max_age_seconds: float = 0):
+        self.path = Path(path)
+        self.codec = codec
+        self.max_age_seconds = max_age_seconds
+        self.pruned_at = 0.0
+
+    def get_run_path(self, run_id: str) -> Path:
+        if not RUN_ID_PATTERN.fullmatch(run_id):
+            raise ValueError(f"Invalid run id: '{run_id}'")
+        return self.path / run_id
+
+    def get_view_path(self, run_path: Path, view: ResultView, codec: ResultCodec) -> Path:
+        return run_path / f"{view.value}.json.{'zst' if codec == ResultCodec.ZSTD else 'gz'}"
+
+    def put(self, run_id: str, output: RunOutput) -> ResultReference:
+        """Write the result of a run, replacing any previous one. Blocking, run it off the loop."""
+        run_path = self.get_run_path(run_id)
+        staging_path = run_path.with_name(f"{run_id}.tmp")
+        shutil.rmtree(staging_path, ignore_errors=True)
+        staging_path.mkdir(parents=True)
+        with self.get_view_path(staging_path, ResultView.FINAL, self.codec).open("wb") as file:
+            writer = CountingWriter(file, self.codec)
+            writer.write(fast_json.dumps_bytes(output.final))
+            writer.close()
+            final_bytes = writer.raw_bytes
+        with self.get_view_path(staging_path, ResultView.FULL, self.codec).open("wb") as file:
+            writer = CountingWriter(file, self.codec)
+            writer.write(b"[")
+            for index, entry in enumerate(output.transcript):
+                if index:
+                    writer.write(b",")
+                writer.write(fast_json.dumps_bytes(entry))
+            writer.write(b"]")
+            writer.close()
+            full_bytes = writer.raw_bytes
+        reference = ResultReference(
+            run_id=run_id,
+            url=f"/status/run/{run_id}/result",
+            codec=self.codec,
+            final_bytes=final_bytes,
+            full_bytes=full_bytes,
+            stored_bytes=sum(path.stat().st_size for path in staging_path.iterdir()),
+            created_at=time.time(),
+        )
+        (staging_path / "reference.json").write_text(reference.model_dump_json())
+        shutil.rmtree(run_path, ignore_errors=True)
+        staging_path.rename(run_path)
+        run_result_bytes_total.labels("raw").inc(final_bytes + full_bytes)
+        run_result_bytes_total.labels("stored").inc(reference.stored_bytes)
+        self.prune()
+        return reference
+
+    def get_reference(self, run_id: str) -> Optional[ResultReference]:
+        try:
+            return ResultReference.model_validate_json((self.get_run_path(run_id) / "reference.json").read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def iter_stored(self, reference: ResultReference, view: ResultView) -> Iterator[bytes]:
+        """The compressed bytes of a view as stored, for clients that accept its encoding."""
+        path = self.get_view_path(self.get_run_path(reference.run_id), view, reference.codec)
+        with path.open("rb") as file:
+            while chunk := file.read(CHUNK_SIZE):
+                yield chunk
+
+    def iter_range(self, reference: ResultReference, view: ResultView, start: int, end: int) -> Iterator[bytes]:
+        """Uncompressed bytes `start` to `end` (inclusive) of a view, decompressed as they are read."""
+        path = self.get_view_path(self.get_run_path(reference.run_id), view, reference.codec)
+        with path.open("rb") as file:
+            if reference.codec == ResultCodec.ZSTD:
+                stream = zstandard.ZstdDecompressor().stream_reader(file)
+            else:
+                stream = gzip.GzipFile(fileobj=file, mode="rb")
+            with stream:
+                # Compressed streams cannot seek, the bytes before the range are skipped
+                remaining = start
+                while remaining > 0:
+                    skipped = stream.read(min(CHUNK_SIZE, remaining))
+                    if not skipped:
+                        return
+                    remaining -= len(skipped)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = stream.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+
+    def prune(self):
+        if not self.max_age_seconds or time.time() - self.pruned_at < 60:
+            return
+        self.pruned_at = time.time()
+        expired_before = self.pruned_at - self.max_age_seconds
+        for run_path in self.path.iterdir():
+            try:
+                expired = run_path.stat().st_mtime < expired_before
+            except FileNotFoundError:
+                # Replaced or pruned by another process meanwhile
+                continue
+            if expired:
+                shutil.rmtree(run_path, ignore_errors=True)
+
+
+def get_default_codec() -> ResultCodec:
+    codec = ResultCodec(os_getenv("RESULT_STORE_CODEC", ResultCodec.ZSTD.value).lower())
+    if codec == ResultCodec.ZSTD and zstandard is None:
+        return ResultCodec.GZIP
+    return codec
+
+
+# Instantiate and use them
+result_store = ResultStore(
+    path=os_getenv("RESULT_STORE_PATH", "embark_results"),
+    codec=get_default_codec(),
+    # 0 keeps results forever
+    max_age_seconds=float(os_getenv("RESULT_STORE_MAX_AGE_SECONDS", "86400")),
+)
@@ -0,0 +1,47 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from core.datastore.datastore import state_backend
+from core.datastore.state_backend import StateBackend
+from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig
+
+
+def get_workflow_key(workflows: List[CustomWorkflowAgentConfig]) -> str:
+    """Identify a custom workflow by its graph: node names, edges and invoke conditions."""
+    graph = sorted(
+        (node.agent_config.name, node.child_agent_names, node.agent_node_invoke_condition) for node in workflows
+    )
+    canonical = json.dumps(graph, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class RoutingStats:
+    """
+    How often each edge of a custom workflow was taken by past runs, shared by all server
+    processes. Used to predict the child a router node is going to pick.
+    """
+    def __init__(self, backend: StateBackend):
+        self.backend = backend
+
+    def get_key(self, workflow_key: str, parent: str, child: str) -> str:
+        return f"routing:{workflow_key}:{parent}:{child}"
+
+    def record(self, workflow_key: str, parent: str, child: str):
+        self.backend.incr(self.get_key(workflow_key, parent, child))
+
+    def get_counts(self, workflow_key: str, parent: str, children: List[str]) -> Dict[str, int]:
+        return {child: int(self.backend.get(self.get_key(workflow_key, parent, child)) or 0) for child in children}
+
+    def predict(self, workflow_key: str, parent: str, children: List[str], min_probability: float, min_samples: int) -> Optional[str]:
+        """The child picked in at least `min_probability` of the past routings, once there are `min_samples` of them."""
+        counts = self.get_counts(workflow_key, parent, children)
+        total = sum(counts.values())
+        if total < min_samples:
+            return None
+        child, count = max(counts.items(), key=lambda item: item[1])
+        return child if count / total >= min_probability else None
+
+
+# Instantiate and use them
+routing_stats = RoutingStats(state_backend)
@@ -0,0 +1,67 @@
+import os
+import time
+from typing import Any, Optional
+
+from core.datastore.datastore import state_backend
+from core.datastore.state_backend import StateBackend
+from models.status_models.status import WorkflowStatus
+from shared import fast_json
+
+
+class RunStore:
+    """
+    State and result of every run, shared by all server processes. Cancel requests are
+    stored here too so that any process can cancel a run executing in another one.
+    """
+    def __init__(self, backend: StateBackend):
+        self.backend = backend
+
+    def schedule(self, run_id: str, kind: str, job_id: str):
+        """Record a run submitted to the work queue, before a worker picks it up."""
+        self.backend.hset("runs", run_id, fast_json.dumps({
+            "run_id": run_id,
+            "kind": kind,
+            "state": WorkflowStatus.SCHEDULED.value,
+            "job_id": job_id,
+            "scheduled_at": time.time(),
+        }))
+
+    def start(self, run_id: str, kind: str):
+        run = self.get(run_id) or {"run_id": run_id}
+        run.update({
+            "kind": kind,
+            "state": WorkflowStatus.RUNNING.value,
+            "worker": os.getpid(),
+            "started_at": time.time(),
+        })
+        self.backend.hset("runs", run_id, fast_json.dumps(run))
+
+    def finish(self, run_id: str, state: WorkflowStatus, result: Any = None, detail: Optional[str] = None):
+        run = self.get(run_id) or {"run_id": run_id}
+        run.update({"state": state.value, "finished_at": time.time(), "detail": detail})
+        if result is not None:
+            self.backend.set(f"run_result:{run_id}", fast_json.dumps(result))
+        self.backend.hset("runs", run_id, fast_json.dumps(run))
+        self.backend.delete(f"run_cancel:{run_id}")
+
+    def get(self, run_id: str) -> Optional[dict]:
+        run = self.backend.hget("runs", run_id)
+        return fast_json.loads(run) if run is not None else None
+
+    def get_result(self, run_id: str) -> Any:
+        result = self.backend.get(f"run_result:{run_id}")
+        return fast_json.loads(result) if result is not None else None
+
+    def request_cancel(self, run_id: str, reason: str) -> bool:
+        run = self.get(run_id)
+        if run is None or run["state"] not in (WorkflowStatus.SCHEDULED.value, WorkflowStatus.RUNNING.value):
+            return False
+        self.backend.set(f"run_cancel:{run_id}", reason)
+        return True
+
+    def get_cancel_request(self, run_id: str) -> Optional[str]:
+        return self.backend.get(f"run_cancel:{run_id}")
+
+
+# Instantiate and use them
+run_store = RunStore(state_backend)
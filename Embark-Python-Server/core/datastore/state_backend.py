@@ -0,0 +1,281 @@
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+
+class StateBackend(ABC):
+    """
+    Key/value, hash and sorted set storage for state shared by every server process: status
+    items, run state and results. Values are strings, callers serialise to JSON. Sorted sets
+    index hash fields by a score so that callers read them in order, one page at a time.
+    """
+    # Calls do disk or network I/O, async callers keep them off the event loop
+    blocking = True
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def hget(self, key: str, field: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def hset(self, key: str, field: str, value: str):
+        ...
+
+    @abstractmethod
+    def hdel(self, key: str, field: str):
+        ...
+
+    @abstractmethod
+    def hgetall(self, key: str) -> Dict[str, str]:
+        ...
+
+    @abstractmethod
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        ...
+
+    @abstractmethod
+    def zadd(self, key: str, member: str, score: float):
+        """Add `member` to the sorted set, or move it to `score`."""
+
+    def zadd_many(self, keys: List[str], member: str, score: float):
+        """Add `member` with the same score to several sorted sets, e.g. every index of an item."""
+        for key in keys:
+            self.zadd(key, member, score)
+
+    @abstractmethod
+    def zrem(self, key: str, member: str):
+        ...
+
+    @abstractmethod
+    def zrange_by_score(
+        self,
+        key: str,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Members scored strictly between `after` and `before` with their score, lowest first (highest with `reverse`)."""
+
+    def close(self):
+        ...
+
+
+class InMemoryStateBackend(StateBackend):
+    """Process-local state, only consistent with a single server process."""
+    blocking = False
+
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.hashes: Dict[str, Dict[str, str]] = {}
+        # Score of every member, and the (score, member) pairs in score order
+        self.sorted_set_scores: Dict[str, Dict[str, float]] = {}
+        self.sorted_sets: Dict[str, List[Tuple[float, str]]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    def set(self, key: str, value: str):
+        self.values[key] = value
+
+    def delete(self, key: str):
+        self.values.pop(key, None)
+        self.hashes.pop(key, None)
+        with self.lock:
+            self.sorted_set_scores.pop(key, None)
+            self.sorted_sets.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self.lock:
+            value = int(self.values.get(key, "0")) + 1
+            self.values[key] = str(value)
+            return value
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key: str, field: str, value: str):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hdel(self, key: str, field: str):
+        self.hashes.get(key, {}).pop(field, None)
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self.hashes.get(key, {}))
+
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        values = self.hashes.get(key, {})
+        return [values.get(field) for field in fields]
+
+    def zadd(self, key: str, member: str, score: float):
+        with self.lock:
+            scores = self.sorted_set_scores.setdefault(key, {})
+            members = self.sorted_sets.setdefault(key, [])
+            if member in scores:
+                members.pop(bisect_left(members, (scores[member], member)))
+            scores[member] = score
+            insort(members, (score, member))
+
+    def zrem(self, key: str, member: str):
+        with self.lock:
+            score = self.sorted_set_scores.get(key, {}).pop(member, None)
+            if score is not None:
+                members = self.sorted_sets[key]
+                members.pop(bisect_left(members, (score, member)))
+                # Like Redis, an emptied set is dropped, per-run sets would pile up otherwise
+                if not members:
+                    del self.sorted_sets[key], self.sorted_set_scores[key]
+
+    def zrange_by_score(
+        self,
+        key: str,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        with self.lock:
+            members = self.sorted_sets.get(key, [])
+            start = bisect_right(members, after, key=lambda pair: pair[0]) if after is not None else 0
+            end = bisect_left(members, before, key=lambda pair: pair[0]) if before is not None else len(members)
+            positions = range(end - 1, start - 1, -1) if reverse else range(start, end)
+            return [(members[position][1], members[position][0]) for position in positions[:limit]]
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State in a SQLite file shared by the processes of one host. WAL mode lets readers
+    proceed while another process writes.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes (key TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, field))"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sorted_sets (key TEXT NOT NULL, member TEXT NOT NULL, score REAL NOT NULL, PRIMARY KEY (key, member))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS sorted_sets_score ON sorted_sets (key, score)")
+
+    def _fetchone(self, query: str, parameters: tuple):
+        with self.lock:
+            return self.connection.execute(query, parameters).fetchone()
+
+    def _execute(self, query: str, parameters: tuple):
+        with self.lock:
+            self.connection.execute(query, parameters)
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._fetchone("SELECT value FROM kv WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        self._execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, value))
+
+    def delete(self, key: str):
+        with self.lock:
+            self.connection.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self.connection.execute("DELETE FROM hashes WHERE key = ?", (key,))
+            self.connection.execute("DELETE FROM sorted_sets WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        row = self._fetchone(
+            "INSERT INTO kv (key, value) VALUES (?, '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value",
+            (key,),
+        )
+        return int(row[0])
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        row = self._fetchone("SELECT value FROM hashes WHERE key = ? AND field = ?", (key, field))
+        return row[0] if row else None
+
+    def hset(self, key: str, field: str, value: str):
+        self._execute("INSERT OR REPLACE INTO hashes (key, field, value) VALUES (?, ?, ?)", (key, field, value))
+
+    def hdel(self, key: str, field: str):
+        self._execute("DELETE FROM hashes WHERE key = ? AND field = ?", (key, field))
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self.lock:
+            rows = self.connection.execute("SELECT field, value FROM hashes WHERE key = ?", (key,)).fetchall()
+        return dict(rows)
+
+    def hmget(self, key: str, fields: List[str]) -> List[Optional[str]]:
+        if not fields:
+            return []
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT field, value FROM hashes WHERE key = ? AND field IN ({', '.join('?' * len(fields))})",
+                (key, *fields),
+            ).fetchall()
+        values = dict(rows)
+        return [values.get(field) for field in fields]
+
+    def zadd(self, key: str, member: str, score: float):
+        self._execute("INSERT OR REPLACE INTO sorted_sets (key, member, score) VALUES (?, ?, ?)", (key, member, score))
+
+    def zadd_many(self, keys: List[str], member: str, score: float):
+        # One transaction instead of a commit per set
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO sorted_sets (key, member, score) VALUES (?, ?, ?)",
+                    [(key, member, score) for key in keys],
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def zrem(self, key: str, member: str):
+        self._execute("DELETE FROM sorted_sets WHERE key = ? AND member = ?", (key, member))
+
+    def zrange_by_score(
+        self,
+        key: str,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        query = "SELECT member, score FROM sorted_sets WHERE key = ?"
+        parameters = [key]
+        if after is not None:
+            query += " AND score > ?"
+            parameters.append(after)
+        if before is not None:
+            query += " AND score < ?"
+            parameters.append(before)
+        # Served from the (key, score) index, only the rows of the page are read
+        query += f" ORDER BY score {'DESC' if reverse else 'ASC'} LIMIT ?"
+        parameters.append(limit if limit is not None else -1)
+        with self.lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def close(self):
+        self.connection.close()
@@ -3,4 +3,14 @@ class InvalidLLMProviderError(Exception):
 
     def __init__(self, message="Provider is not valid or does not exist"):
         self.message = message
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class CassetteMissError(Exception):
+    """Exception raised when a replayed LLM request is not found in the cassette."""
+
+    def __init__(self, framework: str, model: str, request_hash: str):
+        self.message = (
+            f"No recorded response for {framework} request to '{model}' (request hash {request_hash}). "
+            "Record the workflow again or check that the request is deterministic."
+        )
+        super().__init__(self.message)
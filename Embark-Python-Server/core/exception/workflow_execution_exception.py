@@ -33,3 +33,29 @@ class CyclicWorkflowException():
         message = "The workflow configuration consists a agent cycle.\n"
         super().__init__(message)
 
+
+class TokenBudgetExceededException(Exception):
+    """
+    Exception raised when a run or a custom workflow node used more tokens than its budget.
+    """
+    def __init__(self, scope: str, used_tokens: int, budget: int):
+        self.scope = scope
+        self.used_tokens = used_tokens
+        self.budget = budget
+        super().__init__(f"Token budget exceeded for {scope}: used {used_tokens} of {budget} tokens.")
+
+
+class RunCancelledException(Exception):
+    """
+    Exception raised when a run was cancelled, timed out or its client went away.
+    """
+    def __init__(self, run_id: str, reason: str):
+        self.run_id = run_id
+        self.reason = reason
+        super().__init__(f"Run '{run_id}' was stopped: {reason}.")
+
+
+class WorkerProcessException(Exception):
+    """
+    Exception raised when a run executed in a framework worker process failed, or the process exited.
+    """
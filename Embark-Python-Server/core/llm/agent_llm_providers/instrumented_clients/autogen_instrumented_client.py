@@ -0,0 +1,163 @@
+import asyncio
+from typing import Any, AsyncGenerator, Literal, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+from core.llm.llm_call_hooks import (
+    LLMCall,
+    LLMResponse,
+    LLMUsage,
+    observe_llm_call,
+    run_after_hooks,
+    run_before_hooks,
+    run_error_hooks,
+)
+from core.llm.prompt_caching import capture_provider_usage
+
+
+def get_tool_schema(tool: Tool | ToolSchema) -> Any:
+    return tool if isinstance(tool, dict) else tool.schema
+
+
+def get_json_output_schema(json_output: Optional[bool | type[BaseModel]]) -> Any:
+    if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+        return json_output.model_json_schema()
+    return json_output
+
+
+def to_llm_response(result: CreateResult, provider_usage: Optional[LLMUsage] = None) -> LLMResponse:
+    provider_usage = provider_usage or LLMUsage()
+    return LLMResponse(
+        usage=LLMUsage(
+            prompt_tokens=result.usage.prompt_tokens + provider_usage.prompt_tokens,
+            completion_tokens=result.usage.completion_tokens,
+            cached_tokens=provider_usage.cached_tokens,
+        ),
+        native=result,
+        serializer=lambda native: native.model_dump(mode="json"),
+    )
+
+
+class InstrumentedChatCompletionClient(ChatCompletionClient):
+    """
+    Autogen model client wrapper running every completion through the LLM call hooks.
+    """
+    def __init__(self, client: ChatCompletionClient, provider: str, model: str):
+        self._client = client
+        self._provider = provider
+        self._model = model
+
+    @property
+    def client(self) -> ChatCompletionClient:
+        return self._client
+
+    def get_call(
+        self,
+        messages: Sequence[LLMMessage],
+        tools: Sequence[Tool | ToolSchema],
+        tool_choice: Any,
+        json_output: Optional[bool | type[BaseModel]],
+        extra_create_args: Mapping[str, Any],
+    ) -> LLMCall:
+        return LLMCall(
+            framework="autogen",
+            provider=self._provider,
+            model=self._model,
+            request_factory=lambda: {
+                "messages": [message.model_dump(mode="json") for message in messages],
+                "tools": [get_tool_schema(tool) for tool in tools],
+                "tool_choice": tool_choice if isinstance(tool_choice, str) else get_tool_schema(tool_choice),
+                "json_output": get_json_output_schema(json_output),
+                "extra_create_args": dict(extra_create_args),
+            },
+        )
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        call = self.get_call(messages, tools, tool_choice, json_output, extra_create_args)
+        with capture_provider_usage() as provider_usage:
+            return await observe_llm_call(
+                call,
+                invoke=lambda: self._client.create(
+                    messages,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    json_output=json_output,
+                    extra_create_args=extra_create_args,
+                    cancellation_token=cancellation_token,
+                ),
+                to_response=lambda result: to_llm_response(result, provider_usage),
+                from_payload=CreateResult.model_validate,
+            )
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        call = self.get_call(messages, tools, tool_choice, json_output, extra_create_args)
+        response = run_before_hooks(call)
+        if response is not None:
+            if response.replay_delay_seconds:
+                await asyncio.sleep(response.replay_delay_seconds)
+            result = response.native if response.native is not None else CreateResult.model_validate(response.payload)
+            run_after_hooks(call, response)
+            if isinstance(result.content, str):
+                yield result.content
+            yield result
+            return
+
+        try:
+            async for chunk in self._client.create_stream(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            ):
+                if isinstance(chunk, CreateResult):
+                    run_after_hooks(call, to_llm_response(chunk))
+                yield chunk
+        except BaseException as e:
+            run_error_hooks(call, e)
+            raise
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> Any:
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llm import LLM
+from crewai.llms.base_llm import BaseLLM
+from litellm.integrations.custom_logger import CustomLogger
+
+from core.llm.llm_call_hooks import LLMCall, LLMResponse, LLMUsage, observe_llm_call_sync
+from core.llm.prompt_caching import add_system_cache_control
+
+
+class UsageCaptureCallback(CustomLogger):
+    """LiteLLM callback collecting the usage of the completions made by one CrewAI call."""
+    def __init__(self):
+        super().__init__()
+        self.usage = LLMUsage()
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = getattr(response_obj, "usage", None)
+        if usage is None:
+            return
+        self.usage.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        self.usage.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        prompt_tokens_details = getattr(usage, "prompt_tokens_details", None)
+        self.usage.cached_tokens += getattr(prompt_tokens_details, "cached_tokens", 0) or 0
+
+
+class InstrumentedCrewAILLM(BaseLLM):
+    """
+    CrewAI LLM wrapper running every call through the LLM call hooks.
+    CrewAI calls the model from worker threads, so the synchronous hook path is used.
+    """
+    def __init__(self, llm: LLM, provider: str, model: str):
+        super().__init__(model=llm.model, temperature=llm.temperature)
+        self.llm = llm
+        self.provider = provider
+        self.model_name = model
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        from_task: Optional[Any] = None,
+        from_agent: Optional[Any] = None,
+    ) -> Union[str, Any]:
+        # CrewAI sets the stop words on the LLM object it was given.
+        self.llm.stop = self.stop
+        if isinstance(messages, list):
+            messages = add_system_cache_control(self.provider, messages)
+        usage_capture = UsageCaptureCallback()
+        call = LLMCall(
+            framework="crewai",
+            provider=self.provider,
+            model=self.model_name,
+            request_factory=lambda: {
+                "messages": messages,
+                "tools": tools,
+                "stop": self.stop,
+            },
+        )
+        return observe_llm_call_sync(
+            call,
+            invoke=lambda: self.llm.call(
+                messages,
+                tools=tools,
+                callbacks=[*(callbacks or []), usage_capture],
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+            ),
+            to_response=lambda result: LLMResponse(usage=usage_capture.usage, native=result, serializer=str),
+            from_payload=lambda payload: payload,
+        )
+
+    def supports_function_calling(self) -> bool:
+        return self.llm.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.llm.get_context_window_size()
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_chunk_to_message, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from core.llm.llm_call_hooks import (
+    LLMCall,
+    LLMResponse,
+    LLMUsage,
+    observe_llm_call,
+    observe_llm_call_sync,
+    run_after_hooks,
+    run_before_hooks,
+    run_error_hooks,
+)
+
+# Fields that change on every run and must not be part of the request hash.
+VOLATILE_MESSAGE_FIELDS = {"id", "response_metadata", "usage_metadata"}
+
+
+def get_message_request(message: BaseMessage) -> Dict[str, Any]:
+    message_dict = message_to_dict(message)
+    message_dict["data"] = {
+        key: value for key, value in message_dict["data"].items() if key not in VOLATILE_MESSAGE_FIELDS
+    }
+    return message_dict
+
+
+def serialize_chat_result(result: ChatResult) -> Dict[str, Any]:
+    return {
+        "generations": [
+            {"message": message_to_dict(generation.message), "generation_info": generation.generation_info}
+            for generation in result.generations
+        ],
+        "llm_output": result.llm_output,
+    }
+
+
+def deserialize_chat_result(payload: Dict[str, Any]) -> ChatResult:
+    messages = messages_from_dict([generation["message"] for generation in payload["generations"]])
+    return ChatResult(
+        generations=[
+            ChatGeneration(message=message, generation_info=generation["generation_info"])
+            for message, generation in zip(messages, payload["generations"])
+        ],
+        llm_output=payload.get("llm_output"),
+    )
+
+
+def get_chat_result_usage(result: ChatResult) -> LLMUsage:
+    usage = LLMUsage()
+    for generation in result.generations:
+        usage_metadata = getattr(generation.message, "usage_metadata", None) or {}
+        usage.prompt_tokens += usage_metadata.get("input_tokens", 0)
+        usage.completion_tokens += usage_metadata.get("output_tokens", 0)
+        usage.cached_tokens += (usage_metadata.get("input_token_details") or {}).get("cache_read", 0)
+    return usage
+
+
+def to_llm_response(result: ChatResult) -> LLMResponse:
+    return LLMResponse(usage=get_chat_result_usage(result), native=result, serializer=serialize_chat_result)
+
+
+def to_generation_chunk(result: ChatResult) -> ChatGenerationChunk:
+    """A whole (e.g. replayed) result as a single stream chunk."""
+    message: AIMessage = result.generations[0].message
+    return ChatGenerationChunk(message=AIMessageChunk(
+        content=message.content,
+        tool_call_chunks=[
+            {"name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"], "index": index}
+            for index, tool_call in enumerate(message.tool_calls)
+        ],
+        usage_metadata=message.usage_metadata,
+        response_metadata=message.response_metadata,
+    ))
+
+
+class InstrumentedChatModel(BaseChatModel):
+    """
+    LangChain chat model wrapper running every generation through the LLM call hooks.
+    Tool binding is delegated to the wrapped model so provider specific formats are kept.
+    """
+    inner: BaseChatModel
+    provider: str
+    model_name: str
+
+    @property
+    def _llm_type(self) -> str:
+        return f"instrumented-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def get_call(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> LLMCall:
+        return LLMCall(
+            framework="langgraph",
+            provider=self.provider,
+            model=self.model_name,
+            request_factory=lambda: {
+                "messages": [get_message_request(message) for message in messages],
+                "stop": stop,
+                "kwargs": kwargs,
+            },
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return observe_llm_call_sync(
+            self.get_call(messages, stop, kwargs),
+            invoke=lambda: self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            to_response=to_llm_response,
+            from_payload=deserialize_chat_result,
+        )
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return await observe_llm_call(
+            self.get_call(messages, stop, kwargs),
+            invoke=lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            to_response=to_llm_response,
+            from_payload=deserialize_chat_result,
+        )
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # Only used when a streaming consumer (astream_events) is attached, plain calls keep using _agenerate.
+        # The hooks see the call once, with the aggregated result, after the last chunk.
+        call = self.get_call(messages, stop, kwargs)
+        response = run_before_hooks(call)
+        if response is not None:
+            if response.replay_delay_seconds:
+                await asyncio.sleep(response.replay_delay_seconds)
+            run_after_hooks(call, response)
+            yield to_generation_chunk(response.native if response.native is not None else deserialize_chat_result(response.payload))
+            return
+        try:
+            if type(self.inner)._astream is BaseChatModel._astream:
+                # The wrapped model cannot stream, answer in one chunk
+                result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+                yield to_generation_chunk(result)
+            else:
+                aggregated: Optional[ChatGenerationChunk] = None
+                # Token callbacks are emitted by the base class for the chunks yielded here
+                async for chunk in self.inner._astream(messages, stop=stop, **kwargs):
+                    aggregated = chunk if aggregated is None else aggregated + chunk
+                    yield chunk
+                result = ChatResult(generations=[ChatGeneration(message=message_chunk_to_message(aggregated.message))])
+        except BaseException as e:
+            run_error_hooks(call, e)
+            raise
+        run_after_hooks(call, to_llm_response(result))
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        bound_inner = self.inner.bind_tools(tools, **kwargs)
+        if bound_inner is self.inner:
+            return self
+        return self.bind(**bound_inner.kwargs)
@@ -5,25 +5,37 @@ from core.llm.agent_llm_providers.llm_provider import LLMProvider
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_ext.models.anthropic import AnthropicChatCompletionClient
 from autogen_ext.models.ollama import OllamaChatCompletionClient
+from core.llm.agent_llm_providers.instrumented_clients.autogen_instrumented_client import InstrumentedChatCompletionClient
+from core.llm.fake_llm_provider.fake_autogen_client import FakeChatCompletionClient
+from core.llm.prompt_caching import add_anthropic_cache_control, get_anthropic_cache_usage, get_openai_cache_usage, wrap_sdk_resource
 from models.workflow_models.workflow import LLM
 
 class AutogenLLMProvider(LLMProvider):
 
     def get_openai_client(self, llm: LLM):
-        return OpenAIChatCompletionClient(
+        client = OpenAIChatCompletionClient(
             model=llm.model,
             temperature=llm.temperature,
             top_p=llm.top_probability,
             max_tokens=llm.max_tokens,
         )
+        # Autogen drops the cached tokens of the usage, they are read from the SDK responses.
+        # The SDK client is private to autogen-ext, tests check that the pinned version exposes it.
+        sdk_client = getattr(client, "_client", None)
+        wrap_sdk_resource(sdk_client, "chat.completions", get_openai_cache_usage)
+        wrap_sdk_resource(sdk_client, "beta.chat.completions", get_openai_cache_usage)
+        return client
 
     def get_anthropic_client(self, llm: LLM):
-        return AnthropicChatCompletionClient(
+        client = AnthropicChatCompletionClient(
             model=llm.model,
             temperature=llm.temperature,
             top_p=llm.top_probability,
             max_tokens=llm.max_tokens,
         )
+        # Autogen sends the system prompt as plain text, the cache breakpoint is added to the SDK requests
+        wrap_sdk_resource(getattr(client, "_client", None), "messages", get_anthropic_cache_usage, add_anthropic_cache_control)
+        return client
 
     def get_ollama_client(self, llm: LLM):
         return OllamaChatCompletionClient(
@@ -33,15 +45,21 @@ class AutogenLLMProvider(LLMProvider):
             max_tokens=llm.max_tokens,
         )
 
+    def get_fake_client(self, llm: LLM):
+        return FakeChatCompletionClient(model=llm.model)
+
     def get_llm_instance(self, llm: LLM = None):
         if llm is None:
             return None
         match llm.provider.lower():
             case "openai" | "gemini" | "llama":
-                return self.get_openai_client(llm)
+                client = self.get_openai_client(llm)
             case "anthropic":
-                return self.get_anthropic_client(llm)
+                client = self.get_anthropic_client(llm)
             case "ollama":
-                return self.get_ollama_client(llm)
+                client = self.get_ollama_client(llm)
+            case "fake":
+                client = self.get_fake_client(llm)
             case _:
                 raise InvalidLLMProviderError()
+        return InstrumentedChatCompletionClient(client, provider=llm.provider, model=llm.model)
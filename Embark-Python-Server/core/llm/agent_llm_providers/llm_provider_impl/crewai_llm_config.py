@@ -1,17 +1,23 @@
 
 from crewai import LLM
+from core.llm.agent_llm_providers.instrumented_clients.crewai_instrumented_llm import InstrumentedCrewAILLM
 from core.llm.agent_llm_providers.llm_provider import LLMProvider
+from core.llm.fake_llm_provider.fake_litellm_handler import register_fake_litellm_provider
 from models.workflow_models.workflow import LLM as WorkflowLLM
 
+# CrewAI calls LiteLLM, so `provider: fake` is served by the fake LiteLLM provider.
+register_fake_litellm_provider()
+
 class CrewAILLMProvider(LLMProvider):
     def get_llm_instance(self, llm: WorkflowLLM = None):
         if llm is None:
             return None
-        return LLM(
+        crewai_llm = LLM(
             model=f"{llm.provider}/{llm.model}",
             temperature=llm.temperature,
             max_completion_tokens=llm.max_tokens,
             top_p=llm.top_probability,
             stop=None,
             stream=False,
-        )
\ No newline at end of file
+        )
+        return InstrumentedCrewAILLM(crewai_llm, provider=llm.provider, model=llm.model)
\ No newline at end of file
@@ -2,14 +2,21 @@ import os
 from core.llm.agent_llm_providers.llm_provider import LLMProvider
 from models.workflow_models.workflow import LLM
 from langchain.chat_models import init_chat_model
+from core.llm.agent_llm_providers.instrumented_clients.langgraph_instrumented_chat_model import InstrumentedChatModel
+from core.llm.fake_llm_provider.fake_langgraph_chat_model import FakeLangGraphChatModel
+from core.llm.fake_llm_provider.fake_llm import FAKE_LLM_PROVIDER
 
 class LangGraphLLMProvider(LLMProvider):
     def get_llm_instance(self, llm: LLM = None):
         if llm is None:
             return None
-        return init_chat_model(
-            model=llm.model,
-            model_provider=llm.provider,
-            temperature=llm.temperature,
-            max_tokens=llm.max_tokens
-        )
\ No newline at end of file
+        if llm.provider.lower() == FAKE_LLM_PROVIDER:
+            chat_model = FakeLangGraphChatModel(model_name=llm.model)
+        else:
+            chat_model = init_chat_model(
+                model=llm.model,
+                model_provider=llm.provider,
+                temperature=llm.temperature,
+                max_tokens=llm.max_tokens
+            )
+        return InstrumentedChatModel(inner=chat_model, provider=llm.provider, model_name=llm.model)
\ No newline at end of file
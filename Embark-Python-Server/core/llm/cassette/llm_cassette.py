@@ -0,0 +1,161 @@
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from os import getenv as os_getenv
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from core.exception.llm_config_exception import CassetteMissError
+from core.llm.llm_call_hooks import (
+    LLMCall,
+    LLMCallHook,
+    LLMResponse,
+    LLMUsage,
+    register_llm_call_hook,
+    unregister_llm_call_hook,
+)
+
+
+class CassetteMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class CassetteEntry(BaseModel):
+    request_hash: str
+    framework: str
+    provider: str
+    model: str
+    request: Dict[str, Any]
+    response: Any
+    usage: Dict[str, int]
+    latency_seconds: float
+
+
+class LLMCassette:
+    """
+    JSON lines file of recorded LLM calls. Entries with the same request hash are
+    replayed in the order they were recorded.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._entries: Dict[str, List[CassetteEntry]] = defaultdict(list)
+        self._replay_positions: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        # Pending writes are finished at interpreter exit, the worker thread is joined
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embark-cassette")
+
+    def load(self):
+        self._entries.clear()
+        self._replay_positions.clear()
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as cassette_file:
+            for line in cassette_file:
+                if line.strip():
+                    entry = CassetteEntry.model_validate_json(line)
+                    self._entries[entry.request_hash].append(entry)
+
+    def append(self, entry: CassetteEntry):
+        # Calls arrive from the event loop and from CrewAI worker threads. The entry can be
+        # replayed at once, the file is written by a single background thread in call order.
+        with self._lock:
+            self._entries[entry.request_hash].append(entry)
+        self._writer.submit(self.write_line, entry.model_dump_json())
+
+    def write_line(self, line: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as cassette_file:
+            cassette_file.write(line + "\n")
+
+    def flush(self):
+        """Wait until every appended entry is written to the file."""
+        self._writer.submit(lambda: None).result()
+
+    def next_entry(self, request_hash: str) -> Optional[CassetteEntry]:
+        with self._lock:
+            entries = self._entries.get(request_hash)
+            if not entries:
+                return None
+            position = self._replay_positions[request_hash]
+            self._replay_positions[request_hash] = position + 1
+            # Once exhausted keep serving the last recording, e.g. for repeated profiling runs.
+            return entries[min(position, len(entries) - 1)]
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+
+class CassetteHook(LLMCallHook):
+    """
+    Records every LLM call into a cassette, or serves calls back from it by request hash.
+    """
+    name = "llm_cassette"
+
+    def __init__(self, cassette: LLMCassette, mode: CassetteMode, reproduce_latency: bool = False, latency_scale: float = 1.0):
+        self.cassette = cassette
+        self.mode = mode
+        self.reproduce_latency = reproduce_latency
+        self.latency_scale = latency_scale
+
+    def before_call(self, call: LLMCall) -> Optional[LLMResponse]:
+        if self.mode != CassetteMode.REPLAY:
+            return None
+        entry = self.cassette.next_entry(call.request_hash)
+        if entry is None:
+            raise CassetteMissError(call.framework, call.model, call.request_hash)
+        return LLMResponse(
+            usage=LLMUsage.from_dict(entry.usage),
+            payload=entry.response,
+            replay_delay_seconds=entry.latency_seconds * self.latency_scale if self.reproduce_latency else 0.0,
+        )
+
+    def after_call(self, call: LLMCall, response: LLMResponse):
+        if self.mode != CassetteMode.RECORD:
+            return
+        self.cassette.append(
+            CassetteEntry(
+                request_hash=call.request_hash,
+                framework=call.framework,
+                provider=call.provider,
+                model=call.model,
+                request=json.loads(json.dumps(call.request, default=str)),
+                response=response.payload,
+                usage=response.usage.to_dict(),
+                latency_seconds=call.latency_seconds or 0.0,
+            )
+        )
+
+
+def configure_llm_cassette(
+    mode: Optional[str] = None,
+    path: Optional[str] = None,
+    reproduce_latency: Optional[bool] = None,
+    latency_scale: Optional[float] = None,
+) -> Optional[CassetteHook]:
+    """
+    Enable record or replay mode. Arguments default to the LLM_CASSETTE_* environment variables:
+    LLM_CASSETTE_MODE (off | record | replay), LLM_CASSETTE_PATH, LLM_CASSETTE_REPRODUCE_LATENCY
+    and LLM_CASSETTE_LATENCY_SCALE.
+    """
+    mode = CassetteMode((mode or os_getenv("LLM_CASSETTE_MODE", CassetteMode.OFF.value)).lower())
+    if mode == CassetteMode.OFF:
+        unregister_llm_call_hook(CassetteHook.name)
+        return None
+
+    if reproduce_latency is None:
+        reproduce_latency = os_getenv("LLM_CASSETTE_REPRODUCE_LATENCY", "false").lower() == "true"
+    if latency_scale is None:
+        latency_scale = float(os_getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))
+
+    cassette = LLMCassette(path or os_getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl"))
+    if mode == CassetteMode.REPLAY:
+        cassette.load()
+    hook = CassetteHook(cassette, mode, reproduce_latency=reproduce_latency, latency_scale=latency_scale)
+    register_llm_call_hook(hook)
+    return hook
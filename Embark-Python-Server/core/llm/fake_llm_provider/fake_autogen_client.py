@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, AsyncGenerator, Literal, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import CreateResult, LLMMessage, ModelFamily, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from pydantic import BaseModel
+
+from core.llm.fake_llm_provider.fake_llm import get_fake_structured_text, get_fake_text, get_latency_seconds
+
+
+class FakeChatCompletionClient(ReplayChatCompletionClient):
+    """
+    Autogen model client generating deterministic responses with a configurable latency.
+    Unlike the replay client it never runs out of responses.
+    """
+    def __init__(self, model: str):
+        super().__init__(
+            chat_completions=[],
+            model_info=ModelInfo(
+                vision=False,
+                function_calling=True,
+                json_output=True,
+                family=ModelFamily.UNKNOWN,
+                structured_output=True,
+            ),
+        )
+        self.model = model
+        self.set_cached_bool_value(False)
+
+    def get_content(self, messages: Sequence[LLMMessage], json_output: Optional[bool | type[BaseModel]]) -> str:
+        if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+            return get_fake_structured_text(json_output)
+        prompt_tokens, _ = self._tokenize(messages)
+        return get_fake_text(" ".join(prompt_tokens))
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        await asyncio.sleep(get_latency_seconds(self.model))
+        content = self.get_content(messages, json_output)
+        _, prompt_token_count = self._tokenize(messages)
+        _, output_token_count = self._tokenize(content)
+        self._cur_usage = RequestUsage(prompt_tokens=prompt_token_count, completion_tokens=output_token_count)
+        self._update_total_usage()
+        return CreateResult(finish_reason="stop", content=content, usage=self._cur_usage, cached=False)
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        result = await self.create(messages, tools=tools, json_output=json_output)
+        yield result.content
+        yield result
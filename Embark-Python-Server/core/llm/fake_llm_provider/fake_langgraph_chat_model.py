@@ -0,0 +1,128 @@
+import asyncio
+import time
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from core.llm.fake_llm_provider.fake_llm import (
+    count_tokens,
+    fake_llm_settings,
+    get_fake_structured_output,
+    get_fake_text,
+    get_latency_seconds,
+    get_sample_from_json_schema,
+)
+
+
+def get_forced_tool(tools: List[Dict[str, Any]], tool_choice: Any) -> Optional[Dict[str, Any]]:
+    """Return the tool the model is forced to call, as used for structured output."""
+    if not tools or tool_choice in (None, "auto", "none"):
+        return None
+    if isinstance(tool_choice, dict):
+        tool_choice = tool_choice.get("function", {}).get("name")
+    for tool in tools:
+        if tool["function"]["name"] == tool_choice:
+            return tool
+    return tools[0]
+
+
+class FakeLangGraphChatModel(BaseChatModel):
+    """
+    LangChain chat model generating deterministic responses with a configurable latency.
+    Free tool calls are only requested when `tool_calls_per_turn` is set: that many calls of
+    the first tool in one turn, then an answer once their results are in. A forced tool call
+    (structured output) is answered with sample arguments matching the tool schema.
+    """
+    model_name: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def get_result(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]] = None, tool_choice: Any = None) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        forced_tool = get_forced_tool(tools or [], tool_choice)
+        if forced_tool is not None:
+            content = ""
+            tool_calls = [{
+                "name": forced_tool["function"]["name"],
+                "args": get_fake_structured_output(forced_tool),
+                "id": "call_fake_0",
+            }]
+            completion_tokens = count_tokens(str(tool_calls[0]["args"]))
+        elif tools and fake_llm_settings.tool_calls_per_turn and not any(message.type == "tool" for message in messages):
+            content = ""
+            tool_calls = [
+                {
+                    "name": tools[0]["function"]["name"],
+                    "args": get_sample_from_json_schema(tools[0]["function"].get("parameters", {})),
+                    "id": f"call_fake_{index}",
+                }
+                for index in range(fake_llm_settings.tool_calls_per_turn)
+            ]
+            completion_tokens = sum(count_tokens(str(tool_call["args"])) for tool_call in tool_calls)
+        else:
+            content = get_fake_text(prompt)
+            tool_calls = []
+            completion_tokens = count_tokens(content)
+        prompt_tokens = count_tokens(prompt)
+        message = AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(get_latency_seconds(self.model_name))
+        return self.get_result(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(get_latency_seconds(self.model_name))
+        return self.get_result(messages, kwargs.get("tools"), kwargs.get("tool_choice"))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream the same response in `stream_chunks` pieces spread over the configured latency."""
+        message: AIMessage = self.get_result(messages, kwargs.get("tools"), kwargs.get("tool_choice")).generations[0].message
+        if len(message.tool_calls) > 1:
+            await asyncio.sleep(get_latency_seconds(self.model_name))
+            chunk = AIMessageChunk(content="", tool_call_chunks=[
+                {"name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"], "index": index}
+                for index, tool_call in enumerate(message.tool_calls)
+            ])
+            chunk.usage_metadata = message.usage_metadata
+            yield ChatGenerationChunk(message=chunk)
+            return
+        text = json.dumps(message.tool_calls[0]["args"]) if message.tool_calls else message.content
+        chunk_count = max(1, min(fake_llm_settings.stream_chunks, len(text)))
+        chunk_size = -(-len(text) // chunk_count)
+        started_at = time.perf_counter()
+        for index in range(chunk_count):
+            # Paced against the start so that the chunks add up to the configured latency
+            await asyncio.sleep(max(0.0, started_at + get_latency_seconds(self.model_name) * (index + 1) / chunk_count - time.perf_counter()))
+            piece = text[index * chunk_size:(index + 1) * chunk_size]
+            is_last = index == chunk_count - 1
+            if message.tool_calls:
+                tool_call = message.tool_calls[0]
+                chunk = AIMessageChunk(content="", tool_call_chunks=[{
+                    "name": tool_call["name"] if index == 0 else None,
+                    "args": piece,
+                    "id": tool_call["id"] if index == 0 else None,
+                    "index": 0,
+                }])
+            else:
+                chunk = AIMessageChunk(content=piece)
+            if is_last:
+                chunk.usage_metadata = message.usage_metadata
+            yield ChatGenerationChunk(message=chunk)
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], tool_choice=tool_choice, **kwargs)
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import litellm
+from litellm import CustomLLM
+from litellm.types.utils import ModelResponse, Usage
+
+from core.llm.fake_llm_provider.fake_llm import (
+    FAKE_LLM_PROVIDER,
+    count_tokens,
+    get_fake_structured_text,
+    get_fake_text,
+    get_latency_seconds,
+)
+
+
+class FakeLiteLLMHandler(CustomLLM):
+    """
+    LiteLLM custom provider serving deterministic responses, e.g. `model="fake/any-model"`.
+    CrewAI calls LiteLLM internally, so this also covers the CrewAI agents.
+    """
+
+    def get_response(self, messages: list, model_response: ModelResponse, optional_params: dict) -> ModelResponse:
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        response_format = optional_params.get("response_format")
+        if response_format is not None:
+            content = get_fake_structured_text(response_format)
+        else:
+            content = get_fake_text(prompt)
+
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = count_tokens(content)
+        model_response.choices[0].message.content = content
+        model_response.choices[0].finish_reason = "stop"
+        setattr(
+            model_response,
+            "usage",
+            Usage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+        return model_response
+
+    def completion(self, *args, **kwargs) -> ModelResponse:
+        time.sleep(get_latency_seconds(kwargs.get("model", "")))
+        return self.get_response(kwargs["messages"], kwargs["model_response"], kwargs.get("optional_params") or {})
+
+    async def acompletion(self, *args, **kwargs) -> ModelResponse:
+        await asyncio.sleep(get_latency_seconds(kwargs.get("model", "")))
+        return self.get_response(kwargs["messages"], kwargs["model_response"], kwargs.get("optional_params") or {})
+
+
+fake_litellm_handler = FakeLiteLLMHandler()
+
+
+def register_fake_litellm_provider():
+    """Register the fake provider with LiteLLM. Safe to call more than once."""
+    for item in litellm.custom_provider_map:
+        if item["provider"] == FAKE_LLM_PROVIDER:
+            return
+    litellm.custom_provider_map.append(
+        {"provider": FAKE_LLM_PROVIDER, "custom_handler": fake_litellm_handler}
+    )
@@ -0,0 +1,102 @@
+import hashlib
+import json
+from os import getenv as os_getenv
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+FAKE_LLM_PROVIDER = "fake"
+
+
+class FakeLLMSettings(BaseModel):
+    """
+    Behaviour of the deterministic fake LLM provider used for offline benchmarks.
+    """
+    latency_seconds: float = Field(0.0, ge=0.0, json_schema_extra={"description": "Simulated latency for every call"})
+    model_latency_seconds: Dict[str, float] = Field({}, json_schema_extra={"description": "Simulated latency of the calls to a model, overriding `latency_seconds`"})
+    output_tokens: int = Field(16, ge=0, json_schema_extra={"description": "Number of tokens generated for free text responses"})
+    response_text: Optional[str] = Field(None, json_schema_extra={"description": "Fixed response returned instead of generated tokens"})
+    response_suffix: str = Field("", json_schema_extra={"description": "Text appended to every free text response, e.g. TERMINATE"})
+    stream_chunks: int = Field(8, ge=1, json_schema_extra={"description": "Number of chunks a streamed response is split into"})
+    tool_calls_per_turn: int = Field(0, ge=0, json_schema_extra={"description": "Calls of the first available tool requested before answering, 0 never calls tools"})
+
+
+fake_llm_settings = FakeLLMSettings(
+    latency_seconds=float(os_getenv("FAKE_LLM_LATENCY_SECONDS", "0")),
+    output_tokens=int(os_getenv("FAKE_LLM_OUTPUT_TOKENS", "16")),
+)
+
+
+def get_latency_seconds(model: str) -> float:
+    model = model.removeprefix(f"{FAKE_LLM_PROVIDER}/")
+    return fake_llm_settings.model_latency_seconds.get(model, fake_llm_settings.latency_seconds)
+
+
+def count_tokens(text: str) -> int:
+    """Whitespace token count, good enough for a deterministic fake."""
+    return len(text.split())
+
+
+def get_fake_text(prompt: str) -> str:
+    """Generate a deterministic free text response for the prompt."""
+    if fake_llm_settings.response_text is not None:
+        text = fake_llm_settings.response_text
+    else:
+        seed = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        text = " ".join(f"tok_{seed}_{index}" for index in range(fake_llm_settings.output_tokens))
+    if fake_llm_settings.response_suffix:
+        text = f"{text} {fake_llm_settings.response_suffix}"
+    return text
+
+
+def get_sample_from_json_schema(schema: dict, definitions: Optional[dict] = None) -> Any:
+    """Build a deterministic value that validates against a JSON schema."""
+    definitions = definitions if definitions is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return get_sample_from_json_schema(definitions[schema["$ref"].split("/")[-1]], definitions)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return get_sample_from_json_schema(options[0] if options else {}, definitions)
+    match schema.get("type"):
+        case "object":
+            return {
+                name: get_sample_from_json_schema(field_schema, definitions)
+                for name, field_schema in schema.get("properties", {}).items()
+            }
+        case "array":
+            items = schema.get("items")
+            return [get_sample_from_json_schema(items, definitions)] if items else []
+        case "boolean":
+            return False
+        case "integer":
+            return 0
+        case "number":
+            return 0.0
+        case _:
+            return "fake"
+
+
+def get_json_schema(response_format: Any) -> dict:
+    """Extract a JSON schema from a Pydantic model, a LiteLLM response format or a tool schema."""
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        return response_format.model_json_schema()
+    if not isinstance(response_format, dict):
+        return {}
+    if "json_schema" in response_format:
+        return response_format["json_schema"].get("schema", {})
+    if "function" in response_format:
+        return response_format["function"].get("parameters", {})
+    return response_format.get("schema", response_format)
+
+
+def get_fake_structured_output(response_format: Any) -> Any:
+    if fake_llm_settings.response_text is not None:
+        return json.loads(fake_llm_settings.response_text)
+    return get_sample_from_json_schema(get_json_schema(response_format))
+
+
+def get_fake_structured_text(response_format: Any) -> str:
+    if fake_llm_settings.response_text is not None:
+        return fake_llm_settings.response_text
+    return json.dumps(get_sample_from_json_schema(get_json_schema(response_format)))
@@ -1,11 +1,37 @@
-from typing import Any
+from typing import Any, Tuple
 
-from litellm import acompletion
-from base_llm_provider import BaseLLMProvider
+from litellm import ModelResponse, acompletion
+from core.llm.base_llm_provider import BaseLLMProvider
+from core.llm.llm_call_hooks import LLMCall, LLMResponse, LLMUsage, observe_llm_call
+from core.llm.prompt_caching import get_system_content
+from core.llm.fake_llm_provider.fake_litellm_handler import register_fake_litellm_provider
+from models.workflow_models.workflow import LLM
+
+register_fake_litellm_provider()
+
+
+def get_response_format_request(response_format: Any) -> Any:
+    if hasattr(response_format, "model_json_schema"):
+        return response_format.model_json_schema()
+    return response_format
+
+
+def to_llm_response(response: ModelResponse) -> LLMResponse:
+    usage = getattr(response, "usage", None)
+    prompt_tokens_details = getattr(usage, "prompt_tokens_details", None)
+    return LLMResponse(
+        usage=LLMUsage(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0),
+            cached_tokens=getattr(prompt_tokens_details, "cached_tokens", 0),
+        ),
+        native=response,
+        serializer=lambda native: native.model_dump(),
+    )
 
 class AsyncLiteLLMService(BaseLLMProvider):
 
-    def get_image_processing_message(self, base64_encoded_image: list, prompt: str, system_message: str):
+    def get_image_processing_message(self, base64_encoded_image: list, prompt: str, system_message: str, provider: str = ""):
 
         content= [{"type": "text", "text": prompt}]
 
@@ -20,15 +46,16 @@ class AsyncLiteLLMService(BaseLLMProvider):
             )
             
         messages=[
-            {"role": "system", "content": system_message},
+            {"role": "system", "content": get_system_content(provider, system_message)},
             {"role": "user", "content": content}
         ]
 
         return messages
     
-    def get_messages(self, prompt: str, system_message: str):
+    def get_messages(self, prompt: str, system_message: str, provider: str = ""):
+        # The system prompt comes first and is marked cacheable for providers that need a breakpoint
         return [
-                {"role": "system", "content": system_message},
+                {"role": "system", "content": get_system_content(provider, system_message)},
                 {"role": "user", "content": prompt}
             ]
 
@@ -43,12 +70,86 @@ class AsyncLiteLLMService(BaseLLMProvider):
         base64_encoded_image: list = None,
         response_format: Any = None,
     ):
-        response = await acompletion(
+        content, _ = await self.execute_with_usage(
+            model=model,
+            prompt=prompt,
+            system_message=system_message,
+            top_probability=top_probability,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            base64_encoded_image=base64_encoded_image,
+            response_format=response_format,
+        )
+        return content
+
+    async def execute_with_cascade(
+        self,
+        llm: LLM,
+        prompt: str,
+        system_message: str,
+        base64_encoded_image: list = None,
+        response_format: Any = None,
+    ) -> str:
+        """
+        Execute with the model cascade of `llm`, cheaper models answer first and the configured
+        model only when their answers are rejected.
+        """
+        # Imported here, the cascade verifies answers with this service
+        from core.llm.model_cascade import get_litellm_model, run_model_cascade
+
+        return await run_model_cascade(
+            llm=llm,
+            task=prompt,
+            attempt=lambda stage_llm: self.execute(
+                model=get_litellm_model(stage_llm),
+                prompt=prompt,
+                system_message=system_message,
+                top_probability=stage_llm.top_probability,
+                temperature=stage_llm.temperature,
+                max_tokens=stage_llm.max_tokens,
+                base64_encoded_image=base64_encoded_image,
+                response_format=response_format,
+            ),
+            response_format=response_format,
+        )
+
+    async def execute_with_usage(
+        self,
+        model: str,
+        prompt: str,
+        system_message: str,
+        top_probability: float = 1.0,
+        temperature: float = 0,
+        max_tokens: int = None,
+        base64_encoded_image: list = None,
+        response_format: Any = None,
+    ) -> Tuple[str, LLMUsage]:
+        """Return the message content together with the token usage of the call."""
+        provider = model.split("/")[0] if "/" in model else ""
+        messages = self.get_messages(prompt, system_message, provider) if not base64_encoded_image else self.get_image_processing_message(base64_encoded_image, prompt, system_message, provider)
+        call = LLMCall(
+            framework="litellm",
+            provider=provider,
             model=model,
-            response_format=response_format if response_format is not None else None,
-            messages=self.get_messages(prompt, system_message) if not base64_encoded_image else self.get_image_processing_message(base64_encoded_image, prompt, system_message),
-            temperature=temperature if temperature is not None else None,
-            top_p=top_probability if top_probability is not None else None,
-            max_tokens=max_tokens if max_tokens is not None else None,
+            request_factory=lambda: {
+                "messages": messages,
+                "response_format": get_response_format_request(response_format),
+                "temperature": temperature,
+                "top_p": top_probability,
+                "max_tokens": max_tokens,
+            },
+        )
+        response = await observe_llm_call(
+            call,
+            invoke=lambda: acompletion(
+                model=model,
+                response_format=response_format if response_format is not None else None,
+                messages=messages,
+                temperature=temperature if temperature is not None else None,
+                top_p=top_probability if top_probability is not None else None,
+                max_tokens=max_tokens if max_tokens is not None else None,
+            ),
+            to_response=to_llm_response,
+            from_payload=lambda payload: ModelResponse(**payload),
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content, to_llm_response(response).usage
@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import json
+import time
+from abc import ABC
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class LLMUsage:
+    """Token usage reported for a single LLM call."""
+    __slots__ = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens or 0
+        self.completion_tokens = completion_tokens or 0
+        self.cached_tokens = cached_tokens or 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, int]]) -> "LLMUsage":
+        return cls(**(data or {}))
+
+
+class LLMCall:
+    """
+    A single LLM request made by one of the framework clients or the LiteLLM service.
+
+    The serialised request is built lazily because only some hooks (e.g. the cassette)
+    need it.
+    """
+    def __init__(self, framework: str, provider: str, model: str, request_factory: Callable[[], Dict[str, Any]]):
+        self.framework = framework
+        self.provider = provider
+        self.model = model
+        self.started_at = time.perf_counter()
+        self.latency_seconds: Optional[float] = None
+        # Scratch space for hooks, keyed by hook name.
+        self.hook_state: Dict[str, Any] = {}
+        self._request_factory = request_factory
+        self._request: Optional[Dict[str, Any]] = None
+        self._request_hash: Optional[str] = None
+
+    @property
+    def request(self) -> Dict[str, Any]:
+        if self._request is None:
+            self._request = self._request_factory()
+        return self._request
+
+    @property
+    def request_hash(self) -> str:
+        if self._request_hash is None:
+            canonical = json.dumps(
+                {"framework": self.framework, "model": self.model, "request": self.request},
+                sort_keys=True,
+                separators=(",", ":"),
+                default=str,
+            )
+            self._request_hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return self._request_hash
+
+
+class LLMResponse:
+    """
+    Response of an LLM call. `native` is the framework object returned to the caller and
+    `payload` its JSON-serialisable form; either one can be derived from the other.
+    """
+    def __init__(
+        self,
+        usage: LLMUsage,
+        native: Any = None,
+        payload: Any = None,
+        serializer: Optional[Callable[[Any], Any]] = None,
+        replay_delay_seconds: float = 0.0,
+    ):
+        self.usage = usage
+        self.native = native
+        self.replay_delay_seconds = replay_delay_seconds
+        self._payload = payload
+        self._serializer = serializer
+
+    @property
+    def payload(self) -> Any:
+        if self._payload is None and self._serializer is not None:
+            self._payload = self._serializer(self.native)
+        return self._payload
+
+
+class LLMCallHook(ABC):
+    """
+    Extension point observing every LLM call. Hooks run on the hot path and must be cheap.
+
+    `before_call` may short-circuit the call by returning a response (used for replay).
+    `after_call` may raise to stop the run (used for budgets).
+    """
+    name: str = "llm_call_hook"
+
+    def before_call(self, call: LLMCall) -> Optional[LLMResponse]:
+        return None
+
+    def after_call(self, call: LLMCall, response: LLMResponse):
+        ...
+
+    def on_error(self, call: LLMCall, error: BaseException):
+        ...
+
+
+llm_call_hooks: List[LLMCallHook] = []
+
+
+def register_llm_call_hook(hook: LLMCallHook):
+    """Register a hook, replacing an existing hook with the same name."""
+    unregister_llm_call_hook(hook.name)
+    llm_call_hooks.append(hook)
+
+
+def unregister_llm_call_hook(name: str):
+    llm_call_hooks[:] = [hook for hook in llm_call_hooks if hook.name != name]
+
+
+def run_before_hooks(call: LLMCall) -> Optional[LLMResponse]:
+    for hook in llm_call_hooks:
+        response = hook.before_call(call)
+        if response is not None:
+            return response
+    return None
+
+
+def run_after_hooks(call: LLMCall, response: LLMResponse):
+    call.latency_seconds = time.perf_counter() - call.started_at
+    for hook in llm_call_hooks:
+        hook.after_call(call, response)
+
+
+def run_error_hooks(call: LLMCall, error: BaseException):
+    call.latency_seconds = time.perf_counter() - call.started_at
+    for hook in llm_call_hooks:
+        hook.on_error(call, error)
+
+
+async def observe_llm_call(
+    call: LLMCall,
+    invoke: Callable[[], Awaitable[Any]],
+    to_response: Callable[[Any], LLMResponse],
+    from_payload: Callable[[Any], Any],
+) -> Any:
+    """
+    Run an async LLM call through the registered hooks and return the framework object.
+    """
+    response = run_before_hooks(call)
+    if response is not None:
+        if response.replay_delay_seconds:
+            await asyncio.sleep(response.replay_delay_seconds)
+    else:
+        try:
+            response = to_response(await invoke())
+        except BaseException as e:
+            run_error_hooks(call, e)
+            raise
+    run_after_hooks(call, response)
+    return response.native if response.native is not None else from_payload(response.payload)
+
+
+def observe_llm_call_sync(
+    call: LLMCall,
+    invoke: Callable[[], Any],
+    to_response: Callable[[Any], LLMResponse],
+    from_payload: Callable[[Any], Any],
+) -> Any:
+    """
+    Synchronous variant of `observe_llm_call` for frameworks calling the model from threads.
+    """
+    response = run_before_hooks(call)
+    if response is not None:
+        if response.replay_delay_seconds:
+            time.sleep(response.replay_delay_seconds)
+    else:
+        try:
+            response = to_response(invoke())
+        except BaseException as e:
+            run_error_hooks(call, e)
+            raise
+    run_after_hooks(call, response)
+    return response.native if response.native is not None else from_payload(response.payload)
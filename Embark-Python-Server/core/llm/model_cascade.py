@@ -0,0 +1,145 @@
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from core.exception.llm_config_exception import CassetteMissError, InvalidLLMProviderError
+from core.exception.workflow_execution_exception import RunCancelledException, TokenBudgetExceededException, WorkerProcessException
+from core.llm.litellm_provider.async_litellm_service import AsyncLiteLLMService
+from core.metrics.server_metrics import model_cascade_answers_total
+from core.prompts.cascade_prompt import CASCADE_VERIFIER_PROMPT
+from core.tracing.tracing import tracing
+from models.workflow_models.workflow import LLM, CascadeAcceptance, ModelCascade
+from shared import fast_json
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors a more capable model would not avoid, they stop the cascade
+CASCADE_FATAL_ERRORS = (
+    TokenBudgetExceededException,
+    RunCancelledException,
+    WorkerProcessException,
+    CassetteMissError,
+    InvalidLLMProviderError,
+    NotImplementedError,
+)
+
+
+class CascadeVerdict(BaseModel):
+    accepted: bool
+    reason: str = ""
+
+
+def get_cascade_llms(llm: LLM) -> List[LLM]:
+    """The LLM configs of a cascade in the order they are tried, the configured model last."""
+    if llm.cascade is None:
+        return [llm]
+    stages = [
+        llm.model_copy(update={"model": stage.model, "provider": stage.provider, "cascade": None})
+        for stage in llm.cascade.models
+    ]
+    return [*stages, llm.model_copy(update={"cascade": None})]
+
+
+def get_litellm_model(llm: LLM) -> str:
+    return f"{llm.provider}/{llm.model}"
+
+
+def get_answer_fields(answer: Any) -> Optional[dict]:
+    """The fields of a structured answer, from a model, a dict or JSON text."""
+    if isinstance(answer, BaseModel):
+        return answer.model_dump()
+    if isinstance(answer, str):
+        try:
+            answer = fast_json.loads(answer)
+        except ValueError:
+            return None
+    return answer if isinstance(answer, dict) else None
+
+
+def is_valid_answer(answer: Any, response_format: Any) -> bool:
+    if not isinstance(response_format, type) or not issubclass(response_format, BaseModel):
+        return bool(answer)
+    fields = get_answer_fields(answer)
+    if fields is None:
+        return False
+    try:
+        response_format.model_validate(fields)
+    except ValidationError:
+        return False
+    return True
+
+
+def has_confidence(answer: Any, cascade: ModelCascade) -> bool:
+    confidence = (get_answer_fields(answer) or {}).get(cascade.confidence_field)
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)):
+        return False
+    return confidence >= cascade.min_confidence
+
+
+async def is_verified(answer: Any, task: str, verifier_llm: LLM, cascade: ModelCascade) -> bool:
+    """Ask the configured model whether it agrees with the answer of a cheaper one."""
+    answer_text = answer if isinstance(answer, str) else fast_json.dumps(answer)
+    instructions = f"\n**Instructions**\n{cascade.verifier_instructions}\n" if cascade.verifier_instructions else ""
+    content = await AsyncLiteLLMService().execute(
+        model=get_litellm_model(verifier_llm),
+        prompt=f"**Task**\n{task}\n\n**Answer**\n{answer_text}",
+        system_message=f"{CASCADE_VERIFIER_PROMPT}{instructions}",
+        top_probability=verifier_llm.top_probability,
+        temperature=0,
+        max_tokens=verifier_llm.max_tokens,
+        response_format=CascadeVerdict,
+    )
+    try:
+        return CascadeVerdict.model_validate_json(content).accepted
+    except ValidationError:
+        return False
+
+
+async def is_accepted(answer: Any, task: str, response_format: Any, verifier_llm: LLM, cascade: ModelCascade) -> bool:
+    if not is_valid_answer(answer, response_format):
+        return False
+    match cascade.acceptance:
+        case CascadeAcceptance.CONFIDENCE:
+            return has_confidence(answer, cascade)
+        case CascadeAcceptance.VERIFIER:
+            return await is_verified(answer, task, verifier_llm, cascade)
+        case _:
+            return True
+
+
+async def run_model_cascade(
+    llm: LLM,
+    task: str,
+    attempt: Callable[[LLM], Awaitable[T]],
+    response_format: Any = None,
+) -> T:
+    """
+    Answer with the cascade of `llm`: every cheaper model in turn until one answer is accepted,
+    the configured model otherwise. `attempt` produces the answer of one model. An attempt
+    that raises is rejected like an invalid answer. Without a cascade this is `attempt(llm)`.
+    """
+    stage_llms = get_cascade_llms(llm)
+    final_llm = stage_llms[-1]
+    for stage, stage_llm in enumerate(stage_llms[:-1]):
+        model = get_litellm_model(stage_llm)
+        with tracing.span("llm.cascade_stage", **{"cascade.stage": stage, "cascade.model": model}) as stage_span:
+            try:
+                answer = await attempt(stage_llm)
+                outcome = "accepted" if await is_accepted(answer, task, response_format, final_llm, llm.cascade) else "rejected"
+            except CASCADE_FATAL_ERRORS:
+                raise
+            except Exception as e:
+                logger.warning(f"Cascade stage {stage} ({model}) failed, escalating: {e}")
+                outcome = "failed"
+            stage_span.set_attribute("cascade.outcome", outcome)
+        model_cascade_answers_total.labels(str(stage), model, outcome).inc()
+        if outcome == "accepted":
+            return answer
+
+    answer = await attempt(final_llm)
+    if llm.cascade is not None:
+        model_cascade_answers_total.labels(str(len(stage_llms) - 1), get_litellm_model(final_llm), "accepted").inc()
+    return answer
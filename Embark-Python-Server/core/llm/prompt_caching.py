@@ -0,0 +1,132 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from core.llm.llm_call_hooks import LLMUsage
+
+logger = logging.getLogger(__name__)
+
+# Providers that only cache a prompt prefix up to an explicit `cache_control` breakpoint.
+# OpenAI caches long prompts whose prefix is unchanged on its own, a stable layout is enough.
+CACHE_CONTROL_PROVIDERS = ("anthropic",)
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def uses_cache_control(provider: str) -> bool:
+    return provider.lower() in CACHE_CONTROL_PROVIDERS
+
+
+def get_cached_text_blocks(text: str) -> List[Dict[str, Any]]:
+    """Text content ending with a cache breakpoint, the request up to it is cached."""
+    return [{"type": "text", "text": text, "cache_control": EPHEMERAL_CACHE_CONTROL}]
+
+
+def get_system_content(provider: str, text: str) -> Union[str, List[Dict[str, Any]]]:
+    return get_cached_text_blocks(text) if uses_cache_control(provider) else text
+
+
+def add_system_cache_control(provider: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Chat messages (OpenAI format, as sent through LiteLLM) with a cache breakpoint after the system prompt."""
+    if not uses_cache_control(provider):
+        return messages
+    return [
+        {**message, "content": get_cached_text_blocks(message["content"])}
+        if message.get("role") == "system" and isinstance(message.get("content"), str) and message["content"]
+        else message
+        for message in messages
+    ]
+
+
+def add_anthropic_cache_control(request_args: Dict[str, Any]) -> Dict[str, Any]:
+    """Messages API arguments with a cache breakpoint after the tools and the system prompt."""
+    system = request_args.get("system")
+    if isinstance(system, str) and system:
+        return {**request_args, "system": get_cached_text_blocks(system)}
+    return request_args
+
+
+def get_anthropic_cache_usage(response: Any) -> Tuple[int, int]:
+    """Cached tokens of a Messages API response, and the prompt tokens its `input_tokens` leaves out."""
+    usage = getattr(response, "usage", None)
+    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    return cache_read, cache_read + cache_creation
+
+
+def get_openai_cache_usage(response: Any) -> Tuple[int, int]:
+    prompt_tokens_details = getattr(getattr(response, "usage", None), "prompt_tokens_details", None)
+    return getattr(prompt_tokens_details, "cached_tokens", 0) or 0, 0
+
+
+# Usage reported by the provider SDK that the result of a framework client leaves out
+provider_usage: ContextVar[Optional[LLMUsage]] = ContextVar("provider_usage", default=None)
+
+
+@contextmanager
+def capture_provider_usage() -> Iterator[LLMUsage]:
+    """Collect the prompt cache usage of the SDK requests made in the block, tasks it starts included."""
+    usage = LLMUsage()
+    token = provider_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        provider_usage.reset(token)
+
+
+class ProviderResource:
+    """
+    Proxy of the SDK resource a model client sends its requests to (e.g. `messages` or
+    `chat.completions`). The arguments of `create` and `parse` are adapted on the way out
+    and the prompt cache usage of their responses is recorded for the call in progress.
+    """
+    def __init__(
+        self,
+        resource: Any,
+        read_cache_usage: Callable[[Any], Tuple[int, int]],
+        prepare_request: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ):
+        self._resource = resource
+        self._read_cache_usage = read_cache_usage
+        self._prepare_request = prepare_request
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._resource, name)
+        if name not in ("create", "parse"):
+            return attribute
+
+        async def call(*args, **request_args):
+            if self._prepare_request is not None:
+                request_args = self._prepare_request(request_args)
+            response = await attribute(*args, **request_args)
+            usage = provider_usage.get()
+            if usage is not None:
+                # Streams report their usage in events, they are not counted here
+                cached_tokens, uncounted_prompt_tokens = self._read_cache_usage(response)
+                usage.cached_tokens += cached_tokens
+                usage.prompt_tokens += uncounted_prompt_tokens
+            return response
+        return call
+
+
+def wrap_sdk_resource(
+    sdk_client: Any,
+    path: str,
+    read_cache_usage: Callable[[Any], Tuple[int, int]],
+    prepare_request: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> bool:
+    """
+    Replace the resource at `path` (e.g. "chat.completions") of the SDK client a framework
+    client keeps privately with a `ProviderResource`. When a framework upgrade no longer
+    exposes it, requests are sent unchanged and a warning is logged.
+    """
+    *parents, name = path.split(".")
+    owner = sdk_client
+    for parent in parents:
+        owner = getattr(owner, parent, None)
+    resource = getattr(owner, name, None)
+    if not callable(getattr(resource, "create", None)):
+        logger.warning(f"Prompt caching is off for {type(sdk_client).__name__}: its SDK client has no '{path}' resource")
+        return False
+    setattr(owner, name, ProviderResource(resource, read_cache_usage, prepare_request))
+    return True
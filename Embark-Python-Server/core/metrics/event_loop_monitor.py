@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as StackCounter, deque
+from os import getenv as os_getenv
+from typing import List, Optional
+
+from core.metrics.server_metrics import event_loop_lag_seconds, event_loop_stalls_total
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopStall:
+    """A period during which the event loop did not run, with the stacks sampled meanwhile."""
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.duration_seconds = 0.0
+        self.samples: StackCounter = StackCounter()
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "sample_count": sum(self.samples.values()),
+            "stacks": [{"count": count, "stack": stack} for stack, count in self.samples.most_common()],
+        }
+
+
+class EventLoopLagMonitor:
+    """
+    Periodically sleeps on the event loop and records how late it wakes up. A high lag
+    means blocking work is running on the loop and every in-flight run is stalled.
+
+    A watchdog thread also posts a callback to the loop every `sample_interval_seconds`. When
+    it has not run after `stall_threshold_seconds`, the watchdog samples the stack of the loop
+    thread until it does, so the blocking callback can be found in the log and in
+    `get_recent_stalls`.
+    """
+    def __init__(
+        self,
+        interval_seconds: float = 0.5,
+        stall_threshold_seconds: float = 0.25,
+        sample_interval_seconds: float = 0.05,
+        max_recent_stalls: int = 20,
+    ):
+        self.interval_seconds = interval_seconds
+        self.stall_threshold_seconds = stall_threshold_seconds
+        self.sample_interval_seconds = sample_interval_seconds
+        self.lag_seconds = 0.0
+        self.recent_stalls: deque = deque(maxlen=max_recent_stalls)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+
+    async def _probe(self):
+        while True:
+            scheduled_at = time.perf_counter() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            self.lag_seconds = max(0.0, time.perf_counter() - scheduled_at)
+            event_loop_lag_seconds.set(self.lag_seconds)
+
+    def _sample_loop_stack(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        return "".join(traceback.format_stack(frame))
+
+    def _watch(self):
+        while not self._stopped.wait(self.sample_interval_seconds):
+            # A callback posted to the loop runs late when the loop is blocked
+            ran = threading.Event()
+            posted_at = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                # The loop is closed
+                return
+            if ran.wait(self.stall_threshold_seconds):
+                continue
+            stall = EventLoopStall(started_at=time.time() - self.stall_threshold_seconds)
+            while not ran.wait(self.sample_interval_seconds) and not self._stopped.is_set():
+                stack = self._sample_loop_stack()
+                if stack is not None:
+                    stall.samples[stack] += 1
+            stall.duration_seconds = time.perf_counter() - posted_at
+            self._report(stall)
+
+    def _report(self, stall: EventLoopStall):
+        event_loop_stalls_total.inc()
+        self.recent_stalls.append(stall)
+        stack = stall.samples.most_common(1)[0][0] if stall.samples else "(no sample)"
+        logger.warning(
+            f"Event loop blocked for {stall.duration_seconds:.3f}s, most sampled stack:\n{stack}"
+        )
+
+    def get_recent_stalls(self) -> List[dict]:
+        return [stall.to_dict() for stall in reversed(self.recent_stalls)]
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._task = self._loop.create_task(self._probe())
+        if self._watchdog is None and self.stall_threshold_seconds > 0:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="embark-loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        if self._watchdog is not None:
+            self._stopped.set()
+            self._watchdog.join()
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instantiate and use them
+event_loop_lag_monitor = EventLoopLagMonitor(
+    interval_seconds=float(os_getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5")),
+    # 0 turns the watchdog off
+    stall_threshold_seconds=float(os_getenv("EVENT_LOOP_STALL_THRESHOLD_SECONDS", "0.25")),
+    sample_interval_seconds=float(os_getenv("EVENT_LOOP_STALL_SAMPLE_INTERVAL_SECONDS", "0.05")),
+)
@@ -0,0 +1,23 @@
+from core.llm.llm_call_hooks import LLMCall, LLMCallHook, LLMResponse, register_llm_call_hook
+from core.metrics.server_metrics import llm_call_duration_seconds, llm_call_errors_total, llm_tokens_total
+
+
+class LLMMetricsHook(LLMCallHook):
+    """Records latency and token usage per model for every LLM call."""
+    name = "llm_metrics"
+
+    def after_call(self, call: LLMCall, response: LLMResponse):
+        llm_call_duration_seconds.labels(call.model).observe(call.latency_seconds or 0.0)
+        usage = response.usage
+        llm_tokens_total.labels(call.model, "prompt").inc(usage.prompt_tokens)
+        llm_tokens_total.labels(call.model, "completion").inc(usage.completion_tokens)
+        llm_tokens_total.labels(call.model, "cached").inc(usage.cached_tokens)
+
+    def on_error(self, call: LLMCall, error: BaseException):
+        llm_call_errors_total.labels(call.model).inc()
+
+
+def register_llm_metrics_hook() -> LLMMetricsHook:
+    hook = LLMMetricsHook()
+    register_llm_call_hook(hook)
+    return hook
@@ -0,0 +1,226 @@
+import math
+from bisect import bisect_left
+from os import getenv as os_getenv
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Label value used once a metric reached its series limit, so user supplied names
+# (workflow, node and model names) can never grow the number of series without bound.
+OVERFLOW_LABEL_VALUE = "__other__"
+MAX_SERIES_PER_METRIC = int(os_getenv("METRICS_MAX_SERIES_PER_METRIC", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(label_names, label_values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base class of the metric families. Updates are plain attribute writes without locks:
+    they are made from the event loop, or rarely from framework worker threads where an
+    occasional lost increment is acceptable for monitoring data.
+    """
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), max_series: int = MAX_SERIES_PER_METRIC):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.max_series = max_series
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.label_names:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *label_values: str):
+        """Return the series for the label values, creating it within the series limit."""
+        key = tuple(label_values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        if len(self._children) >= self.max_series:
+            key = (OVERFLOW_LABEL_VALUE,) * len(self.label_names)
+            child = self._children.get(key)
+            if child is not None:
+                return child
+        child = self._new_child()
+        self._children[key] = child
+        return child
+
+    def preregister(self, label_sets: Iterable[Sequence[str]]):
+        """Create series up front so they are exported with zero values from the start."""
+        for label_values in label_sets:
+            self.labels(*label_values)
+        return self
+
+    def render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+            *self.render_samples(),
+        ]
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return GaugeValue()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._children[()].dec(amount)
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge whose value is read from existing state when the metrics are scraped."""
+    def __init__(self, name: str, documentation: str, metric_type: str, callback: Callable[[], float]):
+        self.metric_type = metric_type
+        self.callback = callback
+        super().__init__(name, documentation)
+
+    def _new_child(self):
+        return None
+
+    def render_samples(self) -> List[str]:
+        return [f"{self.name} {format_value(self.callback())}"]
+
+
+class HistogramValue:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # One count per bucket (non cumulative) plus the +Inf bucket.
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS, max_series: int = MAX_SERIES_PER_METRIC):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, label_names, max_series)
+
+    def _new_child(self):
+        return HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def render_samples(self) -> List[str]:
+        samples = []
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for upper_bound, bucket_count in zip((*self.upper_bounds, math.inf), child.bucket_counts):
+                cumulative += bucket_count
+                le = 'le="{}"'.format(format_value(upper_bound))
+                samples.append(f"{self.name}_bucket{format_labels(self.label_names, key, le)} {cumulative}")
+            samples.append(f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(child.sum)}")
+            samples.append(f"{self.name}_count{format_labels(self.label_names, key)} {child.count}")
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Instantiate and use them
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,144 @@
+import time
+from contextlib import contextmanager
+
+from core.metrics.metrics import Counter, Gauge, Histogram, metrics_registry
+
+RUN_KINDS = ("workflow", "custom_workflow")
+CACHE_NAMES = ("agent", "mcp_tool_definitions", "mcp_tool_results")
+TOKEN_TYPES = ("prompt", "completion", "cached")
+PRIORITY_CLASSES = ("interactive", "batch")
+JOB_OUTCOMES = ("completed", "failed", "cancelled", "retried", "dead_lettered")
+REJECTION_REASONS = ("queue_full", "cost_limit")
+ROUTING_TIMINGS = ("at_start", "during_output", "after_output")
+SPECULATION_MODES = ("prepare", "execute")
+SPECULATION_OUTCOMES = ("hit", "miss")
+BLOCKING_CALL_POOLS = ("io", "crew")
+RECYCLE_REASONS = ("max_runs", "max_memory", "cancelled", "exited")
+RESULT_ENCODINGS = ("raw", "stored")
+CASCADE_OUTCOMES = ("accepted", "rejected", "failed")
+
+run_duration_seconds = metrics_registry.register(Histogram(
+    "embark_run_duration_seconds", "Duration of workflow runs.", ("kind", "workflow"),
+))
+node_duration_seconds = metrics_registry.register(Histogram(
+    "embark_node_duration_seconds", "Duration of custom workflow node executions.", ("node", "framework"),
+))
+llm_call_duration_seconds = metrics_registry.register(Histogram(
+    "embark_llm_call_duration_seconds", "Latency of LLM calls.", ("model",),
+))
+blocking_call_duration_seconds = metrics_registry.register(Histogram(
+    "embark_blocking_call_duration_seconds", "Duration of blocking calls run on a thread pool, waiting included.", ("call",),
+))
+
+runs_total = metrics_registry.register(Counter(
+    "embark_runs_total", "Finished runs.", ("kind",),
+).preregister((kind,) for kind in RUN_KINDS))
+run_failures_total = metrics_registry.register(Counter(
+    "embark_run_failures_total", "Runs that ended with an error.", ("kind",),
+).preregister((kind,) for kind in RUN_KINDS))
+llm_tokens_total = metrics_registry.register(Counter(
+    "embark_llm_tokens_total", "Tokens used by LLM calls.", ("model", "type"),
+))
+llm_call_errors_total = metrics_registry.register(Counter(
+    "embark_llm_call_errors_total", "LLM calls that raised an error.", ("model",),
+))
+cache_hits_total = metrics_registry.register(Counter(
+    "embark_cache_hits_total", "Cache lookups that found an entry.", ("cache",),
+).preregister((cache,) for cache in CACHE_NAMES))
+cache_misses_total = metrics_registry.register(Counter(
+    "embark_cache_misses_total", "Cache lookups that did not find an entry.", ("cache",),
+).preregister((cache,) for cache in CACHE_NAMES))
+work_queue_jobs_total = metrics_registry.register(Counter(
+    "embark_work_queue_jobs_total", "Work queue jobs processed by this worker, by outcome.", ("outcome",),
+).preregister((outcome,) for outcome in JOB_OUTCOMES))
+admission_rejections_total = metrics_registry.register(Counter(
+    "embark_admission_rejections_total", "Runs shed with 429 before they started.", ("kind", "reason"),
+).preregister((kind, reason) for kind in RUN_KINDS for reason in REJECTION_REASONS))
+early_routing_total = metrics_registry.register(Counter(
+    "embark_early_routing_total", "Custom workflow routing decisions, by when the next node was known.", ("timing",),
+).preregister((timing,) for timing in ROUTING_TIMINGS))
+speculations_total = metrics_registry.register(Counter(
+    "embark_speculations_total", "Speculations on the likely child of a router node, by outcome.", ("mode", "outcome"),
+).preregister((mode, outcome) for mode in SPECULATION_MODES for outcome in SPECULATION_OUTCOMES))
+speculation_wasted_tokens_total = metrics_registry.register(Counter(
+    "embark_speculation_wasted_tokens_total", "Tokens used by speculative executions that were cancelled.",
+))
+
+runs_in_flight = metrics_registry.register(Gauge(
+    "embark_runs_in_flight", "Runs currently executing.", ("kind",),
+).preregister((kind,) for kind in RUN_KINDS))
+run_queue_depth = metrics_registry.register(Gauge(
+    "embark_run_queue_depth", "Runs scheduled and waiting to start.", ("kind",),
+).preregister((kind,) for kind in RUN_KINDS))
+scheduler_wait_seconds = metrics_registry.register(Histogram(
+    "embark_scheduler_wait_seconds", "Time runs waited for an execution slot, by priority class.", ("priority",),
+).preregister((priority,) for priority in PRIORITY_CLASSES))
+scheduler_waiting = metrics_registry.register(Gauge(
+    "embark_scheduler_waiting", "Runs waiting for an execution slot, by priority class.", ("priority",),
+).preregister((priority,) for priority in PRIORITY_CLASSES))
+admission_cost_in_flight = metrics_registry.register(Gauge(
+    "embark_admission_cost_in_flight", "Estimated cost of the admitted runs.",
+))
+mcp_sessions_open = metrics_registry.register(Gauge(
+    "embark_mcp_sessions_open", "Open MCP client sessions.",
+))
+event_loop_lag_seconds = metrics_registry.register(Gauge(
+    "embark_event_loop_lag_seconds", "Delay of the last event loop lag probe past its scheduled time.",
+))
+process_workers_recycled_total = metrics_registry.register(Counter(
+    "embark_process_workers_recycled_total", "Framework worker processes replaced, by reason.", ("reason",),
+).preregister((reason,) for reason in RECYCLE_REASONS))
+event_loop_stalls_total = metrics_registry.register(Counter(
+    "embark_event_loop_stalls_total", "Times the event loop was blocked for longer than the stall threshold.",
+))
+process_workers_busy = metrics_registry.register(Gauge(
+    "embark_process_workers_busy", "Framework worker processes executing a job.",
+))
+blocking_calls_in_flight = metrics_registry.register(Gauge(
+    "embark_blocking_calls_in_flight", "Blocking calls submitted to a thread pool, running or waiting for a thread.", ("pool",),
+).preregister((pool,) for pool in BLOCKING_CALL_POOLS))
+run_result_bytes_total = metrics_registry.register(Counter(
+    "embark_run_result_bytes_total", "Bytes of run results written to the result store, before (raw) and after compression (stored).", ("encoding",),
+).preregister((encoding,) for encoding in RESULT_ENCODINGS))
+
+model_cascade_answers_total = metrics_registry.register(Counter(
+    "embark_model_cascade_answers_total", "Answers of model cascade stages, by outcome. The last stage is always accepted.", ("stage", "model", "outcome"),
+))
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    (cache_hits_total if hit else cache_misses_total).labels(cache).inc()
+
+
+@contextmanager
+def track_run(kind: str, workflow: str):
+    """Count a run and record its duration and outcome."""
+    runs_in_flight.labels(kind).inc()
+    started_at = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        run_failures_total.labels(kind).inc()
+        raise
+    finally:
+        runs_in_flight.labels(kind).dec()
+        runs_total.labels(kind).inc()
+        run_duration_seconds.labels(kind, workflow).observe(time.perf_counter() - started_at)
+
+
+@contextmanager
+def track_node(node: str, framework: str):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        node_duration_seconds.labels(node, framework).observe(time.perf_counter() - started_at)
+
+
+@contextmanager
+def track_mcp_session():
+    mcp_sessions_open.inc()
+    try:
+        yield
+    finally:
+        mcp_sessions_open.dec()
@@ -0,0 +1,4 @@
+CASCADE_VERIFIER_PROMPT = """You are verifying the answer a smaller model gave to a task. Decide whether the answer is correct, complete and follows the instructions of the task.
+
+Accept the answer only if you would give the same answer yourself. Reject it if it is wrong, incomplete, guessed or ignores part of the task. Explain the decision in one sentence.
+"""
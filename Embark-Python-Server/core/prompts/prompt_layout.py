@@ -0,0 +1,39 @@
+from typing import List, Optional, Tuple
+
+from core.prompts.manager_prompt import REFLECTION_AGENT_PROMPT
+from models.workflow_models.workflow import Agent
+
+
+def join_sections(sections: List[Tuple[Optional[str], Optional[str]]]) -> str:
+    """Titled sections in the given order, empty ones left out and whitespace normalized."""
+    parts = []
+    for title, text in sections:
+        text = (text or "").strip()
+        if text:
+            parts.append(f"**{title}**\n\n{text}" if title else text)
+    return "\n\n".join(parts)
+
+
+def get_agent_system_prompt(agent: Agent) -> str:
+    """
+    System prompt of an agent. Only the agent config goes in, always in the same order, so
+    every call of the agent starts with the same prefix and provider prompt caches reuse it.
+    """
+    return join_sections([
+        ("Goal", agent.goal),
+        (None, agent.detailed_prompt),
+        ("Your Responsibility", agent.agent_responsibility),
+        ("Expected Output", agent.expected_output),
+    ])
+
+
+def get_reflection_prompt(additional_instructions: Optional[str] = None, task: Optional[str] = None) -> str:
+    """
+    Reflection prompt, the part shared by every workflow first, then the instructions of the
+    workflow and the task of the run last.
+    """
+    return join_sections([
+        (None, REFLECTION_AGENT_PROMPT),
+        ("Instructions", additional_instructions),
+        ("TASK", task),
+    ])
@@ -0,0 +1,264 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from os import getenv as os_getenv
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from core.scheduling.run_scheduler import RunScheduler, run_scheduler
+from models.queue_models.queue import Job, JobKind, JobState, PriorityClass
+from shared import fast_json
+
+PRIORITY_RANKS = {priority: rank for rank, priority in enumerate(PriorityClass)}
+
+
+class WorkQueue(ABC):
+    """
+    Durable queue of runs submitted through the API and executed by queue workers.
+
+    A dequeued job is leased to one worker until its visibility timeout expires; a worker
+    that dies without acknowledging it lets another worker pick the job up again. Failed
+    jobs are retried with exponential backoff and dead-lettered after `max_attempts`.
+    """
+
+    @abstractmethod
+    def enqueue(
+        self,
+        kind: JobKind,
+        run_id: str,
+        payload: Any,
+        timeout_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        tenant: str = "default",
+        workflow: str = "",
+        priority: PriorityClass = PriorityClass.BATCH,
+    ) -> Job:
+        ...
+
+    @abstractmethod
+    def dequeue(self, worker_id: str, visibility_timeout_seconds: float) -> Optional[Job]:
+        """
+        Lease the next job: interactive jobs before batch jobs, then the tenant with the fewest
+        running jobs relative to its weight (tenants at their concurrency cap are skipped), then
+        the least running workflow of that tenant, then the oldest job.
+        """
+
+    @abstractmethod
+    def extend_lease(self, job: Job, visibility_timeout_seconds: float) -> bool:
+        ...
+
+    @abstractmethod
+    def ack(self, job: Job):
+        ...
+
+    @abstractmethod
+    def nack(self, job: Job, error: str) -> JobState:
+        """Release a failed job for a retry, or dead-letter it when it has no attempts left."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def list_jobs(self, state: JobState, limit: int = 100) -> List[Job]:
+        ...
+
+    @abstractmethod
+    def get_counts(self) -> Dict[JobState, int]:
+        ...
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue in a SQLite file, for API and worker processes on a single host."""
+    columns = "id, run_id, kind, payload, timeout_seconds, tenant, priority, state, attempts, max_attempts, leased_by, lease_expires_at, last_error, created_at"
+    # Columns added after the first release of the table
+    added_columns = {
+        "tenant": "TEXT NOT NULL DEFAULT 'default'",
+        "workflow": "TEXT NOT NULL DEFAULT ''",
+        "priority": "TEXT NOT NULL DEFAULT 'batch'",
+    }
+
+    def __init__(self, path: str, max_attempts: int = 3, retry_backoff_seconds: float = 5.0, scheduler: Optional[RunScheduler] = None):
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        # Tenant caps and weights are shared with the in-process scheduler
+        self.scheduler = scheduler or RunScheduler()
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, run_id TEXT NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+            "timeout_seconds REAL, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "max_attempts INTEGER NOT NULL, available_at REAL NOT NULL, leased_by TEXT, "
+            "lease_expires_at REAL, last_error TEXT, created_at REAL NOT NULL)"
+        )
+        existing_columns = {row[1] for row in self.connection.execute("PRAGMA table_info(jobs)")}
+        for column, definition in self.added_columns.items():
+            if column not in existing_columns:
+                self.connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at)")
+
+    def to_job(self, row) -> Job:
+        job = dict(zip(self.columns.split(", "), row))
+        job["payload"] = fast_json.loads(job["payload"])
+        return Job.model_validate(job)
+
+    def enqueue(
+        self,
+        kind: JobKind,
+        run_id: str,
+        payload: Any,
+        timeout_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        tenant: str = "default",
+        workflow: str = "",
+        priority: PriorityClass = PriorityClass.BATCH,
+    ) -> Job:
+        now = time.time()
+        job = Job(
+            id=uuid4().hex,
+            run_id=run_id,
+            kind=kind,
+            payload=payload,
+            timeout_seconds=timeout_seconds,
+            tenant=tenant,
+            priority=priority,
+            max_attempts=max_attempts or self.max_attempts,
+            created_at=now,
+        )
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO jobs (id, run_id, kind, payload, timeout_seconds, tenant, workflow, priority, state, max_attempts, available_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, run_id, kind.value, fast_json.dumps(payload), timeout_seconds, tenant, workflow, priority.value,
+                    JobState.QUEUED.value, job.max_attempts, now, now,
+                ),
+            )
+        return job
+
+    def is_tenant_eligible(self, tenant: str, running: int) -> bool:
+        limit = self.scheduler.get_tenant_limit(tenant)
+        return limit is None or running < limit
+
+    def pick_job(self, now: float) -> Optional[str]:
+        running = self.connection.execute(
+            "SELECT tenant, workflow, COUNT(*) FROM jobs WHERE state = ? AND lease_expires_at > ? GROUP BY tenant, workflow",
+            (JobState.LEASED.value, now),
+        ).fetchall()
+        running_by_tenant: Dict[str, int] = {}
+        running_by_workflow: Dict[tuple, int] = {}
+        for tenant, workflow, count in running:
+            running_by_tenant[tenant] = running_by_tenant.get(tenant, 0) + count
+            running_by_workflow[(tenant, workflow)] = count
+
+        # The oldest ready job of every priority, tenant and workflow
+        heads = self.connection.execute(
+            "SELECT id, priority, tenant, workflow, MIN(available_at) FROM jobs "
+            "WHERE (state = ? AND available_at <= ?) OR (state = ? AND lease_expires_at <= ?) "
+            "GROUP BY priority, tenant, workflow",
+            (JobState.QUEUED.value, now, JobState.LEASED.value, now),
+        ).fetchall()
+        eligible = [head for head in heads if self.is_tenant_eligible(head[2], running_by_tenant.get(head[2], 0))]
+        if not eligible:
+            return None
+        job_id, *_ = min(eligible, key=lambda head: (
+            PRIORITY_RANKS[PriorityClass(head[1])],
+            running_by_tenant.get(head[2], 0) / self.scheduler.tenant_weights.get(head[2], 1.0),
+            running_by_workflow.get((head[2], head[3]), 0),
+            head[4],
+        ))
+        return job_id
+
+    def dequeue(self, worker_id: str, visibility_timeout_seconds: float) -> Optional[Job]:
+        now = time.time()
+        with self.lock:
+            # The write lock is held from dead-lettering to leasing, so concurrent workers never
+            # lease the same job or a job another worker is dead-lettering
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                # Leases that expired on their last attempt belong to a worker that kept dying
+                self.connection.execute(
+                    "UPDATE jobs SET state = ?, last_error = 'Lease expired on the last attempt' "
+                    "WHERE state = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                    (JobState.DEAD.value, JobState.LEASED.value, now),
+                )
+                job_id = self.pick_job(now)
+                row = None
+                if job_id is not None:
+                    row = self.connection.execute(
+                        f"UPDATE jobs SET state = ?, attempts = attempts + 1, leased_by = ?, lease_expires_at = ? "
+                        f"WHERE id = ? RETURNING {self.columns}",
+                        (JobState.LEASED.value, worker_id, now + visibility_timeout_seconds, job_id),
+                    ).fetchone()
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        return self.to_job(row) if row else None
+
+    def extend_lease(self, job: Job, visibility_timeout_seconds: float) -> bool:
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND state = ? AND leased_by = ?",
+                (time.time() + visibility_timeout_seconds, job.id, JobState.LEASED.value, job.leased_by),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, job: Job):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET state = ?, lease_expires_at = NULL WHERE id = ? AND leased_by = ?",
+                (JobState.DONE.value, job.id, job.leased_by),
+            )
+
+    def nack(self, job: Job, error: str) -> JobState:
+        state = JobState.DEAD if job.attempts >= job.max_attempts else JobState.QUEUED
+        available_at = time.time() + self.retry_backoff_seconds * 2 ** (job.attempts - 1)
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET state = ?, available_at = ?, leased_by = NULL, lease_expires_at = NULL, last_error = ? "
+                "WHERE id = ? AND leased_by = ?",
+                (state.value, available_at, error, job.id, job.leased_by),
+            )
+        return state
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            row = self.connection.execute(f"SELECT {self.columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self.to_job(row) if row else None
+
+    def list_jobs(self, state: JobState, limit: int = 100) -> List[Job]:
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {self.columns} FROM jobs WHERE state = ? ORDER BY created_at LIMIT ?", (state.value, limit)
+            ).fetchall()
+        return [self.to_job(row) for row in rows]
+
+    def get_counts(self) -> Dict[JobState, int]:
+        with self.lock:
+            rows = self.connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = dict.fromkeys(JobState, 0)
+        counts.update({JobState(state): count for state, count in rows})
+        return counts
+
+
+def get_work_queue(kind: Optional[str] = None) -> WorkQueue:
+    kind = (kind or os_getenv("WORK_QUEUE_BACKEND", "sqlite")).lower()
+    match kind:
+        case "sqlite":
+            return SQLiteWorkQueue(
+                os_getenv("WORK_QUEUE_SQLITE_PATH", "embark_queue.db"),
+                max_attempts=int(os_getenv("WORK_QUEUE_MAX_ATTEMPTS", "3")),
+                retry_backoff_seconds=float(os_getenv("WORK_QUEUE_RETRY_BACKOFF_SECONDS", "5")),
+                scheduler=run_scheduler,
+            )
+        case _:
+            raise ValueError(f"Unsupported work queue backend: '{kind}'. Must be 'sqlite'.")
+
+
+# Instantiate and use them
+work_queue = get_work_queue()
@@ -0,0 +1,136 @@
+import asyncio
+from contextvars import ContextVar
+from enum import Enum
+from os import getenv as os_getenv
+from typing import Any, Awaitable, Dict, Optional
+
+from fastapi import Request
+
+from core.datastore.datastore import run_state_call
+from core.datastore.run_store import run_store
+from core.exception.workflow_execution_exception import RunCancelledException
+from core.runs.run_context import run_scope
+
+
+class CancelReason(str, Enum):
+    CANCELLED = "cancelled"
+    TIMEOUT = "timeout"
+    CLIENT_DISCONNECTED = "client_disconnected"
+
+
+class RunHandle:
+    """A running run. Once `cancel_reason` is set the run is being torn down."""
+    def __init__(self, run_id: str, task: asyncio.Task):
+        self.run_id = run_id
+        self.task = task
+        self.cancel_reason: Optional[CancelReason] = None
+
+    def cancel(self, reason: CancelReason) -> bool:
+        if self.cancel_reason is not None or self.task.done():
+            return False
+        self.cancel_reason = reason
+        self.task.cancel()
+        return True
+
+
+class RunRegistry:
+    """Runs that are currently executing in this process, by run id."""
+    def __init__(self, default_timeout_seconds: Optional[float] = None, poll_interval_seconds: float = 1.0):
+        self.default_timeout_seconds = default_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.runs: Dict[str, RunHandle] = {}
+
+    def register(self, run_id: str, task: asyncio.Task) -> RunHandle:
+        handle = RunHandle(run_id, task)
+        self.runs[run_id] = handle
+        return handle
+
+    def unregister(self, run_id: str):
+        self.runs.pop(run_id, None)
+
+    def get(self, run_id: str) -> Optional[RunHandle]:
+        return self.runs.get(run_id)
+
+    async def cancel(self, run_id: str, reason: CancelReason = CancelReason.CANCELLED) -> bool:
+        handle = self.runs.get(run_id)
+        if handle is not None:
+            return handle.cancel(reason)
+        # The run may execute in another server process, which picks the request up when it polls
+        return await run_state_call("run_store.request_cancel", run_store.request_cancel, run_id, reason.value)
+
+
+# Handle of the run executing in the current context. Unlike the registry entry it stays
+# reachable from framework threads (e.g. CrewAI kickoff) that outlive the cancelled task.
+current_run_handle: ContextVar[Optional[RunHandle]] = ContextVar("current_run_handle", default=None)
+
+
+def raise_if_cancelled():
+    """Stop cooperatively, used where asyncio cancellation does not reach (threads)."""
+    handle = current_run_handle.get()
+    if handle is not None and handle.cancel_reason is not None:
+        raise RunCancelledException(handle.run_id, handle.cancel_reason.value)
+
+
+def get_cancel_reason() -> Optional[str]:
+    handle = current_run_handle.get()
+    return handle.cancel_reason.value if handle is not None and handle.cancel_reason is not None else None
+
+
+async def watch_run(handle: RunHandle, request: Optional[Request]):
+    """Cancel the run when its client disconnects or another process requested it."""
+    while not handle.task.done():
+        if request is not None and await request.is_disconnected():
+            handle.cancel(CancelReason.CLIENT_DISCONNECTED)
+            return
+        cancel_request = await run_state_call("run_store.get_cancel_request", run_store.get_cancel_request, handle.run_id)
+        if cancel_request is not None:
+            handle.cancel(CancelReason(cancel_request))
+            return
+        await asyncio.sleep(run_registry.poll_interval_seconds)
+
+
+async def run_with_cancellation(
+    run_id: str,
+    run: Awaitable[Any],
+    timeout_seconds: Optional[float] = None,
+    request: Optional[Request] = None,
+) -> Any:
+    """
+    Execute `run` as its own task so that it can be cancelled by run id, by its deadline or
+    when the client disconnects. A stopped run raises `RunCancelledException`.
+    """
+    handle: Optional[RunHandle] = None
+
+    async def run_in_scope():
+        current_run_handle.set(handle)
+        # Status items and spans written anywhere in the run are attributed to it
+        with run_scope(run_id):
+            return await run
+
+    task = asyncio.ensure_future(run_in_scope())
+    handle = run_registry.register(run_id, task)
+    timeout_seconds = timeout_seconds or run_registry.default_timeout_seconds
+    deadline = (
+        asyncio.get_running_loop().call_later(timeout_seconds, handle.cancel, CancelReason.TIMEOUT)
+        if timeout_seconds else None
+    )
+    watcher = asyncio.ensure_future(watch_run(handle, request))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if handle.cancel_reason is None:
+            # The request itself was cancelled (e.g. server shutdown)
+            raise
+        raise RunCancelledException(run_id, handle.cancel_reason.value)
+    finally:
+        if deadline is not None:
+            deadline.cancel()
+        watcher.cancel()
+        run_registry.unregister(run_id)
+
+
+# Instantiate and use them
+run_registry = RunRegistry(
+    default_timeout_seconds=float(os_getenv("RUN_TIMEOUT_SECONDS", "0")) or None,
+    poll_interval_seconds=float(os_getenv("RUN_POLL_INTERVAL_SECONDS", "1.0")),
+)
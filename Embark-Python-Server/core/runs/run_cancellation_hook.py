@@ -0,0 +1,20 @@
+from core.llm.llm_call_hooks import LLMCall, LLMCallHook, register_llm_call_hook
+from core.runs.run_cancellation import raise_if_cancelled
+
+
+class RunCancellationHook(LLMCallHook):
+    """
+    Refuses LLM calls of a cancelled run. Async frameworks are stopped by task cancellation,
+    this covers frameworks that keep calling the model from a thread (CrewAI).
+    """
+    name = "run_cancellation"
+
+    def before_call(self, call: LLMCall):
+        raise_if_cancelled()
+        return None
+
+
+def register_run_cancellation_hook() -> RunCancellationHook:
+    hook = RunCancellationHook()
+    register_llm_call_hook(hook)
+    return hook
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from uuid import uuid4
+
+# Identifiers of the run and custom workflow node executing in the current context.
+# Context variables follow asyncio tasks and threads started with asyncio.to_thread.
+current_run_id: ContextVar[Optional[str]] = ContextVar("current_run_id", default=None)
+current_node_id: ContextVar[Optional[str]] = ContextVar("current_node_id", default=None)
+
+
+def new_run_id() -> str:
+    return uuid4().hex
+
+
+def get_run_id() -> Optional[str]:
+    return current_run_id.get()
+
+
+def get_node_id() -> Optional[str]:
+    return current_node_id.get()
+
+
+@contextmanager
+def run_scope(run_id: str):
+    token = current_run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        current_run_id.reset(token)
+
+
+@contextmanager
+def node_scope(node_id: str):
+    token = current_node_id.set(node_id)
+    try:
+        yield node_id
+    finally:
+        current_node_id.reset(token)
@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from core.exception.workflow_execution_exception import TokenBudgetExceededException
+from core.llm.llm_call_hooks import LLMUsage
+from models.status_models.status import TokenUsage
+
+
+def add_usage(token_usage: TokenUsage, usage: LLMUsage):
+    token_usage.prompt_tokens += usage.prompt_tokens
+    token_usage.completion_tokens += usage.completion_tokens
+    token_usage.cached_tokens += usage.cached_tokens
+    token_usage.total_tokens += usage.total_tokens
+    token_usage.llm_calls += 1
+
+
+def merge_usage(token_usage: TokenUsage, other: TokenUsage):
+    token_usage.prompt_tokens += other.prompt_tokens
+    token_usage.completion_tokens += other.completion_tokens
+    token_usage.cached_tokens += other.cached_tokens
+    token_usage.total_tokens += other.total_tokens
+    token_usage.llm_calls += other.llm_calls
+
+
+class RunTokenAccount:
+    """
+    Token usage of a single run, in total and per custom workflow node, with optional budgets.
+    Once a budget is exceeded the account stays exceeded and every further LLM call of the run
+    is refused.
+    """
+    def __init__(self, run_budget: Optional[int] = None, node_budgets: Optional[Dict[str, int]] = None):
+        self.run_budget = run_budget
+        self.node_budgets = {node: budget for node, budget in (node_budgets or {}).items() if budget is not None}
+        self.total = TokenUsage()
+        self.nodes: Dict[str, TokenUsage] = {}
+        self.exceeded: Optional[TokenBudgetExceededException] = None
+
+    def get_node_usage(self, node: str) -> TokenUsage:
+        return self.nodes.get(node) or TokenUsage()
+
+    def add(self, usage: LLMUsage, node: Optional[str] = None):
+        add_usage(self.total, usage)
+        if node is not None:
+            add_usage(self.nodes.setdefault(node, TokenUsage()), usage)
+        self._check_budgets(node)
+
+    def _check_budgets(self, node: Optional[str]):
+        if self.exceeded is not None:
+            return
+        if self.run_budget is not None and self.total.total_tokens > self.run_budget:
+            self.exceeded = TokenBudgetExceededException("run", self.total.total_tokens, self.run_budget)
+        elif node is not None and node in self.node_budgets:
+            node_tokens = self.nodes[node].total_tokens
+            if node_tokens > self.node_budgets[node]:
+                self.exceeded = TokenBudgetExceededException(f"node '{node}'", node_tokens, self.node_budgets[node])
+
+    def raise_if_exceeded(self):
+        if self.exceeded is not None:
+            raise self.exceeded
+
+    def speculate(self, node: str) -> "SpeculativeTokenAccount":
+        return SpeculativeTokenAccount(self, node)
+
+
+class SpeculativeTokenAccount(RunTokenAccount):
+    """
+    Token account of a node executing speculatively, on the partial output of its parent.
+    Its calls count toward the run total and budget right away, but toward the node only
+    once the execution is kept, so a discarded execution never uses up the node's budget.
+    """
+    def __init__(self, account: RunTokenAccount, node: str):
+        super().__init__(run_budget=account.run_budget)
+        self.account = account
+        # The run total is shared, node usage is kept apart until `keep`
+        self.total = account.total
+        if node in account.node_budgets:
+            self.node_budgets[node] = account.node_budgets[node] - account.get_node_usage(node).total_tokens
+        self.usage = TokenUsage()
+        self.kept = False
+
+    def add(self, usage: LLMUsage, node: Optional[str] = None):
+        if self.kept:
+            self.account.add(usage, node)
+            return
+        add_usage(self.usage, usage)
+        self.account.add(usage)
+        if node is not None:
+            add_usage(self.nodes.setdefault(node, TokenUsage()), usage)
+        self._check_budgets(node)
+
+    def speculate(self, node: str) -> "SpeculativeTokenAccount":
+        # A node started from a speculative execution is charged to the run like its parent
+        return self.account.speculate(node)
+
+    def keep(self):
+        """Charge the execution to its node, as if it had not started speculatively."""
+        self.kept = True
+        for node, usage in self.nodes.items():
+            merge_usage(self.account.nodes.setdefault(node, TokenUsage()), usage)
+            self.account._check_budgets(node)
+
+    def raise_if_exceeded(self):
+        self.account.raise_if_exceeded()
+        super().raise_if_exceeded()
+
+
+current_token_account: ContextVar[Optional[RunTokenAccount]] = ContextVar("current_token_account", default=None)
+
+
+def get_token_account() -> Optional[RunTokenAccount]:
+    return current_token_account.get()
+
+
+@contextmanager
+def token_account_scope(account: Optional[RunTokenAccount]):
+    token = current_token_account.set(account)
+    try:
+        yield account
+    finally:
+        current_token_account.reset(token)
@@ -0,0 +1,31 @@
+from core.llm.llm_call_hooks import LLMCall, LLMCallHook, LLMResponse, register_llm_call_hook
+from core.runs.run_context import get_node_id
+from core.runs.token_accounting import get_token_account
+
+
+class TokenAccountingHook(LLMCallHook):
+    """
+    Adds the usage of every LLM call to the token account of the current run and stops
+    the run once one of its budgets is exceeded.
+    """
+    name = "token_accounting"
+
+    def before_call(self, call: LLMCall):
+        account = get_token_account()
+        if account is not None:
+            # Refuse further calls, e.g. framework retries, once the run is over budget.
+            account.raise_if_exceeded()
+        return None
+
+    def after_call(self, call: LLMCall, response: LLMResponse):
+        account = get_token_account()
+        if account is None:
+            return
+        account.add(response.usage, node=get_node_id())
+        account.raise_if_exceeded()
+
+
+def register_token_accounting_hook() -> TokenAccountingHook:
+    hook = TokenAccountingHook()
+    register_llm_call_hook(hook)
+    return hook
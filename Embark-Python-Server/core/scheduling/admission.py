@@ -0,0 +1,116 @@
+import math
+import time
+from contextlib import contextmanager
+from os import getenv as os_getenv
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from core.metrics.server_metrics import admission_cost_in_flight, admission_rejections_total
+from core.scheduling.run_scheduler import RunScheduler, run_scheduler
+from models.api_models.workflow import CustomWorkflowConfig, WorkflowModel
+
+RETRY_AFTER_HEADER = "Retry-After"
+
+
+def estimate_workflows_cost(request: List[WorkflowModel]) -> int:
+    """Cost of a list of workflows: one unit per agent, plus the reflection agent of each workflow."""
+    return sum(len(item.workflow.agents) + 1 for item in request)
+
+
+def estimate_custom_workflow_cost(request: CustomWorkflowConfig) -> int:
+    """Cost of a custom workflow: one unit per node, each node runs one agent."""
+    return len(request.workflows)
+
+
+class AdmissionController:
+    """
+    Decides whether a run is accepted before any work starts. A run is shed when too many
+    admitted runs are already waiting for an execution slot of the scheduler, or when the
+    estimated cost of the admitted runs would exceed `max_cost`. Shedding early keeps the
+    runs that were accepted fast instead of letting every run slow down together.
+    """
+    def __init__(
+        self,
+        scheduler: RunScheduler,
+        max_queued_runs: Optional[int] = None,
+        max_cost: Optional[int] = None,
+        default_run_seconds: float = 5.0,
+        max_retry_after_seconds: int = 60,
+    ):
+        self.scheduler = scheduler
+        self.max_queued_runs = max_queued_runs
+        self.max_cost = max_cost
+        self.max_retry_after_seconds = max_retry_after_seconds
+        self.admitted_runs = 0
+        self.admitted_cost = 0
+        # Moving average of run durations, to tell rejected clients when to come back
+        self.average_run_seconds = default_run_seconds
+
+    def get_queued_runs(self) -> int:
+        return max(0, self.admitted_runs - self.scheduler.running)
+
+    def get_rejection_reason(self, cost: int = 0) -> Optional[str]:
+        # Runs only queue when the scheduler caps concurrent runs
+        max_concurrent_runs = self.scheduler.max_concurrent_runs
+        if self.max_queued_runs is not None and max_concurrent_runs is not None:
+            if self.scheduler.running >= max_concurrent_runs and self.get_queued_runs() >= self.max_queued_runs:
+                return "queue_full"
+        # A run costing more than the whole budget is still accepted on an idle server
+        if self.max_cost is not None and self.admitted_cost and self.admitted_cost + cost > self.max_cost:
+            return "cost_limit"
+        return None
+
+    def get_retry_after_seconds(self) -> int:
+        slots = self.scheduler.max_concurrent_runs or max(self.scheduler.running, 1)
+        seconds = self.average_run_seconds * (self.get_queued_runs() + 1) / slots
+        return min(max(1, math.ceil(seconds)), self.max_retry_after_seconds)
+
+    @contextmanager
+    def admit(self, kind: str, cost: int):
+        """Hold an admission for the duration of the block, or raise 429 with Retry-After."""
+        reason = self.get_rejection_reason(cost)
+        if reason is not None:
+            admission_rejections_total.labels(kind, reason).inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"Server is saturated ({reason}), retry later.",
+                headers={RETRY_AFTER_HEADER: str(self.get_retry_after_seconds())},
+            )
+        self.admitted_runs += 1
+        self.admitted_cost += cost
+        admission_cost_in_flight.set(self.admitted_cost)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.admitted_runs -= 1
+            self.admitted_cost -= cost
+            admission_cost_in_flight.set(self.admitted_cost)
+            self.average_run_seconds = 0.8 * self.average_run_seconds + 0.2 * (time.perf_counter() - started_at)
+
+    def get_stats(self) -> dict:
+        return {
+            "admitted_runs": self.admitted_runs,
+            "queued_runs": self.get_queued_runs(),
+            "max_queued_runs": self.max_queued_runs,
+            "admitted_cost": self.admitted_cost,
+            "max_cost": self.max_cost,
+            "average_run_seconds": round(self.average_run_seconds, 3),
+        }
+
+
+def get_optional_int(name: str) -> Optional[int]:
+    # Unset means unlimited, 0 is a valid limit here
+    value = os_getenv(name, "")
+    return int(value) if value else None
+
+
+# Instantiate and use them
+admission_controller = AdmissionController(
+    run_scheduler,
+    max_queued_runs=get_optional_int("ADMISSION_MAX_QUEUED_RUNS"),
+    max_cost=get_optional_int("ADMISSION_MAX_COST"),
+    default_run_seconds=float(os_getenv("ADMISSION_DEFAULT_RUN_SECONDS", "5")),
+    max_retry_after_seconds=int(os_getenv("ADMISSION_MAX_RETRY_AFTER_SECONDS", "60")),
+)
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from os import getenv as os_getenv
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from core.metrics.server_metrics import scheduler_wait_seconds, scheduler_waiting
+from models.queue_models.queue import PriorityClass
+
+
+class FairShare:
+    """
+    Start-time fair queuing over a set of keys: the waiting key with the smallest start tag
+    goes next and is then charged 1/weight. Keys that were idle restart at the current
+    virtual time, so idling does not build up credit.
+    """
+    def __init__(self):
+        self.tags: Dict[str, float] = {}
+        self.virtual_time = 0.0
+
+    def activate(self, key: str):
+        self.tags[key] = max(self.tags.get(key, 0.0), self.virtual_time)
+
+    def pick(self, keys: Iterable[str]) -> str:
+        return min(keys, key=lambda key: self.tags.get(key, self.virtual_time))
+
+    def charge(self, key: str, weight: float):
+        self.virtual_time = self.tags.get(key, self.virtual_time)
+        self.tags[key] = self.virtual_time + 1.0 / weight
+
+    def forget(self, key: str):
+        # Only tags ahead of the virtual time still matter when the key comes back
+        if self.tags.get(key, 0.0) <= self.virtual_time:
+            self.tags.pop(key, None)
+
+
+class Ticket:
+    __slots__ = ("tenant", "workflow", "priority", "enqueued_at", "future")
+
+    def __init__(self, tenant: str, workflow: str, priority: PriorityClass):
+        self.tenant = tenant
+        self.workflow = workflow
+        self.priority = priority
+        self.enqueued_at = time.perf_counter()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class RunScheduler:
+    """
+    Hands out execution slots to runs. Interactive runs always go before batch runs; within
+    a priority class slots are shared fairly between tenants (by weight) and, within a tenant,
+    between workflows. Tenants can be capped to a number of concurrent runs.
+    """
+    def __init__(
+        self,
+        max_concurrent_runs: Optional[int] = None,
+        tenant_max_concurrent_runs: Optional[int] = None,
+        tenant_limits: Optional[Dict[str, int]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrent_runs = max_concurrent_runs
+        self.tenant_max_concurrent_runs = tenant_max_concurrent_runs
+        self.tenant_limits = tenant_limits or {}
+        self.tenant_weights = tenant_weights or {}
+        self.running = 0
+        self.running_by_tenant: Dict[str, int] = {}
+        self.waiting: Dict[PriorityClass, Dict[str, Dict[str, Deque[Ticket]]]] = {priority: {} for priority in PriorityClass}
+        self.tenant_shares: Dict[PriorityClass, FairShare] = {priority: FairShare() for priority in PriorityClass}
+        self.workflow_shares: Dict[Tuple[PriorityClass, str], FairShare] = {}
+
+    def get_tenant_limit(self, tenant: str) -> Optional[int]:
+        return self.tenant_limits.get(tenant, self.tenant_max_concurrent_runs)
+
+    def is_tenant_eligible(self, tenant: str) -> bool:
+        limit = self.get_tenant_limit(tenant)
+        return limit is None or self.running_by_tenant.get(tenant, 0) < limit
+
+    def enqueue(self, ticket: Ticket):
+        tenants = self.waiting[ticket.priority]
+        if ticket.tenant not in tenants:
+            tenants[ticket.tenant] = {}
+            self.tenant_shares[ticket.priority].activate(ticket.tenant)
+        workflows = tenants[ticket.tenant]
+        if ticket.workflow not in workflows:
+            workflows[ticket.workflow] = deque()
+            self.workflow_shares.setdefault((ticket.priority, ticket.tenant), FairShare()).activate(ticket.workflow)
+        workflows[ticket.workflow].append(ticket)
+        scheduler_waiting.labels(ticket.priority.value).inc()
+
+    def remove(self, ticket: Ticket):
+        workflows = self.waiting[ticket.priority].get(ticket.tenant, {})
+        tickets = workflows.get(ticket.workflow)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            scheduler_waiting.labels(ticket.priority.value).dec()
+            self.drop_if_empty(ticket.priority, ticket.tenant, ticket.workflow)
+
+    def drop_if_empty(self, priority: PriorityClass, tenant: str, workflow: str):
+        tenants = self.waiting[priority]
+        if tenants[tenant][workflow]:
+            return
+        del tenants[tenant][workflow]
+        self.workflow_shares[(priority, tenant)].forget(workflow)
+        if not tenants[tenant]:
+            del tenants[tenant]
+            del self.workflow_shares[(priority, tenant)]
+            self.tenant_shares[priority].forget(tenant)
+
+    def next_ticket(self) -> Optional[Ticket]:
+        for priority in PriorityClass:
+            tenants = self.waiting[priority]
+            eligible_tenants = [tenant for tenant in tenants if self.is_tenant_eligible(tenant)]
+            if not eligible_tenants:
+                continue
+            tenant = self.tenant_shares[priority].pick(eligible_tenants)
+            workflow_share = self.workflow_shares[(priority, tenant)]
+            workflow = workflow_share.pick(tenants[tenant])
+            ticket = tenants[tenant][workflow].popleft()
+            self.tenant_shares[priority].charge(tenant, self.tenant_weights.get(tenant, 1.0))
+            workflow_share.charge(workflow, 1.0)
+            self.drop_if_empty(priority, tenant, workflow)
+            return ticket
+        return None
+
+    def dispatch(self):
+        while self.max_concurrent_runs is None or self.running < self.max_concurrent_runs:
+            ticket = self.next_ticket()
+            if ticket is None:
+                return
+            self.running += 1
+            self.running_by_tenant[ticket.tenant] = self.running_by_tenant.get(ticket.tenant, 0) + 1
+            scheduler_waiting.labels(ticket.priority.value).dec()
+            scheduler_wait_seconds.labels(ticket.priority.value).observe(time.perf_counter() - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+    def release(self, ticket: Ticket):
+        self.running -= 1
+        self.running_by_tenant[ticket.tenant] -= 1
+        if not self.running_by_tenant[ticket.tenant]:
+            del self.running_by_tenant[ticket.tenant]
+        self.dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, workflow: str, priority: PriorityClass = PriorityClass.INTERACTIVE):
+        """Wait for an execution slot and hold it for the duration of the block."""
+        ticket = Ticket(tenant, workflow, priority)
+        self.enqueue(ticket)
+        self.dispatch()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # The slot was granted while the run was being cancelled
+                self.release(ticket)
+            else:
+                self.remove(ticket)
+            raise
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.running,
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "running_by_tenant": dict(self.running_by_tenant),
+            "waiting": {
+                priority.value: sum(len(tickets) for workflows in tenants.values() for tickets in workflows.values())
+                for priority, tenants in self.waiting.items()
+            },
+        }
+
+
+def parse_tenant_values(value: str) -> Dict[str, str]:
+    """Parse `tenant_a=2,tenant_b=1` style settings."""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {tenant.strip(): setting.strip() for tenant, setting in pairs}
+
+
+# Instantiate and use them
+run_scheduler = RunScheduler(
+    max_concurrent_runs=int(os_getenv("SCHEDULER_MAX_CONCURRENT_RUNS", "0")) or None,
+    tenant_max_concurrent_runs=int(os_getenv("SCHEDULER_TENANT_MAX_CONCURRENT_RUNS", "0")) or None,
+    tenant_limits={tenant: int(limit) for tenant, limit in parse_tenant_values(os_getenv("SCHEDULER_TENANT_LIMITS", "")).items()},
+    tenant_weights={tenant: float(weight) for tenant, weight in parse_tenant_values(os_getenv("SCHEDULER_TENANT_WEIGHTS", "")).items()},
+)
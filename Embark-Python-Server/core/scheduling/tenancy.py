@@ -0,0 +1,36 @@
+import hashlib
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from models.queue_models.queue import PriorityClass
+
+TENANT_HEADER = "X-Tenant-ID"
+API_KEY_HEADER = "X-API-Key"
+PRIORITY_HEADER = "X-Priority"
+DEFAULT_TENANT = "default"
+
+
+def get_tenant(request: Request) -> str:
+    """Tenant of a request: the tenant header, else a hash of the API key, else the default tenant."""
+    tenant = request.headers.get(TENANT_HEADER)
+    if tenant:
+        return tenant
+    api_key = request.headers.get(API_KEY_HEADER)
+    if api_key:
+        # Never expose the key itself in status, metrics or logs
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return DEFAULT_TENANT
+
+
+def get_priority(request: Request, default: PriorityClass) -> PriorityClass:
+    priority: Optional[str] = request.headers.get(PRIORITY_HEADER)
+    if not priority:
+        return default
+    try:
+        return PriorityClass(priority.lower())
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {PRIORITY_HEADER} '{priority}'. Must be one of: {', '.join(p.value for p in PriorityClass)}.",
+        )
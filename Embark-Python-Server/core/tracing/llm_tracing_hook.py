@@ -0,0 +1,49 @@
+import time
+
+from core.llm.llm_call_hooks import LLMCall, LLMCallHook, LLMResponse, register_llm_call_hook
+from core.tracing.tracing import end_span, tracing
+
+
+class LLMTracingHook(LLMCallHook):
+    """Records a span with model and token attributes for every LLM call."""
+    name = "llm_tracing"
+
+    def before_call(self, call: LLMCall):
+        call.hook_state[self.name] = self._start_span(call)
+        return None
+
+    def after_call(self, call: LLMCall, response: LLMResponse):
+        # A hook registered earlier (e.g. cassette replay) may short-circuit before_call.
+        llm_span = call.hook_state.pop(self.name, None) or self._start_span(call)
+        usage = response.usage
+        llm_span.set_attributes({
+            "llm.usage.prompt_tokens": usage.prompt_tokens,
+            "llm.usage.completion_tokens": usage.completion_tokens,
+            "llm.usage.cached_tokens": usage.cached_tokens,
+            "llm.usage.total_tokens": usage.total_tokens,
+            "llm.replayed": response.native is None,
+        })
+        end_span(llm_span)
+
+    def on_error(self, call: LLMCall, error: BaseException):
+        llm_span = call.hook_state.pop(self.name, None) or self._start_span(call)
+        end_span(llm_span, error=error)
+
+    def _start_span(self, call: LLMCall):
+        # LLMCall.started_at is a perf_counter value, convert it to wall clock nanoseconds.
+        started_ns = time.time_ns() - int((time.perf_counter() - call.started_at) * 1e9)
+        return tracing.start_span(
+            "llm.call",
+            attributes={
+                "llm.framework": call.framework,
+                "llm.provider": call.provider,
+                "llm.model": call.model,
+            },
+            start_time=started_ns,
+        )
+
+
+def register_llm_tracing_hook() -> LLMTracingHook:
+    hook = LLMTracingHook()
+    register_llm_call_hook(hook)
+    return hook
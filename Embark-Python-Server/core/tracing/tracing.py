@@ -0,0 +1,173 @@
+import base64
+import threading
+from collections import deque
+from contextlib import contextmanager
+from os import getenv as os_getenv
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from google.protobuf.json_format import MessageToDict
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.trace import Span, Status, StatusCode
+
+from core.runs.run_context import get_node_id, get_run_id
+from shared import fast_json
+
+TRACER_NAME = "embark"
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Keeps the most recent finished spans in process so they can be inspected
+    without a collector.
+    """
+    def __init__(self, max_spans: int = 10000):
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock:
+            self._spans.extend(spans)
+        return SpanExportResult.SUCCESS
+
+    def get_finished_spans(self, run_id: Optional[str] = None) -> List[ReadableSpan]:
+        with self._lock:
+            spans = list(self._spans)
+        if run_id is None:
+            return spans
+        return [span for span in spans if span.attributes.get("run.id") == run_id]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def shutdown(self):
+        self.clear()
+
+
+class OTLPJsonFileSpanExporter(SpanExporter):
+    """
+    Appends every exported batch to a file as one OTLP/JSON `ExportTraceServiceRequest` per line,
+    the format accepted by the OpenTelemetry collector `otlpjsonfile` receiver.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        request = MessageToDict(encode_spans(spans))
+        # OTLP/JSON encodes trace and span ids as hex instead of the protobuf base64 default.
+        for resource_spans in request.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                for encoded_span in scope_spans.get("spans", []):
+                    for key in ("traceId", "spanId", "parentSpanId"):
+                        if key in encoded_span:
+                            encoded_span[key] = base64.b64decode(encoded_span[key]).hex()
+        line = fast_json.dumps(request)
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as trace_file:
+                trace_file.write(line + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        ...
+
+
+class Tracing:
+    """
+    Owns the tracer provider used by the server. A dedicated provider is used instead of the
+    global one so that framework telemetry (e.g. crewai) does not mix with run traces.
+    """
+    def __init__(self):
+        self.memory_exporter = InMemorySpanExporter(
+            max_spans=int(os_getenv("TRACING_MEMORY_MAX_SPANS", "10000"))
+        )
+        self.provider = self._create_provider()
+        self.tracer = self.provider.get_tracer(TRACER_NAME)
+
+    def _create_provider(self) -> TracerProvider:
+        provider = TracerProvider(resource=Resource.create({"service.name": "embark-python-server"}))
+        provider.add_span_processor(SimpleSpanProcessor(self.memory_exporter))
+        return provider
+
+    def configure(self, exporter: Optional[str] = None, file_path: Optional[str] = None):
+        """
+        Add an optional exporter next to the in-process one. Arguments default to the
+        TRACING_EXPORTER (none | console | otlp_file) and TRACING_FILE_PATH environment variables.
+        """
+        exporter = (exporter or os_getenv("TRACING_EXPORTER", "none")).lower()
+        match exporter:
+            case "none":
+                return
+            case "console":
+                self.provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+            case "otlp_file":
+                path = file_path or os_getenv("TRACING_FILE_PATH", "traces.jsonl")
+                self.provider.add_span_processor(BatchSpanProcessor(OTLPJsonFileSpanExporter(path)))
+            case _:
+                raise ValueError(f"Unsupported tracing exporter: {exporter}")
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, start_time: Optional[int] = None) -> Span:
+        """Start a span that the caller ends explicitly."""
+        return self.tracer.start_span(name, attributes=get_span_attributes(attributes), start_time=start_time)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Start a span as the current span for the duration of the block."""
+        with self.tracer.start_as_current_span(name, attributes=get_span_attributes(attributes)) as current_span:
+            yield current_span
+
+
+def get_span_attributes(attributes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Drop empty values and attach the run and node ids of the current context."""
+    span_attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+    run_id = get_run_id()
+    if run_id is not None:
+        span_attributes.setdefault("run.id", run_id)
+    node_id = get_node_id()
+    if node_id is not None:
+        span_attributes.setdefault("node.id", node_id)
+    return span_attributes
+
+
+def span_to_dict(finished_span: ReadableSpan) -> Dict[str, Any]:
+    parent = finished_span.parent
+    return {
+        "name": finished_span.name,
+        "trace_id": format(finished_span.context.trace_id, "032x"),
+        "span_id": format(finished_span.context.span_id, "016x"),
+        "parent_span_id": format(parent.span_id, "016x") if parent else None,
+        "start_time_unix_nano": finished_span.start_time,
+        "duration_ms": (finished_span.end_time - finished_span.start_time) / 1e6,
+        "status": finished_span.status.status_code.name,
+        "attributes": dict(finished_span.attributes or {}),
+    }
+
+
+def end_span(span: Span, error: Optional[BaseException] = None, end_time: Optional[int] = None):
+    if error is not None:
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error)))
+    span.end(end_time=end_time)
+
+
+# Instantiate and use them
+tracing = Tracing()
+span = tracing.span
+
+
+def configure_tracing(exporter: Optional[str] = None, file_path: Optional[str] = None) -> Tracing:
+    from core.tracing.llm_tracing_hook import register_llm_tracing_hook
+
+    tracing.configure(exporter=exporter, file_path=file_path)
+    register_llm_tracing_hook()
+    return tracing
@@ -1,17 +1,56 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from api.workflow_router import router as workflow_router
 from fastapi.middleware.cors import CORSMiddleware
 from api.execution_status_router import execution_status_router
+from api.queue_router import queue_router
+from api.health_router import health_router
 from uvicorn import run as uvicorn_run
 from os import getenv as os_getenv, environ as os_environ
 from dotenv import load_dotenv
+from core.llm.cassette.llm_cassette import configure_llm_cassette
+from core.tracing.tracing import configure_tracing
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from core.metrics.event_loop_monitor import event_loop_lag_monitor
+from core.metrics.llm_metrics_hook import register_llm_metrics_hook
+from core.metrics.metrics import metrics_registry
+from core.runs.token_accounting_hook import register_token_accounting_hook
+from core.runs.run_cancellation_hook import register_run_cancellation_hook
+from models.process_models.process import ExecutionMode
+from services.process_pool.process_pool import EXECUTION_MODE, framework_process_pool
+from shared.fast_json import FastJSONResponse
 load_dotenv()
 
-app = FastAPI()
+# Refuse LLM calls of cancelled runs, before any other hook (e.g. replay) can answer them
+register_run_cancellation_hook()
+# Record or replay LLM calls when LLM_CASSETTE_MODE is set
+configure_llm_cassette()
+# Trace runs in process and optionally export them (TRACING_EXPORTER)
+tracing = configure_tracing()
+register_llm_metrics_hook()
+# Count tokens per run and node and enforce token budgets
+register_token_accounting_hook()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    event_loop_lag_monitor.start()
+    if EXECUTION_MODE == ExecutionMode.PROCESS:
+        # Pre-warm the framework worker processes before taking requests
+        await framework_process_pool.start()
+    yield
+    await framework_process_pool.stop()
+    await event_loop_lag_monitor.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Add the router with the default prefix 'workflow'
 app.include_router(workflow_router, prefix="/execute")
 app.include_router(execution_status_router, prefix="/status")
+app.include_router(queue_router, prefix="/queue")
+app.include_router(health_router, prefix="/health")
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +58,12 @@ app.add_middleware(
     allow_credentials=True,  # Allow cookies, authorization headers, etc.
     allow_methods=["*"],     # Allow all HTTP methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],     # Allow all headers
+    expose_headers=["X-Run-ID", "Retry-After"],
+)
+
+# Root span of every run, the run and node spans are nested under it
+FastAPIInstrumentor.instrument_app(
+    app, tracer_provider=tracing.provider, excluded_urls="/metrics,/health", exclude_spans=["receive", "send"]
 )
 
 # Optionally, add a root path for health check or landing info
@@ -27,10 +72,18 @@ async def home():
     return {"message": "API is up and running"}
 
 
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     # SETUP THE ENV VARIABLES FOR LLM EXECUTION
     gemini_key = os_getenv("GEMINI_API_KEY")
     os_environ["GEMINI_API_KEY"] = gemini_key
     os_environ["GOOGLE_API_KEY"] = gemini_key
 
-    uvicorn_run(app, port=8000)
\ No newline at end of file
+    # More than one worker needs a shared STATE_BACKEND (sqlite or redis) for consistent status
+    workers = int(os_getenv("UVICORN_WORKERS", "1"))
+    uvicorn_run("main:app" if workers > 1 else app, port=8000, workers=workers)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import List, Optional
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 
-from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig
+from models.workflow_models.custom_workflow import ContextShapingConfig, CustomWorkflowAgentConfig, SpeculationConfig
 from models.workflow_models.workflow import Workflow
 
 """
@@ -172,6 +172,9 @@ class CustomWorkflowConfig(BaseModel):
     workflows: List[CustomWorkflowAgentConfig]
     task: str = ""
     share_task_among_agents: bool = True
+    token_budget: Optional[int] = Field(None, gt=0) # Maximum tokens the whole run may use before it is stopped.
+    context_shaping: Optional[ContextShapingConfig] = None # Default context shaping for nodes without their own.
+    speculation: Optional[SpeculationConfig] = None # Speculate on the likely child of router nodes, off by default.
 
     @model_validator(mode="after")
     def validate_workflow(self):
@@ -0,0 +1,32 @@
+from typing import Optional
+from pydantic import BaseModel
+from enum import Enum
+
+from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig
+from models.workflow_models.workflow import Workflow
+
+class ExecutionMode(str, Enum):
+    INLINE = "inline"    # Frameworks run on the event loop of the API or queue worker process
+    PROCESS = "process"  # Frameworks run in a pool of pre-warmed worker processes
+
+class JobEvent(str, Enum):
+    READY = "ready"      # The worker process imported the frameworks and waits for jobs
+    USAGE = "usage"      # Token usage of one LLM call
+    PARTIAL = "partial"  # Fields of a structured response completed so far
+    RESULT = "result"
+    ERROR = "error"
+
+class WorkflowJob(BaseModel):
+    run_id: str
+    workflow: Workflow
+    task: str
+    run_budget: Optional[int] = None
+
+class CustomNodeJob(BaseModel):
+    run_id: str
+    node_config: CustomWorkflowAgentConfig
+    task_message: str
+    stream_partial: bool = False
+    # What is left of the run and node budgets when the node starts
+    run_budget: Optional[int] = None
+    node_budget: Optional[int] = None
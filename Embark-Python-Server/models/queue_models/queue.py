@@ -0,0 +1,33 @@
+from typing import Any, Optional
+from pydantic import BaseModel
+from enum import Enum
+
+class PriorityClass(str, Enum):
+    INTERACTIVE = "interactive"  # Always scheduled before batch runs
+    BATCH = "batch"              # Uses the capacity interactive runs leave free
+
+class JobKind(str, Enum):
+    WORKFLOW = "workflow"
+    CUSTOM_WORKFLOW = "custom_workflow"
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    DEAD = "dead"
+
+class Job(BaseModel):
+    id: str
+    run_id: str
+    kind: JobKind
+    payload: Any
+    timeout_seconds: Optional[float] = None
+    tenant: str = "default"
+    priority: PriorityClass = PriorityClass.BATCH
+    state: JobState = JobState.QUEUED
+    attempts: int = 0
+    max_attempts: int = 3
+    leased_by: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    last_error: Optional[str] = None
+    created_at: float
@@ -0,0 +1,26 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel
+from enum import Enum
+
+class ResultView(str, Enum):
+    FINAL = "final"  # The final answer only
+    FULL = "full"    # Every message or node output of the run
+
+class ResultCodec(str, Enum):
+    ZSTD = "zstd"
+    GZIP = "gzip"
+
+class RunOutput(BaseModel):
+    """What a framework run produced: its final answer and the transcript that led to it."""
+    final: Any = None
+    transcript: List[Any] = []
+
+class ResultReference(BaseModel):
+    run_id: str
+    url: str
+    codec: ResultCodec
+    # Uncompressed sizes of the final and full views, in bytes
+    final_bytes: int
+    full_bytes: int
+    stored_bytes: int
+    created_at: Optional[float] = None
@@ -1,4 +1,4 @@
-
+from typing import List, Optional
 from pydantic import BaseModel
 from enum import Enum
 
@@ -7,7 +7,40 @@ class WorkflowStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    BUDGET_EXCEEDED = "budget_exceeded"
+    CANCELLED = "cancelled"
+
+class TokenUsage(BaseModel):
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+    llm_calls: int = 0
 
 class WorkflowItem(BaseModel):
     name: str
-    status: WorkflowStatus
\ No newline at end of file
+    status: WorkflowStatus
+    token_usage: Optional[TokenUsage] = None
+    detail: Optional[str] = None
+    # Set by the status store
+    run_id: Optional[str] = None
+    created_at: Optional[float] = None
+    updated_at: Optional[float] = None
+    version: Optional[int] = None
+
+class StatusQuery(BaseModel):
+    run_id: Optional[str] = None
+    name: Optional[str] = None
+    status: Optional[List[WorkflowStatus]] = None
+    updated_after: Optional[float] = None
+    updated_before: Optional[float] = None
+    # Only items changed after this version, oldest change first
+    since_version: Optional[int] = None
+    cursor: Optional[int] = None
+    limit: int = 100
+
+class StatusPage(BaseModel):
+    items: List[WorkflowItem]
+    # Version of the whole status list when the page was read
+    version: int
+    next_cursor: Optional[int] = None
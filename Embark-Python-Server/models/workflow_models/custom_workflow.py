@@ -1,5 +1,6 @@
+from enum import Enum
 from typing import List, Optional, Union, Any
-from pydantic import BaseModel, model_validator, ValidationError
+from pydantic import BaseModel, Field, model_validator, ValidationError
 from models.workflow_models.workflow import Agent, AgentFrameworks
 from shared.constants import VALID_TYPES
 
@@ -103,6 +104,41 @@ Example:
 """
 
 
+class ContextFormat(str, Enum):
+    JSON = "json"                   # json.dumps with default separators
+    COMPACT_JSON = "compact_json"   # minified JSON without ASCII escaping
+    LINES = "lines"                 # one "path: value" line per leaf value
+
+
+class ContextShapingConfig(BaseModel):
+    """
+    Controls how a parent result is turned into the input of a child node.
+    `input_keys_required_from_parent` selects the keys and accepts nested paths such as
+    "customer.address.city", "items.0.name" or "items.*.name".
+    """
+    field_max_chars: Optional[int] = Field(None, gt=0) # Longer strings are truncated with a marker.
+    field_max_items: Optional[int] = Field(None, gt=0) # Longer lists are truncated with a marker.
+    format: ContextFormat = ContextFormat.JSON
+    max_tokens: Optional[int] = Field(None, gt=0) # Estimated token ceiling of the whole child input.
+
+
+class SpeculationMode(str, Enum):
+    PREPARE = "prepare"     # build the likely child's agent while its parent runs
+    EXECUTE = "execute"     # also execute it as soon as its input is in the parent's partial output
+
+
+class SpeculationConfig(BaseModel):
+    """
+    Opt-in speculation on the likely child of a router node, learned from how past runs of the
+    same workflow were routed. A speculative execution is kept when the parent routes to that
+    child with the same input and cancelled otherwise.
+    """
+    mode: SpeculationMode = SpeculationMode.PREPARE
+    min_probability: float = Field(0.8, gt=0, le=1) # Share of past routings a child needs to be speculated on.
+    min_samples: int = Field(20, ge=1) # Past routings of the parent needed before speculating.
+    max_wasted_tokens: Optional[int] = Field(None, gt=0) # Stop speculative executions in a run once mispredictions used this many tokens.
+
+
 class CustomWorkflowAgentConfig(BaseModel):
     agent_config: Agent
     agent_execution_framework: AgentFrameworks
@@ -111,6 +147,8 @@ class CustomWorkflowAgentConfig(BaseModel):
     child_agent_names: List[str] = list()
     parent_agent_names: List[str] = list()
     agent_node_invoke_condition: dict[str, Any] = dict() # If it is the child node when should it be triggered.
+    token_budget: Optional[int] = Field(None, gt=0) # Maximum tokens this node may use before the run is stopped.
+    context_shaping: Optional[ContextShapingConfig] = None # How the parent result is passed to this node, defaults to the workflow setting.
     input_keys_required_from_parent: List[str] = list() # If it is the child node provide keys for which the value is required requires. (context provider) (does not throw error if key not present) (if same key in loop through and input_keys_required_from_parent then provides the individual value present in the iterable)
 
     @model_validator(mode="after")
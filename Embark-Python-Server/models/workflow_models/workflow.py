@@ -2,12 +2,29 @@ from enum import Enum
 from typing import List, Optional, Union
 from pydantic import BaseModel, Field, model_validator
 
+class CascadeAcceptance(str, Enum):
+    SCHEMA = "schema"          # The answer validates against the response model
+    CONFIDENCE = "confidence"  # The answer reports a confidence of at least `min_confidence`
+    VERIFIER = "verifier"      # The configured model of the LLM approves the answer
+
+class CascadeModel(BaseModel):
+    model: str = Field(..., json_schema_extra={"description": "Name of the language model"})
+    provider: str = Field(..., json_schema_extra={"description": "Provider of the LLM, e.g., OpenAI, Anthropic"})
+
+class ModelCascade(BaseModel):
+    models: List[CascadeModel] = Field(..., min_length=1, json_schema_extra={"description": "Cheaper models tried in order before the configured model"})
+    acceptance: CascadeAcceptance = Field(CascadeAcceptance.SCHEMA, json_schema_extra={"description": "Check an answer must pass to stop the cascade"})
+    confidence_field: str = Field("confidence", json_schema_extra={"description": "Field of the answer holding the self-reported confidence, from 0 to 1"})
+    min_confidence: float = Field(0.7, ge=0.0, le=1.0, json_schema_extra={"description": "Lowest confidence accepted"})
+    verifier_instructions: Optional[str] = Field(None, json_schema_extra={"description": "Additional instructions for the verifier"})
+
 class LLM(BaseModel):
     model: str = Field(..., json_schema_extra={"description": "Name of the language model"})
     provider: str = Field(..., json_schema_extra={"description": "Provider of the LLM, e.g., OpenAI, Anthropic"})
     top_probability: float = Field(..., ge=0.0, le=1.0, json_schema_extra={"description": "Top probability sampling value"})
     temperature: float = Field(..., ge=0.0, le=1.0, json_schema_extra={"description": "Sampling temperature"})
     max_tokens: int = Field(..., gt=0, json_schema_extra={"description": "Maximum number of tokens to generate"})
+    cascade: Optional[ModelCascade] = Field(None, json_schema_extra={"description": "Answer with cheaper models first, escalating to the configured model when an answer is rejected"})
 
 class Stdio(BaseModel):
     command: str = Field(..., json_schema_extra={"description": "Shell or script command to execute"})
@@ -20,6 +37,7 @@ class Sse(BaseModel):
 class Tool(BaseModel):
     name: str = Field(..., json_schema_extra={"description": "Name of the tool"})
     connection: Union[Stdio, Sse] = Field(..., json_schema_extra={"description": "Tool connection method"})
+    cache_ttl_seconds: Optional[float] = Field(None, gt=0, json_schema_extra={"description": "Cache results of this read-only tool for this many seconds, per arguments"})
 
 class AgentFrameworks(str, Enum):
     AUTOGEN = "autogen"
@@ -37,6 +55,23 @@ class ExecutionTypeCrewAI(str, Enum):
 class ExecutionTypeLanggraph(str, Enum):
     SUPERVISOR = "supervisor"
     
+class TerminationMode(str, Enum):
+    ANY = "any"  # Stop as soon as one condition is met
+    ALL = "all"  # Stop once every condition is met
+
+class AutogenTermination(BaseModel):
+    text_mention: Optional[str] = Field("TERMINATE", json_schema_extra={"description": "Stop when a message mentions this text"})
+    max_messages: Optional[int] = Field(None, gt=0, json_schema_extra={"description": "Stop after this many messages"})
+    timeout_seconds: Optional[float] = Field(None, gt=0, json_schema_extra={"description": "Stop after this many seconds of wall clock time"})
+    max_total_tokens: Optional[int] = Field(None, gt=0, json_schema_extra={"description": "Stop once the team used this many tokens"})
+    mode: TerminationMode = Field(TerminationMode.ANY, json_schema_extra={"description": "How the configured conditions are combined"})
+
+    @model_validator(mode='after')
+    def validate_conditions(self):
+        if not any([self.text_mention, self.max_messages, self.timeout_seconds, self.max_total_tokens]):
+            raise ValueError("At least one termination condition must be configured.")
+        return self
+
 class Agent(BaseModel):
     name: str = Field(..., json_schema_extra={"description": "Name of the agent"})
     goal: str = Field(..., json_schema_extra={"description": "Primary goal of the agent"})
@@ -55,6 +90,8 @@ class Workflow(BaseModel):
     execution_type: str = Field(None, json_schema_extra={"description": "Execution strategy depending on the framework"})
     reflection_additional_instruction: Optional[str]
     reflection_llm_config: LLM
+    token_budget: Optional[int] = Field(None, gt=0, json_schema_extra={"description": "Maximum tokens the workflow run may use before it is stopped"})
+    termination: AutogenTermination = Field(default_factory=AutogenTermination, json_schema_extra={"description": "When an autogen team run stops"})
 
     @model_validator(mode='after')
     def validate_execution_type(self):
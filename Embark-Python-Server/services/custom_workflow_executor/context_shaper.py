@@ -0,0 +1,136 @@
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.workflow_models.custom_workflow import ContextFormat, ContextShapingConfig
+from shared import fast_json
+
+# Rough token estimate shared by every provider; good enough to enforce a ceiling.
+CHARS_PER_TOKEN = 4
+MIN_FIELD_CHARS = 16
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_path_value(data: Any, parts: List[str]) -> Tuple[bool, Any]:
+    """Resolve a split key path. `*` selects the value from every item of a list."""
+    if not parts:
+        return True, data
+    head, rest = parts[0], parts[1:]
+    if isinstance(data, dict):
+        if head not in data:
+            return False, None
+        return get_path_value(data[head], rest)
+    if isinstance(data, list):
+        if head == "*":
+            values = [value for found, value in (get_path_value(item, rest) for item in data) if found]
+            return bool(values), values
+        if head.isdigit() and int(head) < len(data):
+            return get_path_value(data[int(head)], rest)
+    return False, None
+
+
+def project_keys(result: dict, input_keys: List[str]) -> Dict[str, Any]:
+    """
+    Select the requested keys from a parent result. Top level keys keep their name and nested
+    paths are returned under the dotted path. Missing keys are skipped.
+    """
+    projected = dict()
+    for key in input_keys:
+        if key in result:
+            projected[key] = result[key]
+            continue
+        found, value = get_path_value(result, key.split("."))
+        if found:
+            projected[key] = value
+    return projected
+
+
+def cap_field_sizes(data: Any, max_chars: Optional[int], max_items: Optional[int]) -> Any:
+    """Truncate long strings and lists, leaving a marker with the amount removed."""
+    if isinstance(data, dict):
+        return {key: cap_field_sizes(value, max_chars, max_items) for key, value in data.items()}
+    if isinstance(data, list):
+        items = [cap_field_sizes(item, max_chars, max_items) for item in data[:max_items]]
+        if max_items is not None and len(data) > max_items:
+            items.append(f"...[{len(data) - max_items} more items truncated]")
+        return items
+    if isinstance(data, str) and max_chars is not None and len(data) > max_chars:
+        return f"{data[:max_chars]}...[{len(data) - max_chars} chars truncated]"
+    return data
+
+
+def flatten(data: Any, prefix: str = "") -> List[Tuple[str, Any]]:
+    if isinstance(data, dict) and data:
+        pairs = []
+        for key, value in data.items():
+            pairs.extend(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+        return pairs
+    return [(prefix, data)]
+
+
+def serialize_context(data: Any, context_format: ContextFormat) -> str:
+    match context_format:
+        case ContextFormat.COMPACT_JSON:
+            return fast_json.dumps(data)
+        case ContextFormat.LINES:
+            return "\n".join(
+                f"{path}: {value if isinstance(value, str) else fast_json.dumps(value)}"
+                for path, value in flatten(data)
+            )
+        case _:
+            # Kept on the stdlib encoder, its output is the prompt recorded cassettes were made with
+            return json.dumps(data)
+
+
+def get_longest_string(data: Any) -> int:
+    if isinstance(data, dict):
+        return max((get_longest_string(value) for value in data.values()), default=0)
+    if isinstance(data, list):
+        return max((get_longest_string(item) for item in data), default=0)
+    return len(data) if isinstance(data, str) else 0
+
+
+def fit_to_token_ceiling(prefix: str, context: Any, config: ContextShapingConfig) -> str:
+    """
+    Shrink the context until prefix and context fit in `config.max_tokens`: string fields are
+    cut down first, then the whole input is truncated.
+    """
+    text = prefix + serialize_context(context, config.format)
+    max_chars = get_longest_string(context)
+    while estimate_tokens(text) > config.max_tokens and max_chars > MIN_FIELD_CHARS:
+        max_chars = max(MIN_FIELD_CHARS, max_chars // 2)
+        text = prefix + serialize_context(cap_field_sizes(context, max_chars, None), config.format)
+
+    char_limit = config.max_tokens * CHARS_PER_TOKEN
+    if len(text) > char_limit:
+        marker = f"...[{len(text) - char_limit} chars truncated]"
+        text = text[:max(0, char_limit - len(marker))] + marker
+    return text
+
+
+def build_child_input(
+    task: str,
+    result: dict,
+    input_keys: List[str],
+    share_task_among_agents: bool,
+    config: Optional[ContextShapingConfig] = None,
+) -> str:
+    """Build the input message of a child node from the result of its parent."""
+    # If the required input fields are not present the whole result is passed on.
+    context = (project_keys(result, input_keys) if input_keys else None) or result
+
+    if share_task_among_agents:
+        prefix = f"**Task**:\n{task}\n\n**Task Context:**\n"
+    else:
+        prefix = "**Task Context:**\n"
+
+    if config is None:
+        return prefix + json.dumps(context)
+
+    context = cap_field_sizes(context, config.field_max_chars, config.field_max_items)
+    if config.max_tokens is not None:
+        return fit_to_token_ceiling(prefix, context, config)
+    return prefix + serialize_context(context, config.format)
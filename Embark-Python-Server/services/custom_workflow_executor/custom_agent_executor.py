@@ -1,8 +1,40 @@
 from abc import ABC
-from typing import Any
+from typing import Any, Callable, Dict, Optional
+
+from core.llm.model_cascade import get_cascade_llms, run_model_cascade
+from models.workflow_models.workflow import LLM, Agent
+
+# Called with the fields of the structured response that are complete so far
+PartialResultCallback = Callable[[Dict[str, Any]], None]
+
+
+def get_stage_agent(agent: Agent, stage_llm: LLM) -> Agent:
+    """The agent answering with one model of its cascade."""
+    return agent if stage_llm is agent.llm else agent.model_copy(update={"llm": stage_llm})
+
+
+def get_first_stage_agent(agent: Agent) -> Agent:
+    """The agent answering first, the one worth preparing ahead."""
+    return get_stage_agent(agent, get_cascade_llms(agent.llm)[0])
 
-from models.workflow_models.workflow import Agent
 
 class CustomAgentExecutor(ABC):
-    async def execute(agent: Agent, response_format: Any, task_message: str):
-        ...
\ No newline at end of file
+    async def execute(agent: Agent, response_format: Any, task_message: str, on_partial: Optional[PartialResultCallback] = None):
+        ...
+
+    async def prepare(self, agent: Agent, response_format: Any):
+        """Build the agent ahead of its execution, so that it is cached when the node starts."""
+
+    async def execute_with_cascade(self, agent: Agent, response_format: Any, task_message: str, on_partial: Optional[PartialResultCallback] = None):
+        """Execute with the model cascade of the agent LLM, each model answering as a copy of the agent."""
+        return await run_model_cascade(
+            llm=agent.llm,
+            task=task_message,
+            attempt=lambda stage_llm: self.execute(
+                agent=get_stage_agent(agent, stage_llm),
+                response_format=response_format,
+                task_message=task_message,
+                on_partial=on_partial,
+            ),
+            response_format=response_format,
+        )
@@ -1,12 +1,13 @@
 
 import json
-from typing import Any
+from typing import Any, Optional
 from core.exception.workflow_execution_exception import InvalidJsonResponse
-from shared.crewai.crewai_agent import CrewAIAgent
-from services.custom_workflow_executor.custom_agent_executor import CustomAgentExecutor
+from shared.crewai.crewai_agent import CrewAIAgent, stop_mcp_adapter
+from services.custom_workflow_executor.custom_agent_executor import CustomAgentExecutor, PartialResultCallback
 from models.workflow_models.workflow import Agent
 from crewai import Crew
 from crewai_tools import MCPServerAdapter
+from shared.blocking_calls import blocking_io_pool, crew_kickoff_pool
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,17 +24,24 @@ class CrewAIExecutor(CustomAgentExecutor):
     def __init__(self):
         self.crew_ai_instance = CrewAIAgent(adapter)
 
-    def close_mcp_connection(self):
+    async def close_mcp_connection(self):
         if adapter:
-            adapter.stop()
+            await blocking_io_pool.run("mcp.adapter_stop", stop_mcp_adapter, adapter)
         
-    async def execute(self, agent: Agent, response_format: Any, task_message: str):
+    async def prepare(self, agent: Agent, response_format: Any):
+        # Tools are bound per run, only the agent template can be built ahead
+        self.crew_ai_instance.get_agent_template(agent)
+
+    # The pydantic output is converted from the final answer, CrewAI never reports it partially
+    async def execute(self, agent: Agent, response_format: Any, task_message: str, on_partial: Optional[PartialResultCallback] = None):
         crew_ai_agent = await self.crew_ai_instance.register_agent(agent)
 
-        agent_responsibility_with_input = f"{agent.agent_responsibility}\n\n**Input/Additional Context:**\n{task_message}"
-        agent.agent_responsibility = agent_responsibility_with_input
+        # The input goes into a copy, the agent config is shared by every run of the node and keys the agent cache
+        task_agent = agent.model_copy(update={
+            "agent_responsibility": f"{agent.agent_responsibility}\n\n**Input/Additional Context:**\n{task_message}"
+        })
         crew_ai_task = await self.crew_ai_instance.register_task(
-            agent,
+            task_agent,
             crew_ai_agent,
             response_format
         )
@@ -42,7 +50,8 @@ class CrewAIExecutor(CustomAgentExecutor):
             tasks=[crew_ai_task],
         )
 
-        result = await crew.kickoff_async()
+        # Tools called by the crew run synchronously on the same thread
+        result = await crew_kickoff_pool.run("crew.kickoff", crew.kickoff)
 
         if result.pydantic is None:
             raise InvalidJsonResponse()
@@ -1,14 +1,20 @@
-
-from typing import Any
+from typing import Any, Optional
 from shared.langgraph.langgraph_agent import LangGraphAgent
-from services.custom_workflow_executor.custom_agent_executor import CustomAgentExecutor
+from shared.partial_json import PartialJsonObject
+from services.custom_workflow_executor.custom_agent_executor import CustomAgentExecutor, PartialResultCallback
 from models.workflow_models.workflow import Agent
 
+# Graph node of create_react_agent producing the structured response
+STRUCTURED_RESPONSE_NODE = "generate_structured_response"
+
 class LangGraphExecutor(CustomAgentExecutor):
     def __init__(self):
         self.lang_graph_agent_instance = LangGraphAgent()
-    
-    async def execute(self, agent: Agent, response_format: Any, task_message: str):
+
+    async def prepare(self, agent: Agent, response_format: Any):
+        await self.lang_graph_agent_instance.register_agent(agent=agent, response_format=response_format)
+
+    async def execute(self, agent: Agent, response_format: Any, task_message: str, on_partial: Optional[PartialResultCallback] = None):
         lang_graph_agent = await self.lang_graph_agent_instance.register_agent(
             agent=agent,
             response_format=response_format
@@ -17,9 +23,31 @@ class LangGraphExecutor(CustomAgentExecutor):
         message = {
             "message": task_message
         }
-        
-        result = await lang_graph_agent.ainvoke(
-            input=message
-        )
 
-        return result["structured_response"]
+        if on_partial is None:
+            result = await lang_graph_agent.ainvoke(
+                input=message
+            )
+        else:
+            result = await self.stream_structured_response(lang_graph_agent, message, on_partial)
+
+        return result["structured_response"].model_dump()
+
+    async def stream_structured_response(self, lang_graph_agent, message: dict, on_partial: PartialResultCallback) -> dict:
+        """Run the graph, reporting the structured response fields as they are generated."""
+        partial_response = PartialJsonObject()
+        result = None
+        async for mode, payload in lang_graph_agent.astream(input=message, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+                continue
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") != STRUCTURED_RESPONSE_NODE:
+                continue
+            # Tool calling providers stream the arguments, JSON mode providers the content
+            text = "".join(tool_call_chunk.get("args") or "" for tool_call_chunk in getattr(chunk, "tool_call_chunks", []))
+            if not text and isinstance(chunk.content, str):
+                text = chunk.content
+            if text and partial_response.feed(text):
+                on_partial(partial_response.fields)
+        return result
@@ -0,0 +1,54 @@
+from typing import Any, Optional
+from core.llm.llm_call_hooks import LLMUsage
+from core.runs.run_context import get_run_id
+from core.runs.token_accounting import RunTokenAccount, get_token_account
+from models.process_models.process import CustomNodeJob, JobEvent
+from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig
+from models.workflow_models.workflow import Agent
+from services.custom_workflow_executor.custom_agent_executor import CustomAgentExecutor, PartialResultCallback
+from services.process_pool.process_pool import framework_process_pool
+
+
+def get_remaining_budget(budget: Optional[int], used_tokens: int) -> Optional[int]:
+    return None if budget is None else max(budget - used_tokens, 0)
+
+
+class ProcessNodeExecutor(CustomAgentExecutor):
+    """Executes a custom workflow node in a framework worker process (EXECUTION_MODE=process)."""
+    def __init__(self, workflow_node_config: CustomWorkflowAgentConfig):
+        self.workflow_node_config = workflow_node_config
+
+    async def prepare(self, agent: Agent, response_format: Any):
+        # The worker that will run the node is not known yet, agents are cached per worker
+        return None
+
+    async def execute(self, agent: Agent, response_format: Any, task_message: str, on_partial: Optional[PartialResultCallback] = None):
+        node_name = self.workflow_node_config.agent_config.name
+        token_account: Optional[RunTokenAccount] = get_token_account()
+
+        def on_event(event: JobEvent, *values):
+            if event == JobEvent.USAGE and token_account is not None:
+                token_account.add(LLMUsage.from_dict(values[0]), node=values[1] or node_name)
+            elif event == JobEvent.PARTIAL and on_partial is not None:
+                on_partial(values[0])
+
+        job = CustomNodeJob(
+            run_id=get_run_id() or "",
+            node_config=self.workflow_node_config,
+            task_message=task_message,
+            stream_partial=on_partial is not None,
+        )
+        if token_account is not None:
+            job.run_budget = get_remaining_budget(token_account.run_budget, token_account.total.total_tokens)
+            job.node_budget = get_remaining_budget(
+                token_account.node_budgets.get(node_name), token_account.get_node_usage(node_name).total_tokens
+            )
+        return await framework_process_pool.execute(job, on_event)
+
+    async def execute_with_cascade(self, agent: Agent, response_format: Any, task_message: str, on_partial: Optional[PartialResultCallback] = None):
+        # The worker runs the cascade of the node
+        return await self.execute(agent, response_format, task_message, on_partial)
+
+    async def close_mcp_connection(self):
+        # MCP connections belong to the worker processes
+        return None
@@ -1,21 +1,69 @@
 
 # create a graph.
 
-import json
-from typing import List
+import asyncio
+from typing import List, Optional
 from fastapi import HTTPException
 from services.custom_workflow_executor.custom_workflow_implementation.autogen_executor import AutogenExecutor
 from services.custom_workflow_executor.custom_workflow_implementation.crewai_executor import CrewAIExecutor
 from services.custom_workflow_executor.custom_workflow_implementation.langgraph_executor import LangGraphExecutor
+from services.custom_workflow_executor.custom_workflow_implementation.process_executor import ProcessNodeExecutor
+from services.custom_workflow_executor.custom_agent_executor import CustomAgentExecutor, get_first_stage_agent
+from services.process_pool.process_pool import EXECUTION_MODE
+from models.process_models.process import ExecutionMode
 from shared.pydantic_model_creator import build_pydantic_model_from_dict
-from core.exception.workflow_execution_exception import CyclicWorkflowException, EntryPointNotFoundException
-from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig
-from core.datastore.datastore import custom_workflow_status
+from core.exception.workflow_execution_exception import CyclicWorkflowException, EntryPointNotFoundException, RunCancelledException
+from models.workflow_models.custom_workflow import ContextShapingConfig, CustomWorkflowAgentConfig, SpeculationConfig, SpeculationMode
+from services.custom_workflow_executor.context_shaper import build_child_input
+from services.custom_workflow_executor.early_routing import EARLY_ROUTING_ENABLED, EarlyRouter, discard_task
+from services.custom_workflow_executor.speculation import NodeRun
+from core.datastore.routing_stats import get_workflow_key, routing_stats
+from core.datastore.datastore import custom_workflow_status, run_state_call
 from models.status_models.status import WorkflowItem, WorkflowStatus
+from core.metrics.server_metrics import speculation_wasted_tokens_total, speculations_total, track_node
+from core.runs.run_cancellation import get_cancel_reason
+from core.runs.run_context import node_scope
+from core.runs.token_accounting import get_token_account, token_account_scope
+from core.tracing.tracing import tracing
+
+def get_custom_agent_executor(framework: str) -> CustomAgentExecutor:
+    try:
+        match framework.lower():
+            case "autogen":
+                return AutogenExecutor()
+            case "langgraph":
+                return LangGraphExecutor()
+            case "crewai":
+                return CrewAIExecutor()
+            case _:
+                raise HTTPException(status_code=400, detail=f"Unsupported framework: {framework}")
+    except Exception as e:
+        # Log exception or handle specifically
+        raise HTTPException(status_code=500, detail=f"Execution failed: {str(e)}")
+
+
+def get_response_format(workflow_node_config: CustomWorkflowAgentConfig):
+    return build_pydantic_model_from_dict(
+        name=workflow_node_config.agent_config.name,
+        data=workflow_node_config.structured_response_format
+    )
+
 
 class CustomWorkflowManager():
-    def __init__(self, custom_workflows: List[CustomWorkflowAgentConfig]):
+    def __init__(
+        self,
+        custom_workflows: List[CustomWorkflowAgentConfig],
+        context_shaping: Optional[ContextShapingConfig] = None,
+        early_routing: bool = EARLY_ROUTING_ENABLED,
+        speculation: Optional[SpeculationConfig] = None,
+        execution_mode: ExecutionMode = EXECUTION_MODE,
+    ):
         self.agent_config_map = dict()
+        self.context_shaping = context_shaping
+        self.early_routing = early_routing
+        self.speculation = speculation
+        self.execution_mode = execution_mode
+        self.workflow_key = get_workflow_key(custom_workflows)
         self.start_node = ""
         self.node_count = len(custom_workflows)
 
@@ -48,19 +96,12 @@ class CustomWorkflowManager():
         return self.is_cyclic_util(start_node, visited, rec_stack)
     
     def get_agent_execution_framework(self, framework: str):
-        try:
-            match framework.lower():
-                case "autogen":
-                    return AutogenExecutor()
-                case "langgraph":
-                    return LangGraphExecutor()
-                case "crewai":
-                    return CrewAIExecutor()
-                case _:
-                    raise HTTPException(status_code=400, detail=f"Unsupported framework: {framework}")
-        except Exception as e:
-            # Log exception or handle specifically
-            raise HTTPException(status_code=500, detail=f"Execution failed: {str(e)}")
+        return get_custom_agent_executor(framework)
+
+    def get_node_executor(self, workflow_node_config: CustomWorkflowAgentConfig) -> CustomAgentExecutor:
+        if self.execution_mode == ExecutionMode.PROCESS:
+            return ProcessNodeExecutor(workflow_node_config)
+        return self.get_agent_execution_framework(workflow_node_config.agent_execution_framework)
     
     # If the there are no matching request form the child the first child will be triggered.
     def get_valid_child_name(self, result: dict, child_agent_names: list[str]):
@@ -84,7 +125,146 @@ class CustomWorkflowManager():
         child_workflow:CustomWorkflowAgentConfig = self.agent_config_map[child_agent_names[0]]
         return child_workflow.agent_config.name, child_workflow.input_keys_required_from_parent
 
+    def get_response_format(self, workflow_node_config: CustomWorkflowAgentConfig):
+        return get_response_format(workflow_node_config)
+
+    async def prepare_node(self, node_name: str):
+        """Build the agent of a node ahead of its execution."""
+        workflow_node_config: CustomWorkflowAgentConfig = self.agent_config_map[node_name]
+        framework = workflow_node_config.agent_execution_framework.value
+        with node_scope(node_name), tracing.span("custom_workflow.prepare_node", **{"node.framework": framework}):
+            executor = self.get_node_executor(workflow_node_config)
+            await executor.prepare(get_first_stage_agent(workflow_node_config.agent_config), self.get_response_format(workflow_node_config))
+
+    def get_early_router(self, workflow_node_config: CustomWorkflowAgentConfig, response_format) -> Optional[EarlyRouter]:
+        child_agent_names = workflow_node_config.child_agent_names
+        if not (self.early_routing or self.speculation) or not child_agent_names:
+            return None
+        return EarlyRouter(
+            children=[self.agent_config_map[child_name] for child_name in child_agent_names],
+            response_format=response_format,
+            choose_child=lambda values: self.get_valid_child_name(values, child_agent_names)[0],
+            prepare_child=self.prepare_node,
+        )
+
+    async def get_predicted_child(self, workflow_node_config: CustomWorkflowAgentConfig) -> Optional[str]:
+        child_agent_names = workflow_node_config.child_agent_names
+        if self.speculation is None or len(child_agent_names) < 2:
+            return None
+        return await run_state_call(
+            "routing_stats.predict",
+            routing_stats.predict,
+            workflow_key=self.workflow_key,
+            parent=workflow_node_config.agent_config.name,
+            children=child_agent_names,
+            min_probability=self.speculation.min_probability,
+            min_samples=self.speculation.min_samples,
+        )
+
+    def can_execute_speculatively(self) -> bool:
+        if self.speculation is None or self.speculation.mode != SpeculationMode.EXECUTE:
+            return False
+        max_wasted_tokens = self.speculation.max_wasted_tokens
+        return max_wasted_tokens is None or self.wasted_tokens < max_wasted_tokens
+
+    async def execute_node(self, node_run: NodeRun) -> dict:
+        token_account = get_token_account()
+        workflow_node_config: CustomWorkflowAgentConfig = self.agent_config_map[node_run.node_name]
+        framework = workflow_node_config.agent_execution_framework.value
+        with node_scope(node_run.node_name), tracing.span(
+            "custom_workflow.node",
+            **{"node.step": node_run.step, "node.framework": framework, "node.speculative": node_run.speculative},
+        ), track_node(node_run.node_name, framework):
+            node_run.executor = self.get_node_executor(workflow_node_config)
+            pydantic_model = self.get_response_format(workflow_node_config)
+
+            # The next node is chosen and prepared while this one is still generating
+            node_run.router = self.get_early_router(workflow_node_config, pydantic_model)
+            on_partial = None
+            if node_run.router is not None:
+                node_run.predicted_child = await self.get_predicted_child(workflow_node_config)
+                node_run.router.start(node_run.predicted_child)
+                if node_run.router.routing_keys or self.can_execute_speculatively():
+                    on_partial = lambda fields: self.on_partial(node_run, fields)
+            result: dict = await node_run.executor.execute_with_cascade(
+                agent=workflow_node_config.agent_config,
+                response_format=pydantic_model,
+                task_message=node_run.input_message,
+                on_partial=on_partial,
+            )
+            if token_account is not None:
+                token_account.raise_if_exceeded()
+        return result
+
+    async def execute_speculative_node(self, node_run: NodeRun) -> dict:
+        """Execute a node on its parent's partial output, on a token account of its own."""
+        with token_account_scope(node_run.token_account):
+            return await self.execute_node(node_run)
+
+    def on_partial(self, node_run: NodeRun, fields: dict):
+        router = node_run.router
+        router.on_partial(fields)
+        speculative_child = node_run.speculative_child
+        if speculative_child is not None:
+            if router.child_name is not None and router.child_name != speculative_child.node_name:
+                node_run.cancel_speculative_child()
+            return
+        child_name = router.child_name or node_run.predicted_child
+        if child_name is None or not self.can_execute_speculatively():
+            return
+        # The child starts once every field it takes from its parent is complete
+        child_config: CustomWorkflowAgentConfig = self.agent_config_map[child_name]
+        input_keys = child_config.input_keys_required_from_parent
+        if not input_keys or not all(key.split(".")[0] in fields for key in input_keys):
+            return
+        child_run = NodeRun(
+            node_name=child_name,
+            input_message=build_child_input(
+                task=self.task,
+                result=fields,
+                input_keys=input_keys,
+                share_task_among_agents=self.share_task_among_agents,
+                config=child_config.context_shaping or self.context_shaping,
+            ),
+            step=node_run.step + 1,
+            speculative=True,
+        )
+        token_account = get_token_account()
+        if token_account is not None:
+            child_run.token_account = token_account.speculate(child_name)
+        child_run.task = asyncio.create_task(self.execute_speculative_node(child_run))
+        node_run.speculative_child = child_run
+
+    async def resolve_speculation(self, node_run: NodeRun, child_name: str, input_message: str) -> Optional[NodeRun]:
+        """Keep the speculative execution of the next node when it ran on the right input, discard it otherwise."""
+        child_run = node_run.speculative_child
+        if child_run is None:
+            if node_run.predicted_child is not None:
+                outcome = "hit" if node_run.predicted_child == child_name else "miss"
+                speculations_total.labels(SpeculationMode.PREPARE.value, outcome).inc()
+            return None
+        node_run.speculative_child = None
+        if not child_run.discarded and child_run.node_name == child_name and child_run.input_message == input_message:
+            speculations_total.labels(SpeculationMode.EXECUTE.value, "hit").inc()
+            if child_run.token_account is not None:
+                child_run.token_account.keep()
+            return child_run
+        speculations_total.labels(SpeculationMode.EXECUTE.value, "miss").inc()
+        child_run.cancel()
+        await discard_task(child_run.task)
+        wasted = child_run.get_speculative_usage()
+        self.wasted_tokens += wasted
+        speculation_wasted_tokens_total.inc(wasted)
+        return None
+
     async def execute_workflow(self, task: str, share_task_among_agents: bool = True):
+        token_account = get_token_account()
+        self.task = task
+        self.share_task_among_agents = share_task_among_agents
+        self.wasted_tokens = 0
+        # Input and output of every node executed, in order
+        self.transcript = []
+        node_run = None
         try:
             if self.is_cyclic(self.start_node):
                 raise CyclicWorkflowException()
@@ -94,30 +274,35 @@ class CustomWorkflowManager():
             current_node = self.start_node
             result = None
             loop_count = 0
+            committed_run = None
 
 
             while flag and loop_count <= self.node_count:
 
-                custom_workflow_status.update_item(
-                    WorkflowItem(name=current_node, status=WorkflowStatus.RUNNING)
+                await run_state_call(
+                    "custom_workflow_status.update_item",
+                    custom_workflow_status.update_item,
+                    WorkflowItem(name=current_node, status=WorkflowStatus.RUNNING),
                 )
 
                 workflow_node_config:CustomWorkflowAgentConfig = self.agent_config_map[current_node]
-                agent = workflow_node_config.agent_config
-                executor = self.get_agent_execution_framework(workflow_node_config.agent_execution_framework)
-                pydantic_model = build_pydantic_model_from_dict(
-                    name=agent.name,
-                    data=workflow_node_config.structured_response_format
-                )
-
-                result:dict = await executor.execute(
-                    agent=agent,
-                    response_format=pydantic_model,
-                    task_message=agent_input_message
-                )
+                if committed_run is not None:
+                    # Already started on the partial output of its parent
+                    node_run = committed_run
+                    result = await node_run.task
+                else:
+                    node_run = NodeRun(node_name=current_node, input_message=agent_input_message, step=loop_count)
+                    result = await self.execute_node(node_run)
+                self.transcript.append({"node": current_node, "input": node_run.input_message, "output": result})
 
-                custom_workflow_status.update_item(
-                    WorkflowItem(name=current_node, status=WorkflowStatus.COMPLETED)
+                await run_state_call(
+                    "custom_workflow_status.update_item",
+                    custom_workflow_status.update_item,
+                    WorkflowItem(
+                        name=current_node,
+                        status=WorkflowStatus.COMPLETED,
+                        token_usage=token_account.get_node_usage(current_node) if token_account is not None else None,
+                    ),
                 )
 
                 # If no child then return result
@@ -126,37 +311,63 @@ class CustomWorkflowManager():
                     child_name, input_keys = self.get_valid_child_name(
                         result=result,
                         child_agent_names=workflow_node_config.child_agent_names
-                    )    
+                    )
+                    if len(workflow_node_config.child_agent_names) > 1:
+                        await run_state_call("routing_stats.record", routing_stats.record, self.workflow_key, current_node, child_name)
+                    if node_run.router is not None:
+                        await node_run.router.finish(child_name)
                     current_node = child_name
                 else:
                     flag = False
                     return result
                 
                 # get the next node to invoke and gather data from result. If key is "" or None send entire response.
-                requested_messages_form_child = dict()
-                # check for the key value in the result
-                if input_keys:
-                    for key in input_keys:
-                        if key in result.keys():
-                            requested_messages_form_child[key] = result[key]
-                
-                # if required input fields not present assign result
-                if share_task_among_agents:
-                    agent_input_message = f"**Task**:\n{task}\n\n**Task Context:**\n"
-                else:
-                    agent_input_message = "**Task Context:**\n"
-
-                if requested_messages_form_child:
-                    agent_input_message += json.dumps(requested_messages_form_child)
-                else:
-                    agent_input_message += json.dumps(result)
+                agent_input_message = build_child_input(
+                    task=task,
+                    result=result,
+                    input_keys=input_keys,
+                    share_task_among_agents=share_task_among_agents,
+                    config=self.agent_config_map[child_name].context_shaping or self.context_shaping,
+                )
+                committed_run = await self.resolve_speculation(node_run, child_name, agent_input_message)
 
                 loop_count += 1
 
-            executor.close_mcp_connection()
+            await node_run.executor.close_mcp_connection()
 
+        except (asyncio.CancelledError, RunCancelledException):
+            if node_run is not None:
+                node_run.cancel()
+            await run_state_call(
+                "custom_workflow_status.update_item",
+                custom_workflow_status.update_item,
+                WorkflowItem(
+                    name=current_node,
+                    status=WorkflowStatus.CANCELLED,
+                    token_usage=token_account.get_node_usage(current_node) if token_account is not None else None,
+                    detail=get_cancel_reason(),
+                ),
+            )
+            raise
         except Exception as e:
-            custom_workflow_status.update_item(
-                WorkflowItem(name=current_node, status=WorkflowStatus.FAILED)
+            if node_run is not None:
+                node_run.cancel()
+            node_usage = token_account.get_node_usage(current_node) if token_account is not None else None
+            if token_account is not None and token_account.exceeded is not None:
+                await run_state_call(
+                    "custom_workflow_status.update_item",
+                    custom_workflow_status.update_item,
+                    WorkflowItem(
+                        name=current_node,
+                        status=WorkflowStatus.BUDGET_EXCEEDED,
+                        token_usage=node_usage,
+                        detail=str(token_account.exceeded),
+                    ),
+                )
+                raise HTTPException(status_code=422, detail=f"Custom workflow execution stopped: {token_account.exceeded}")
+            await run_state_call(
+                "custom_workflow_status.update_item",
+                custom_workflow_status.update_item,
+                WorkflowItem(name=current_node, status=WorkflowStatus.FAILED, token_usage=node_usage),
             )
             raise HTTPException(status_code=500, detail=f"Custom workflow execution failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from os import getenv as os_getenv
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from core.metrics.server_metrics import early_routing_total
+from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig
+
+logger = logging.getLogger(__name__)
+
+EARLY_ROUTING_ENABLED = os_getenv("CUSTOM_WORKFLOW_EARLY_ROUTING", "true").lower() == "true"
+
+
+async def discard_task(task: asyncio.Task):
+    """Cancel a background task and wait for it, without raising its outcome."""
+    task.cancel()
+    await asyncio.wait([task])
+    if not task.cancelled():
+        task.exception()
+
+
+class EarlyRouter:
+    """
+    Chooses the next node of a custom workflow while the current node is still generating
+    its structured response, and starts preparing that child meanwhile.
+
+    The decision is taken as soon as every field the children's invoke conditions look at
+    is complete (at the start of the node when no child has conditions). Fields are
+    validated against the node's response model first, so the decision is the one the
+    complete response leads to. The manager still routes on the complete response; the
+    early decision only decides which child is built ahead of time. Until then, a child
+    predicted from past runs can be prepared speculatively.
+    """
+    def __init__(
+        self,
+        children: List[CustomWorkflowAgentConfig],
+        response_format: type[BaseModel],
+        choose_child: Callable[[dict], str],
+        prepare_child: Callable[[str], Awaitable[Any]],
+    ):
+        self.choose_child = choose_child
+        self.prepare_child = prepare_child
+        self.routing_keys = {key for child in children for key in child.agent_node_invoke_condition}
+        self.validators = {
+            key: TypeAdapter(response_format.model_fields[key].annotation)
+            for key in self.routing_keys if key in response_format.model_fields
+        }
+        self.child_name: Optional[str] = None
+        self.prepared_child: Optional[str] = None
+        self.prepare_task: Optional[asyncio.Task] = None
+
+    def start(self, predicted_child: Optional[str] = None):
+        if not self.routing_keys:
+            self.route({}, timing="at_start")
+        elif predicted_child is not None:
+            self.prepare(predicted_child)
+
+    def on_partial(self, fields: Dict[str, Any]):
+        if self.child_name is not None or not self.routing_keys <= fields.keys():
+            return
+        try:
+            values = {
+                key: self.validators[key].validate_python(fields[key]) if key in self.validators else fields[key]
+                for key in self.routing_keys
+            }
+        except ValidationError:
+            # Routed on the complete response instead
+            return
+        self.route(values, timing="during_output")
+
+    def route(self, values: dict, timing: str):
+        self.child_name = self.choose_child(values)
+        early_routing_total.labels(timing).inc()
+        if self.prepared_child != self.child_name:
+            self.cancel()
+            self.prepare(self.child_name)
+
+    def prepare(self, child_name: str):
+        self.prepared_child = child_name
+        self.prepare_task = asyncio.create_task(self.prepare_child(child_name))
+
+    async def finish(self, child_name: str):
+        """Wait for the child being prepared when it is the one that runs next."""
+        if self.child_name is None:
+            early_routing_total.labels("after_output").inc()
+        if self.prepare_task is None:
+            return
+        if child_name != self.prepared_child:
+            await discard_task(self.prepare_task)
+            return
+        try:
+            await self.prepare_task
+        except Exception as e:
+            # The child builds its agent again when it runs and reports the error then
+            logger.warning(f"Preparing node '{child_name}' ahead of time failed: {e}")
+
+    def cancel(self):
+        if self.prepare_task is not None:
+            self.prepare_task.cancel()
+            # Nobody awaits a cancelled preparation, retrieve its error so it is not reported as lost
+            self.prepare_task.add_done_callback(lambda task: task.cancelled() or task.exception())
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Optional
+
+from core.runs.token_accounting import SpeculativeTokenAccount
+from services.custom_workflow_executor.early_routing import EarlyRouter
+
+
+class NodeRun:
+    """
+    One execution of a custom workflow node, and the work started ahead of its completion:
+    the router preparing the next node and, in speculative execution mode, the next node
+    already executing on the parent's partial output.
+    """
+    def __init__(self, node_name: str, input_message: str, step: int, speculative: bool = False):
+        self.node_name = node_name
+        self.input_message = input_message
+        self.step = step
+        self.speculative = speculative
+        self.executor: Any = None
+        self.router: Optional[EarlyRouter] = None
+        self.predicted_child: Optional[str] = None
+        self.speculative_child: Optional["NodeRun"] = None
+        # Only set for speculative runs, which execute as their own task
+        self.task: Optional[asyncio.Task] = None
+        self.token_account: Optional[SpeculativeTokenAccount] = None
+        self.discarded = False
+
+    def get_speculative_usage(self) -> int:
+        """Tokens used by this speculative run and the speculative runs it started in turn."""
+        node_run, tokens = self, 0
+        while node_run is not None:
+            if node_run.token_account is not None:
+                tokens += node_run.token_account.usage.total_tokens
+            node_run = node_run.speculative_child
+        return tokens
+
+    def cancel_speculative_child(self):
+        child_run = self.speculative_child
+        if child_run is None or child_run.discarded:
+            return
+        child_run.discarded = True
+        child_run.task.cancel()
+        child_run.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        child_run.cancel()
+
+    def cancel(self):
+        """Cancel everything started ahead of this node's completion."""
+        if self.router is not None:
+            self.router.cancel()
+        self.cancel_speculative_child()
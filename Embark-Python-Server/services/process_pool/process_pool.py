@@ -0,0 +1,209 @@
+import asyncio
+import multiprocessing
+from logging import getLogger
+from os import getenv as os_getenv
+from typing import Any, Callable, Optional, Set
+
+from fastapi import HTTPException
+
+from core.exception.workflow_execution_exception import WorkerProcessException
+from core.metrics.server_metrics import process_workers_recycled_total, process_workers_busy
+from models.process_models.process import ExecutionMode, JobEvent
+from services.process_pool.process_worker import run_process_worker
+
+logger = getLogger(__name__)
+
+EXECUTION_MODE = ExecutionMode(os_getenv("EXECUTION_MODE", ExecutionMode.INLINE.value).lower())
+
+# Called with (event, *values) for the usage and partial result events of a job
+JobEventCallback = Callable[..., None]
+
+
+class WorkerProcess:
+    """API side of one worker process: its pipe, the job it runs and what it has used so far."""
+    def __init__(self, process: multiprocessing.Process, connection):
+        self.process = process
+        self.connection = connection
+        self.runs = 0
+        self.rss_bytes = 0
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.result: Optional[asyncio.Future] = None
+        self.on_event: Optional[JobEventCallback] = None
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+
+class FrameworkProcessPool:
+    """
+    Pool of pre-warmed worker processes that execute framework runs, a whole workflow or a
+    single custom workflow node at a time, off the API process. Heavy framework code then
+    uses every core of the host instead of competing for the GIL with request handling.
+
+    Token usage and partial results stream back over the worker's pipe as they happen and
+    are read on the event loop without polling. A worker is replaced after `max_runs_per_worker`
+    runs, when its memory grows beyond `max_memory_mb`, when it dies or when its run is
+    cancelled, which also contains memory leaks of the frameworks.
+    """
+    def __init__(self, size: int, max_runs_per_worker: Optional[int] = None, max_memory_mb: Optional[int] = None):
+        self.size = size
+        self.max_runs_per_worker = max_runs_per_worker
+        self.max_memory_mb = max_memory_mb
+        self.context = multiprocessing.get_context("spawn")
+        self.idle: Optional[asyncio.Queue] = None
+        self.workers: Set[WorkerProcess] = set()
+        self.spawning: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Start and warm up the worker processes, waiting until they are ready."""
+        if self.idle is not None:
+            return
+        self.idle = asyncio.Queue()
+        for _ in range(self.size):
+            self.replace_worker()
+        await asyncio.gather(*self.spawning, return_exceptions=True)
+
+    async def stop(self):
+        for task in list(self.spawning):
+            task.cancel()
+        for worker in list(self.workers):
+            self.discard_worker(worker, graceful=True)
+        self.idle = None
+
+    async def spawn_worker(self):
+        parent_connection, child_connection = self.context.Pipe()
+        process = self.context.Process(target=run_process_worker, args=(child_connection,), daemon=True)
+        process.start()
+        child_connection.close()
+        worker = WorkerProcess(process, parent_connection)
+        self.workers.add(worker)
+        asyncio.get_running_loop().add_reader(parent_connection.fileno(), self.on_readable, worker)
+        try:
+            await worker.ready
+        except asyncio.CancelledError:
+            self.discard_worker(worker)
+            raise
+        except WorkerProcessException as e:
+            # Not replaced, a worker that cannot start would be restarted forever
+            logger.error(f"Worker process {process.pid} failed to start: {e}")
+            raise
+        self.idle.put_nowait(worker)
+
+    def replace_worker(self):
+        task = asyncio.create_task(self.spawn_worker())
+        self.spawning.add(task)
+        task.add_done_callback(self.spawning.discard)
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    def discard_worker(self, worker: WorkerProcess, graceful: bool = False):
+        if worker not in self.workers:
+            return
+        self.workers.discard(worker)
+        asyncio.get_running_loop().remove_reader(worker.connection.fileno())
+        if graceful and worker.is_alive():
+            try:
+                worker.connection.send(None)
+            except OSError:
+                worker.process.kill()
+        else:
+            worker.process.kill()
+        worker.connection.close()
+        # Reap the process without blocking the loop
+        asyncio.get_running_loop().run_in_executor(None, worker.process.join)
+        for future in (worker.ready, worker.result):
+            if future is not None and not future.done():
+                future.set_exception(WorkerProcessException(f"Worker process {worker.process.pid} exited"))
+
+    def on_readable(self, worker: WorkerProcess):
+        try:
+            while worker.connection.poll():
+                self.on_message(worker, worker.connection.recv())
+        except (EOFError, OSError):
+            # The worker process died, a busy one is replaced when its job fails
+            idle = worker.result is None and worker.ready.done()
+            self.discard_worker(worker)
+            if idle and self.idle is not None:
+                process_workers_recycled_total.labels("exited").inc()
+                self.replace_worker()
+
+    def on_message(self, worker: WorkerProcess, message: tuple):
+        event, *values = message
+        match event:
+            case JobEvent.READY:
+                worker.ready.set_result(values[0])
+            case JobEvent.RESULT | JobEvent.ERROR:
+                worker.rss_bytes = values[1]
+                if worker.result is not None and not worker.result.done():
+                    worker.result.set_result((event, values[0]))
+            case _:
+                if worker.on_event is not None:
+                    worker.on_event(event, *values)
+
+    def should_recycle(self, worker: WorkerProcess) -> Optional[str]:
+        if self.max_runs_per_worker is not None and worker.runs >= self.max_runs_per_worker:
+            return "max_runs"
+        if self.max_memory_mb is not None and worker.rss_bytes > self.max_memory_mb * 1024 * 1024:
+            return "max_memory"
+        return None
+
+    async def execute(self, job: Any, on_event: Optional[JobEventCallback] = None) -> Any:
+        """Run a job on an idle worker process and return its result, raising its error."""
+        await self.start()
+        if not self.workers and not self.spawning:
+            raise WorkerProcessException("No worker process could be started")
+        worker: WorkerProcess = await self.idle.get()
+        while worker not in self.workers:
+            # Exited while idle
+            worker = await self.idle.get()
+        worker.result = asyncio.get_running_loop().create_future()
+        worker.on_event = on_event
+        process_workers_busy.inc()
+        reason = "cancelled"
+        try:
+            try:
+                worker.connection.send(job)
+            except OSError as e:
+                raise WorkerProcessException(f"Worker process {worker.process.pid} exited: {e}")
+            event, value = await worker.result
+            worker.runs += 1
+            reason = self.should_recycle(worker)
+        except WorkerProcessException:
+            reason = "exited"
+            raise
+        finally:
+            process_workers_busy.dec()
+            worker.result = None
+            worker.on_event = None
+            if reason is None:
+                self.idle.put_nowait(worker)
+            elif self.idle is not None:
+                # A cancelled run may still be executing, its worker is killed
+                process_workers_recycled_total.labels(reason).inc()
+                self.discard_worker(worker, graceful=reason in ("max_runs", "max_memory"))
+                self.replace_worker()
+        if event == JobEvent.ERROR:
+            if value["status_code"] is not None:
+                raise HTTPException(status_code=value["status_code"], detail=value["message"])
+            raise WorkerProcessException(f"{value['type']}: {value['message']}")
+        return value
+
+    def get_stats(self) -> dict:
+        return {
+            "size": self.size,
+            "workers": len(self.workers),
+            "idle": self.idle.qsize() if self.idle is not None else 0,
+            "runs": [worker.runs for worker in self.workers],
+        }
+
+
+def get_optional_int(name: str) -> Optional[int]:
+    value = os_getenv(name, "")
+    return int(value) if value else None
+
+
+# Instantiate and use them
+framework_process_pool = FrameworkProcessPool(
+    size=int(os_getenv("PROCESS_POOL_SIZE", str(multiprocessing.cpu_count()))),
+    max_runs_per_worker=get_optional_int("PROCESS_POOL_MAX_RUNS_PER_WORKER"),
+    max_memory_mb=get_optional_int("PROCESS_POOL_MAX_MEMORY_MB"),
+)
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+
+from core.llm.llm_call_hooks import LLMCall, LLMCallHook, LLMResponse, register_llm_call_hook
+from core.runs.run_context import get_node_id, node_scope, run_scope
+from core.runs.token_accounting import RunTokenAccount, token_account_scope
+from models.process_models.process import CustomNodeJob, JobEvent, WorkflowJob
+from models.result_models.result import RunOutput
+
+
+class ParentConnection:
+    """Connection to the API process. Framework threads (e.g. crew kickoffs) send on it too."""
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+
+    def send(self, message: tuple):
+        with self.lock:
+            self.connection.send(message)
+
+
+class UsageForwardingHook(LLMCallHook):
+    """Sends the usage of every LLM call to the API process, which keeps the token account of the run."""
+    name = "usage_forwarding"
+
+    def __init__(self, parent: ParentConnection):
+        self.parent = parent
+
+    def after_call(self, call: LLMCall, response: LLMResponse):
+        self.parent.send((JobEvent.USAGE, response.usage.to_dict(), get_node_id()))
+
+
+def get_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current size outside Linux, in kilobytes
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def describe_error(error: BaseException) -> dict:
+    return {
+        "type": type(error).__name__,
+        "message": str(error.detail) if isinstance(error, HTTPException) else str(error),
+        "status_code": error.status_code if isinstance(error, HTTPException) else None,
+    }
+
+
+async def execute_workflow_job(job: WorkflowJob) -> Tuple[Optional[str], RunOutput]:
+    from services.workflow_executors.workflow_executor_manager import WorkflowExecutorManager
+    framework = job.workflow.agent_execution_framework.lower()
+    token_account = RunTokenAccount(run_budget=job.run_budget)
+    with run_scope(job.run_id), token_account_scope(token_account):
+        executor = await WorkflowExecutorManager.get_executor(framework=framework)
+        output = await executor.execute(workflow=job.workflow, workflow_task=job.task)
+        token_account.raise_if_exceeded()
+    return executor.stop_reason, output
+
+
+async def execute_custom_node_job(job: CustomNodeJob, parent: ParentConnection) -> dict:
+    from services.custom_workflow_executor.custom_workflow_manager import get_custom_agent_executor, get_response_format
+    config = job.node_config
+    node_name = config.agent_config.name
+    token_account = RunTokenAccount(run_budget=job.run_budget, node_budgets={node_name: job.node_budget})
+    with run_scope(job.run_id), node_scope(node_name), token_account_scope(token_account):
+        executor = get_custom_agent_executor(config.agent_execution_framework)
+        result = await executor.execute_with_cascade(
+            agent=config.agent_config,
+            response_format=get_response_format(config),
+            task_message=job.task_message,
+            on_partial=(lambda fields: parent.send((JobEvent.PARTIAL, dict(fields)))) if job.stream_partial else None,
+        )
+        token_account.raise_if_exceeded()
+    return result
+
+
+def warm_up():
+    """Import the frameworks and register the LLM call hooks once, before the first job."""
+    from dotenv import load_dotenv
+    from core.llm.cassette.llm_cassette import configure_llm_cassette
+    from core.tracing.tracing import configure_tracing
+    from core.metrics.llm_metrics_hook import register_llm_metrics_hook
+    from core.runs.token_accounting_hook import register_token_accounting_hook
+    import services.custom_workflow_executor.custom_workflow_manager  # noqa: F401
+    import services.workflow_executors.workflow_executor_manager  # noqa: F401
+    load_dotenv()
+    configure_llm_cassette()
+    configure_tracing()
+    register_llm_metrics_hook()
+    register_token_accounting_hook()
+
+
+def execute_jobs(parent: ParentConnection, loop: asyncio.AbstractEventLoop):
+    parent.send((JobEvent.READY, os.getpid()))
+    while True:
+        job: Any = parent.connection.recv()
+        if job is None:
+            return
+        try:
+            if isinstance(job, WorkflowJob):
+                result = loop.run_until_complete(execute_workflow_job(job))
+            else:
+                result = loop.run_until_complete(execute_custom_node_job(job, parent))
+        except Exception as e:
+            parent.send((JobEvent.ERROR, describe_error(e), get_rss_bytes()))
+            continue
+        parent.send((JobEvent.RESULT, result, get_rss_bytes()))
+
+
+def run_process_worker(connection: Connection):
+    """Entry point of a worker process: executes the jobs sent by the API process one at a time."""
+    parent = ParentConnection(connection)
+    # Before the token accounting hook, which raises on the call that exceeds a budget
+    register_llm_call_hook(UsageForwardingHook(parent))
+    warm_up()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        execute_jobs(parent, loop)
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        # The API process is gone or shutting down
+        pass
+    finally:
+        loop.close()
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import socket
+import time
+from logging import getLogger
+from typing import Optional, Set
+
+from fastapi import HTTPException
+
+from core.datastore.datastore import run_state_call
+from core.datastore.run_store import run_store
+from core.metrics.server_metrics import scheduler_wait_seconds, work_queue_jobs_total
+from core.queue.work_queue import WorkQueue
+from models.api_models.workflow import CustomWorkflowConfig, WorkflowModel
+from models.queue_models.queue import Job, JobKind, JobState
+from models.status_models.status import WorkflowStatus
+from services.workflow_runs.workflow_runs import CANCELLED_STATUS_CODES, execute_run, run_custom_workflow, run_workflows
+
+logger = getLogger(__name__)
+
+
+async def execute_job(job: Job):
+    match job.kind:
+        case JobKind.WORKFLOW:
+            request = [WorkflowModel.model_validate(workflow) for workflow in job.payload]
+            run = run_workflows(job.run_id, request, job.tenant, job.priority)
+        case JobKind.CUSTOM_WORKFLOW:
+            run = run_custom_workflow(job.run_id, CustomWorkflowConfig.model_validate(job.payload), job.tenant, job.priority)
+    return await execute_run(job.run_id, job.kind.value, run, timeout_seconds=job.timeout_seconds)
+
+
+class QueueWorker:
+    """
+    Pulls runs from the work queue and executes up to `concurrency` of them at a time.
+    Leases are extended while a run executes, so the visibility timeout only has to cover
+    the time it takes to notice a dead worker, not the longest run.
+    """
+    def __init__(
+        self,
+        queue: WorkQueue,
+        concurrency: int = 4,
+        visibility_timeout_seconds: float = 60.0,
+        poll_interval_seconds: float = 1.0,
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.tasks: Set[asyncio.Task] = set()
+        self.stopping: Optional[asyncio.Event] = None
+
+    async def keep_leased(self, job: Job):
+        while True:
+            await asyncio.sleep(self.visibility_timeout_seconds / 3)
+            await asyncio.to_thread(self.queue.extend_lease, job, self.visibility_timeout_seconds)
+
+    async def process(self, job: Job):
+        if job.attempts == 1:
+            scheduler_wait_seconds.labels(job.priority.value).observe(time.time() - job.created_at)
+        # Cancelled while waiting in the queue
+        cancel_request = await run_state_call("run_store.get_cancel_request", run_store.get_cancel_request, job.run_id)
+        if cancel_request is not None:
+            await run_state_call("run_store.finish", run_store.finish, job.run_id, WorkflowStatus.CANCELLED, detail=cancel_request)
+            await asyncio.to_thread(self.queue.ack, job)
+            work_queue_jobs_total.labels("cancelled").inc()
+            return
+
+        heartbeat = asyncio.create_task(self.keep_leased(job))
+        try:
+            await execute_job(job)
+        except HTTPException as e:
+            # Client errors (budget exceeded, cancelled, invalid workflow) fail the same way on a retry
+            if e.status_code < 500:
+                await asyncio.to_thread(self.queue.ack, job)
+                work_queue_jobs_total.labels("cancelled" if e.status_code in CANCELLED_STATUS_CODES.values() else "failed").inc()
+            else:
+                await self.retry(job, str(e.detail))
+        except Exception as e:
+            await self.retry(job, str(e))
+        else:
+            await asyncio.to_thread(self.queue.ack, job)
+            work_queue_jobs_total.labels("completed").inc()
+        finally:
+            heartbeat.cancel()
+
+    async def retry(self, job: Job, error: str):
+        state = await asyncio.to_thread(self.queue.nack, job, error)
+        work_queue_jobs_total.labels("dead_lettered" if state == JobState.DEAD else "retried").inc()
+        logger.warning(f"Job {job.id} (run {job.run_id}) attempt {job.attempts} failed: {error}")
+
+    async def run(self):
+        self.stopping = asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        logger.info(f"Queue worker {self.worker_id} started with concurrency {self.concurrency}")
+        while not self.stopping.is_set():
+            await slots.acquire()
+            job = await asyncio.to_thread(self.queue.dequeue, self.worker_id, self.visibility_timeout_seconds)
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self.process(job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+        # Let in-flight runs finish, jobs that were not picked up stay in the queue
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def stop(self):
+        if self.stopping is not None:
+            self.stopping.set()
@@ -1,6 +1,10 @@
 from abc import ABC
+from typing import Optional
 
 class AgentExecutor(ABC):
+    # Why the last execution stopped, for frameworks that report it (e.g. autogen termination conditions)
+    stop_reason: Optional[str] = None
+
     async def get_agents_for_workflow():
         ...
     async def initialize_reflection():
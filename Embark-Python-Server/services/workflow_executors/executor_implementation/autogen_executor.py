@@ -1,5 +1,9 @@
+import asyncio
 from typing import Optional
-from core.prompts.manager_prompt import REFLECTION_AGENT_EXPECTED_OUTPUT, REFLECTION_AGENT_GOAL, REFLECTION_AGENT_PROMPT, REFLECTION_AGENT_RESPONSIBILITY
+from autogen_core import CancellationToken
+from core.prompts.manager_prompt import REFLECTION_AGENT_EXPECTED_OUTPUT, REFLECTION_AGENT_GOAL, REFLECTION_AGENT_RESPONSIBILITY
+from core.prompts.prompt_layout import get_reflection_prompt
+from models.result_models.result import RunOutput
 from models.workflow_models.workflow import LLM, Agent, Workflow
 from services.workflow_executors.agent_executor import AgentExecutor
 from shared.autogen.autogen_agent import AutogenAgent
@@ -9,11 +13,10 @@ class AutogenExecutor(AgentExecutor):
         self.autogen_agent_instance = AutogenAgent()
     
     async def initialize_reflection(self, manager_additional_instructions: Optional[str], llm: LLM):
-        manager_additional_instructions = f"\nInstructions:\n{manager_additional_instructions}\n" if manager_additional_instructions else ""
         reflection_instructions = Agent(
             name="reflection_agent",
             goal=REFLECTION_AGENT_GOAL,
-            detailed_prompt=f"{REFLECTION_AGENT_PROMPT}\n{manager_additional_instructions}\n",
+            detailed_prompt=get_reflection_prompt(manager_additional_instructions),
             agent_responsibility=REFLECTION_AGENT_RESPONSIBILITY,
             expected_output=REFLECTION_AGENT_EXPECTED_OUTPUT,
             tools=[],
@@ -24,31 +27,56 @@ class AutogenExecutor(AgentExecutor):
         )
     
     async def get_agents_for_workflow(self, workflow: Workflow):
-        agents = []
-
-        for agent_config in workflow.agents:
-
-            # Register the agent
-            agent_instance = await self.autogen_agent_instance.register_agent(
-                agent_config,
-            )
-            agents.append(agent_instance)
-
-        return agents
+        # Agents are built concurrently, a tool server shared by several agents is discovered once
+        return list(await asyncio.gather(*(
+            self.autogen_agent_instance.register_agent(agent_config)
+            for agent_config in workflow.agents
+        )))
 
     async def execute(self, workflow: Workflow, workflow_task: str):
-        agents = await self.get_agents_for_workflow(workflow)
-        reflection_agent = await self.initialize_reflection(
+        # Agents are checked out of the agent cache, whatever was acquired is released even
+        # when another agent, the team or the run fails
+        registrations = [
+            asyncio.ensure_future(self.autogen_agent_instance.register_agent(agent_config))
+            for agent_config in workflow.agents
+        ]
+        registrations.append(asyncio.ensure_future(self.initialize_reflection(
             manager_additional_instructions=workflow.reflection_additional_instruction,
             llm=workflow.reflection_llm_config
-        )
-        agents.append(reflection_agent)
+        )))
+        agents = []
+        try:
+            try:
+                results = await asyncio.gather(*registrations, return_exceptions=True)
+            finally:
+                agents = [
+                    registration.result() for registration in registrations
+                    if registration.done() and not registration.cancelled() and registration.exception() is None
+                ]
+            error = next((result for result in results if isinstance(result, BaseException)), None)
+            if error is not None:
+                raise error
 
-        team = self.autogen_agent_instance.get_team(
-            agents,
-            workflow.execution_type
-        )
+            team = self.autogen_agent_instance.get_team(
+                agents,
+                workflow.execution_type,
+                workflow.termination
+            )
 
-        result = await team.run(task=workflow_task)
+            cancellation_token = CancellationToken()
+            team_run = asyncio.ensure_future(team.run(task=workflow_task, cancellation_token=cancellation_token))
+            try:
+                result = await asyncio.shield(team_run)
+            except asyncio.CancelledError:
+                # Cancel the in-flight agent calls, otherwise the team waits for them before stopping
+                cancellation_token.cancel()
+                await asyncio.gather(team_run, return_exceptions=True)
+                raise
+        finally:
+            await self.autogen_agent_instance.release_agents(agents)
 
-        return str(result)
\ No newline at end of file
+        self.stop_reason = result.stop_reason
+        return RunOutput(
+            final=result.messages[-1].to_text() if result.messages else None,
+            transcript=[message.model_dump(mode="json") for message in result.messages],
+        )
\ No newline at end of file
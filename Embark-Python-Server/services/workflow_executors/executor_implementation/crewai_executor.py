@@ -1,11 +1,14 @@
 # src/research_crew/crew.py
+import asyncio
 import json
 from crewai import Agent, Crew, Process, Task
 from typing import Dict, List, Optional, Tuple, Union
 from shared.crewai.crewai_agent import CrewAIAgent
-from core.prompts.manager_prompt import REFLECTION_AGENT_GOAL, REFLECTION_AGENT_PROMPT
+from core.prompts.manager_prompt import REFLECTION_AGENT_GOAL
+from core.prompts.prompt_layout import get_reflection_prompt
 from core.exception.workflow_execution_exception import InvalidProcessTypeException
 from core.llm.agent_llm_providers.llm_provider_impl.crewai_llm_config import CrewAILLMProvider
+from models.result_models.result import RunOutput
 from models.workflow_models.workflow import ExecutionTypeCrewAI, Stdio, Tool, Workflow, LLM
 from models.workflow_models.workflow import Agent as WorkflowAgent
 from services.workflow_executors.agent_executor import AgentExecutor
@@ -13,6 +16,7 @@ from crewai.tools.base_tool import BaseTool
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from mcp import StdioServerParameters
 from crewai_tools import MCPServerAdapter
+from shared.blocking_calls import blocking_io_pool, crew_kickoff_pool
 from logging import getLogger
 
 logger = getLogger(__name__)
@@ -31,12 +35,11 @@ class CrewAIExecutor(AgentExecutor):
         self.crewai_agent_instance = CrewAIAgent(adapter)
 
     async def initialize_reflection(self, task: str, manager_additional_instructions: Optional[str], llm: LLM):
-        manager_additional_instructions = f"\nInstructions:\n{manager_additional_instructions}\n" if manager_additional_instructions else ""
-        task_instructions = f"{manager_additional_instructions}\n**TASK**\n{task}\n"
         reflection_instructions = WorkflowAgent(
             name="reflection_agent",
             goal=REFLECTION_AGENT_GOAL,
-            detailed_prompt=f"{REFLECTION_AGENT_PROMPT}\n{task_instructions}\n",
+            # The task comes last, the prefix before it is the same for every run of the workflow
+            detailed_prompt=get_reflection_prompt(manager_additional_instructions, task),
             agent_responsibility="",
             expected_output="",
             tools=[],
@@ -48,18 +51,15 @@ class CrewAIExecutor(AgentExecutor):
 
 
     async def get_agents_for_workflow(self, workflow: Workflow):
-        agents = []
-        tasks = []
-
-        for agent_config in workflow.agents:
+        # Agents are built concurrently, the MCP adapter is started once for all of them
+        agents = list(await asyncio.gather(*(
+            self.crewai_agent_instance.register_agent(agent_config)
+            for agent_config in workflow.agents
+        )))
 
-            # Register the agent
-            agent_instance = await self.crewai_agent_instance.register_agent(
-                agent_config,
-            )
-            agents.append(agent_instance)
-
-            # Register the corresponding task
+        # Register the corresponding tasks
+        tasks = []
+        for agent_config, agent_instance in zip(workflow.agents, agents):
             task = await self.crewai_agent_instance.register_task(
                 agent_config,
                 agent_instance
@@ -70,11 +70,13 @@ class CrewAIExecutor(AgentExecutor):
 
     async def execute(self, workflow: Workflow, workflow_task: str):
 
-        agent_list, task_list = await self.get_agents_for_workflow(workflow)
-        reflection_agent_object = await self.initialize_reflection(
-            task=workflow_task,
-            manager_additional_instructions=workflow.reflection_additional_instruction,
-            llm=workflow.reflection_llm_config
+        (agent_list, task_list), reflection_agent_object = await asyncio.gather(
+            self.get_agents_for_workflow(workflow),
+            self.initialize_reflection(
+                task=workflow_task,
+                manager_additional_instructions=workflow.reflection_additional_instruction,
+                llm=workflow.reflection_llm_config
+            ),
         )
         reflection_llm_object = CrewAILLMProvider().get_llm_instance(workflow.reflection_llm_config)
         
@@ -90,11 +92,14 @@ class CrewAIExecutor(AgentExecutor):
 
         # Create and run the crew
         try:
-            result = await crew.kickoff_async()
+            result = await crew_kickoff_pool.run("crew.kickoff", crew.kickoff)
         except Exception as e:
             logger.error(str(e))
         finally:
             if adapter:
-                adapter.stop()
+                await blocking_io_pool.run("mcp.adapter_stop", adapter.stop)
 
-        return result
+        return RunOutput(
+            final=result.raw,
+            transcript=[task_output.model_dump(mode="json") for task_output in result.tasks_output],
+        )
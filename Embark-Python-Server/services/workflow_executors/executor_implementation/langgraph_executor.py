@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import AsyncExitStack
 import json
 from typing import Dict, List, Optional, Tuple, Union
@@ -7,10 +8,13 @@ from mcp.client.sse import sse_client
 
 from shared.langgraph.langgraph_agent import LangGraphAgent
 from core.llm.agent_llm_providers.llm_provider_impl.langgraph_llm_config import LangGraphLLMProvider
-from core.prompts.manager_prompt import REFLECTION_AGENT_PROMPT
+from core.llm.prompt_caching import get_system_content
+from core.prompts.prompt_layout import get_reflection_prompt
+from models.result_models.result import RunOutput
 from models.workflow_models.workflow import LLM, Agent, Stdio, Tool, Workflow
 from services.workflow_executors.agent_executor import AgentExecutor
 
+from langchain_core.messages import SystemMessage
 from langgraph.prebuilt import create_react_agent
 
 class LangGraphExecutor(AgentExecutor):
@@ -19,25 +23,18 @@ class LangGraphExecutor(AgentExecutor):
         raise NotImplementedError("LangGraphExecutor is not fully implemented yet.")
 
     async def initialize_reflection(self, manager_additional_instructions: Optional[str], llm: LLM, tools: List):
-        manager_additional_instructions = f"\nInstructions:\n{manager_additional_instructions}\n" if manager_additional_instructions else ""
         return create_react_agent(
             model=LangGraphLLMProvider().get_llm_instance(llm=llm),
             tools=tools,
-            prompt=f"{REFLECTION_AGENT_PROMPT}\n{manager_additional_instructions}\n"
+            prompt=SystemMessage(content=get_system_content(llm.provider, get_reflection_prompt(manager_additional_instructions)))
         )
         
     async def get_agents_for_workflow(self, workflow: Workflow):
-        agents = []
-
-        for agent_config in workflow.agents:
-
-            # Register the agent
-            agent_instance = await self.langgraph_agent_instance.register_agent(
-                agent_config,
-            )
-            agents.append(agent_instance)
-
-        return agents
+        # Agents are built concurrently, a tool server shared by several agents is discovered once
+        return list(await asyncio.gather(*(
+            self.langgraph_agent_instance.register_agent(agent_config)
+            for agent_config in workflow.agents
+        )))
 
     async def execute(self, workflow: Workflow, workflow_task: str):
         agents = await self.get_agents_for_workflow(workflow)
@@ -58,4 +55,8 @@ class LangGraphExecutor(AgentExecutor):
             input=input
         )
 
-        return result
\ No newline at end of file
+        messages = result["messages"]
+        return RunOutput(
+            final=messages[-1].content if messages else None,
+            transcript=[message.model_dump(mode="json") for message in messages],
+        )
\ No newline at end of file
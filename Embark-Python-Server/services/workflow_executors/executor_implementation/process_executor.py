@@ -0,0 +1,28 @@
+from typing import Optional
+from core.llm.llm_call_hooks import LLMUsage
+from core.runs.run_context import get_run_id
+from core.runs.token_accounting import RunTokenAccount, get_token_account
+from models.process_models.process import JobEvent, WorkflowJob
+from models.workflow_models.workflow import Workflow
+from services.workflow_executors.agent_executor import AgentExecutor
+from services.process_pool.process_pool import framework_process_pool
+
+
+class ProcessExecutor(AgentExecutor):
+    """Executes a whole workflow in a framework worker process (EXECUTION_MODE=process)."""
+
+    async def execute(self, workflow: Workflow, workflow_task: str):
+        token_account: Optional[RunTokenAccount] = get_token_account()
+
+        def on_event(event: JobEvent, *values):
+            if event == JobEvent.USAGE and token_account is not None:
+                token_account.add(LLMUsage.from_dict(values[0]), node=values[1])
+
+        job = WorkflowJob(
+            run_id=get_run_id() or "",
+            workflow=workflow,
+            task=workflow_task,
+            run_budget=token_account.run_budget if token_account is not None else None,
+        )
+        self.stop_reason, output = await framework_process_pool.execute(job, on_event)
+        return output
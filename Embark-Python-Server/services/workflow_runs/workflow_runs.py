@@ -0,0 +1,246 @@
+import asyncio
+from os import getenv as os_getenv
+from typing import Any, Awaitable, List, Optional
+from fastapi import HTTPException, Request
+from models.api_models.workflow import WorkflowModel, CustomWorkflowConfig
+from services.custom_workflow_executor.custom_workflow_manager import CustomWorkflowManager
+from services.workflow_executors.workflow_executor_manager import WorkflowExecutorManager
+from services.workflow_executors.agent_executor import AgentExecutor
+from services.workflow_executors.executor_implementation.process_executor import ProcessExecutor
+from services.process_pool.process_pool import EXECUTION_MODE
+from models.process_models.process import ExecutionMode
+from core.datastore.datastore import custom_workflow_status, run_state_call, workflow_status
+from core.datastore.run_store import run_store
+from core.datastore.result_store import result_store
+from models.status_models.status import WorkflowItem, WorkflowStatus
+from core.metrics.server_metrics import run_queue_depth, track_run
+from core.exception.workflow_execution_exception import RunCancelledException
+from core.runs.run_cancellation import CancelReason, get_cancel_reason, run_with_cancellation
+from core.runs.run_context import run_scope
+from core.runs.token_accounting import RunTokenAccount, token_account_scope
+from core.scheduling.run_scheduler import run_scheduler
+from core.scheduling.tenancy import DEFAULT_TENANT
+from core.tracing.tracing import tracing
+from models.queue_models.queue import PriorityClass
+from models.result_models.result import ResultReference, RunOutput
+from shared.blocking_calls import blocking_io_pool
+
+# Custom workflow results up to this size are returned in the response, larger ones by reference
+RESULT_INLINE_MAX_BYTES = int(os_getenv("RESULT_INLINE_MAX_BYTES", str(64 * 1024)))
+
+# 499 is the de facto status for requests closed by the client
+CANCELLED_STATUS_CODES = {
+    CancelReason.CANCELLED.value: 409,
+    CancelReason.TIMEOUT.value: 408,
+    CancelReason.CLIENT_DISCONNECTED.value: 499,
+}
+
+
+def get_failed_item(name: str, token_account: Optional[RunTokenAccount]) -> WorkflowItem:
+    """Status of a workflow that stopped early, distinguishing token budget stops from errors."""
+    if token_account is not None and token_account.exceeded is not None:
+        return WorkflowItem(
+            name=name,
+            status=WorkflowStatus.BUDGET_EXCEEDED,
+            token_usage=token_account.total,
+            detail=str(token_account.exceeded),
+        )
+    return WorkflowItem(
+        name=name,
+        status=WorkflowStatus.FAILED,
+        token_usage=token_account.total if token_account is not None else None,
+    )
+
+
+def get_failed_workflows(request: List[WorkflowModel], index: int, current_workflow: Optional[WorkflowModel]) -> List[WorkflowModel]:
+    """
+    Workflows a failure stops: the running one, or all of them when it happened before the
+    first one started. Workflows after a failed one stay scheduled.
+    """
+    return [current_workflow] if current_workflow is not None else request[index:]
+
+
+def get_cancelled_http_exception(error: RunCancelledException) -> HTTPException:
+    return HTTPException(status_code=CANCELLED_STATUS_CODES.get(error.reason, 409), detail=str(error))
+
+
+async def store_result(run_id: str, output: RunOutput) -> ResultReference:
+    """Write a run result to the result store, off the event loop."""
+    return await blocking_io_pool.run("result_store.put", result_store.put, run_id, output)
+
+
+async def execute_run(
+    run_id: str,
+    kind: str,
+    run: Awaitable[Any],
+    timeout_seconds: Optional[float] = None,
+    http_request: Optional[Request] = None,
+) -> Any:
+    """
+    Execute a run, in the API process or a queue worker, and record its state and result in
+    the run store shared by all processes.
+    """
+    await run_state_call("run_store.start", run_store.start, run_id, kind)
+    try:
+        result = await run_with_cancellation(run_id, run, timeout_seconds=timeout_seconds, request=http_request)
+    except RunCancelledException as e:
+        await run_state_call("run_store.finish", run_store.finish, run_id, WorkflowStatus.CANCELLED, detail=e.reason)
+        raise get_cancelled_http_exception(e)
+    except HTTPException as e:
+        # The executors report token budget stops as 422
+        state = WorkflowStatus.BUDGET_EXCEEDED if e.status_code == 422 else WorkflowStatus.FAILED
+        await run_state_call("run_store.finish", run_store.finish, run_id, state, detail=str(e.detail))
+        raise
+    except BaseException as e:
+        await run_state_call("run_store.finish", run_store.finish, run_id, WorkflowStatus.FAILED, detail=str(e))
+        raise
+    await run_state_call("run_store.finish", run_store.finish, run_id, WorkflowStatus.COMPLETED, result=result)
+    return result
+
+
+async def run_workflows(
+    run_id: str,
+    request: List[WorkflowModel],
+    tenant: str = DEFAULT_TENANT,
+    priority: PriorityClass = PriorityClass.INTERACTIVE,
+):
+    queued_workflows = len(request)
+    run_queue_depth.labels("workflow").inc(queued_workflows)
+    token_account = None
+    stop_reasons = dict()
+    final_outputs = dict()
+    transcript = []
+    # The workflow running when the run stops, None before the first one starts and after the last one
+    index = 0
+    current_workflow: Optional[WorkflowModel] = None
+    framework = None
+    try:
+        for workflow in request:
+            await run_state_call(
+                "workflow_status.add_item",
+                workflow_status.add_item,
+                WorkflowItem(name=workflow.workflow.name, status=WorkflowStatus.SCHEDULED),
+            )
+
+        for index, current_workflow in enumerate(request):
+            token_account = None
+            async with run_scheduler.slot(tenant, current_workflow.workflow.name, priority):
+                queued_workflows -= 1
+                run_queue_depth.labels("workflow").dec()
+                await run_state_call(
+                    "workflow_status.update_item",
+                    workflow_status.update_item,
+                    WorkflowItem(name=current_workflow.workflow.name, status=WorkflowStatus.RUNNING),
+                )
+                framework = current_workflow.workflow.agent_execution_framework.lower()
+                token_account = RunTokenAccount(run_budget=current_workflow.workflow.token_budget)
+                with run_scope(run_id), token_account_scope(token_account), tracing.span(
+                    "workflow.run",
+                    **{"workflow.name": current_workflow.workflow.name, "workflow.framework": framework},
+                ), track_run("workflow", current_workflow.workflow.name):
+                    if EXECUTION_MODE == ExecutionMode.PROCESS:
+                        executor: AgentExecutor = ProcessExecutor()
+                    else:
+                        executor: AgentExecutor = await WorkflowExecutorManager.get_executor(framework=framework)
+                    output: Optional[RunOutput] = await executor.execute(workflow=current_workflow.workflow, workflow_task=current_workflow.task)
+                    # Frameworks may swallow the budget error raised from inside the LLM call
+                    token_account.raise_if_exceeded()
+                stop_reasons[current_workflow.workflow.name] = executor.stop_reason
+                if output is not None:
+                    final_outputs[current_workflow.workflow.name] = output.final
+                    transcript.extend(
+                        {"workflow": current_workflow.workflow.name, "message": message} for message in output.transcript
+                    )
+                await run_state_call(
+                    "workflow_status.update_item",
+                    workflow_status.update_item,
+                    WorkflowItem(
+                        name=current_workflow.workflow.name,
+                        status=WorkflowStatus.COMPLETED,
+                        token_usage=token_account.total,
+                        detail=executor.stop_reason,
+                    ),
+                )
+        # Every workflow completed, storing the result does not fail any of them
+        index, current_workflow = len(request), None
+        reference = await store_result(run_id, RunOutput(final=final_outputs, transcript=transcript))
+        return {
+            "status": "Execution completed",
+            "framework": framework,
+            "stop_reasons": stop_reasons,
+            "result": reference.model_dump(mode="json"),
+        }
+    except (asyncio.CancelledError, RunCancelledException):
+        # The current workflow and the ones that did not start yet, all of them before the first one starts
+        for cancelled_workflow in request[index:]:
+            await run_state_call(
+                "workflow_status.update_item",
+                workflow_status.update_item,
+                WorkflowItem(
+                    name=cancelled_workflow.workflow.name,
+                    status=WorkflowStatus.CANCELLED,
+                    token_usage=token_account.total if cancelled_workflow is current_workflow and token_account is not None else None,
+                    detail=get_cancel_reason(),
+                ),
+            )
+        raise
+    except HTTPException as http_exc:
+        for failed_workflow in get_failed_workflows(request, index, current_workflow):
+            await run_state_call(
+                "workflow_status.update_item",
+                workflow_status.update_item,
+                get_failed_item(failed_workflow.workflow.name, token_account),
+            )
+        raise http_exc
+    except Exception as e:
+        for failed_workflow in get_failed_workflows(request, index, current_workflow):
+            await run_state_call(
+                "workflow_status.update_item",
+                workflow_status.update_item,
+                get_failed_item(failed_workflow.workflow.name, token_account),
+            )
+        if token_account is not None and token_account.exceeded is not None:
+            raise HTTPException(status_code=422, detail=f"Workflow execution stopped: {token_account.exceeded}")
+        raise HTTPException(status_code=500, detail=f"Workflow execution failed: {str(e)}")
+    finally:
+        # Workflows that never started because an earlier one failed
+        run_queue_depth.labels("workflow").dec(queued_workflows)
+
+
+async def run_custom_workflow(
+    run_id: str,
+    request: CustomWorkflowConfig,
+    tenant: str = DEFAULT_TENANT,
+    priority: PriorityClass = PriorityClass.INTERACTIVE,
+):
+    try:
+        for workflow in request.workflows:
+            await run_state_call(
+                "custom_workflow_status.add_item",
+                custom_workflow_status.add_item,
+                WorkflowItem(name=workflow.agent_config.name, status=WorkflowStatus.SCHEDULED),
+            )
+        # Custom workflows have no name of their own, they are identified by the entry node
+        entry_node = next((workflow.agent_config.name for workflow in request.workflows if workflow.is_entry_point), "")
+        token_account = RunTokenAccount(
+            run_budget=request.token_budget,
+            node_budgets={workflow.agent_config.name: workflow.token_budget for workflow in request.workflows},
+        )
+        async with run_scheduler.slot(tenant, entry_node, priority):
+            with run_scope(run_id), token_account_scope(token_account), tracing.span(
+                "custom_workflow.run", **{"workflow.node_count": len(request.workflows)}
+            ), track_run("custom_workflow", entry_node):
+                custom_workflow_object = CustomWorkflowManager(
+                    request.workflows, context_shaping=request.context_shaping, speculation=request.speculation
+                )
+                result = await custom_workflow_object.execute_workflow(
+                    request.task, share_task_among_agents=request.share_task_among_agents
+                )
+                reference = await store_result(run_id, RunOutput(final=result, transcript=custom_workflow_object.transcript))
+        if reference.final_bytes > RESULT_INLINE_MAX_BYTES:
+            return reference.model_dump(mode="json")
+        return result
+    except (HTTPException, RunCancelledException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Custom workflow execution failed: {str(e)}")
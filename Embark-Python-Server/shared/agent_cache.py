@@ -0,0 +1,89 @@
+import hashlib
+import json
+from collections import OrderedDict
+from os import getenv as os_getenv
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+from core.metrics.server_metrics import record_cache_lookup
+from models.workflow_models.workflow import Agent
+
+
+def get_response_format_schema(response_format: Any) -> Any:
+    """Return a JSON-serialisable description of a response format."""
+    if response_format is None:
+        return None
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        return response_format.model_json_schema()
+    return str(response_format)
+
+
+def get_agent_cache_key(framework: str, agent: Agent, response_format: Any = None, *extra: Any) -> str:
+    """
+    Build a canonical hash for an agent configuration.
+
+    The key covers the full `Agent` model (prompts, llm and tools), the response format
+    schema and any extra framework specific values that change the built agent.
+    """
+    payload = {
+        "framework": framework,
+        "agent": agent.model_dump(mode="json"),
+        "response_format": get_response_format_schema(response_format),
+        "extra": list(extra),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AgentCache:
+    """
+    Bounded LRU cache of built framework agents keyed by agent configuration hash.
+    """
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value and mark it as recently used."""
+        if key not in self._entries:
+            self.misses += 1
+            record_cache_lookup("agent", hit=False)
+            return None
+        self.hits += 1
+        record_cache_lookup("agent", hit=True)
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def pop(self, key: str) -> Optional[Any]:
+        """
+        Remove and return the cached value. Used by stateful frameworks so that a
+        single agent instance is never shared by two concurrent runs.
+        """
+        value = self._entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        record_cache_lookup("agent", hit=value is not None)
+        return value
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def keys(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Instantiate and use them
+agent_cache = AgentCache(max_size=int(os_getenv("AGENT_CACHE_MAX_SIZE", "128")))
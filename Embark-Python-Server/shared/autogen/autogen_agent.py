@@ -2,32 +2,91 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from core.exception.autogen_error import UnsupportedAutogenStructuredResponseError
 from core.exception.workflow_execution_exception import InvalidTeamTypeException
 from core.llm.agent_llm_providers.llm_provider_impl.autogen_llm_config import AutogenLLMProvider
-from models.workflow_models.workflow import Agent, Stdio, Tool
+from core.prompts.prompt_layout import get_agent_system_prompt
+from models.workflow_models.workflow import Agent, AutogenTermination, Stdio, TerminationMode, Tool
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.conditions import TextMentionTermination
+from autogen_agentchat.base import TerminationCondition
+from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination, TimeoutTermination, TokenUsageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat, SelectorGroupChat
-from autogen_ext.tools.mcp import StdioServerParams, mcp_server_tools, SseServerParams
+from autogen_core import CancellationToken
+from core.tracing.tracing import tracing
+from shared.agent_cache import agent_cache, get_agent_cache_key
+from shared.autogen.autogen_mcp_tools import get_autogen_mcp_tool
 from shared.base_agent import BaseAgent
 
 class AutogenAgent(BaseAgent):
+    def __init__(self):
+        super().__init__()
+        # id(assistant agent) -> cache key of the agents checked out of the agent cache
+        self._checked_out_agents: Dict[int, str] = {}
 
-    async def register_agent(self, agent: Agent):            
+    async def register_agent(self, agent: Agent):
+        # Assistant agents hold their conversation in the model context, so cached
+        # instances are checked out exclusively and reset before being returned.
+        with tracing.span("agent.build", **{"agent.name": agent.name, "agent.framework": "autogen"}) as build_span:
+            cache_key = get_agent_cache_key("autogen", agent)
+            assistant_agent = agent_cache.pop(cache_key)
+            build_span.set_attribute("agent.cache_hit", assistant_agent is not None)
+            if assistant_agent is None:
+                assistant_agent = await self.build_agent(agent)
+        self._checked_out_agents[id(assistant_agent)] = cache_key
+        return assistant_agent
+
+    async def release_agents(self, agents: List[AssistantAgent]):
+        """
+        Reset the agents checked out by `register_agent` and return them to the agent cache.
+        """
+        for assistant_agent in agents:
+            cache_key = self._checked_out_agents.pop(id(assistant_agent), None)
+            if cache_key is None:
+                continue
+            try:
+                await assistant_agent.on_reset(CancellationToken())
+            except Exception:
+                # Never reuse an agent whose state could not be cleared.
+                continue
+            agent_cache.put(cache_key, assistant_agent)
+
+    def to_framework_tool(self, tool: Tool, tool_definition):
+        return get_autogen_mcp_tool(tool.connection, tool_definition, tool.cache_ttl_seconds)
+
+    async def build_agent(self, agent: Agent):
         return AssistantAgent(
             name=agent.name,
             model_client=AutogenLLMProvider().get_llm_instance(agent.llm),
             tools=await self.get_tools(agent.tools),
             description=agent.goal,
-            system_message=f"{agent.detailed_prompt}\n\n**Your Responsibility**\n\n{agent.agent_responsibility}\n\n**Expected Output**\n\n{agent.expected_output}",
+            system_message=get_agent_system_prompt(agent),
             reflect_on_tool_use=True,
             model_client_stream=False,  # Enable streaming tokens from the model client.
         )    
     
-    def get_team(self, agents: List[AssistantAgent], execution_type: str):
-        text_termination = TextMentionTermination("TERMINATE")
-        match execution_type.lower():
-            case "round_robin":
-                return RoundRobinGroupChat(agents, termination_condition=text_termination)
-            case "selector_group_chat":
-                return SelectorGroupChat(agents, termination_condition=text_termination)
-            case _:
-                raise InvalidTeamTypeException(execution_type)
\ No newline at end of file
+    def get_termination_condition(self, termination: AutogenTermination) -> TerminationCondition:
+        conditions: List[TerminationCondition] = []
+        if termination.text_mention:
+            conditions.append(TextMentionTermination(termination.text_mention))
+        if termination.max_messages:
+            conditions.append(MaxMessageTermination(termination.max_messages))
+        if termination.timeout_seconds:
+            conditions.append(TimeoutTermination(termination.timeout_seconds))
+        if termination.max_total_tokens:
+            conditions.append(TokenUsageTermination(max_total_token=termination.max_total_tokens))
+
+        termination_condition = conditions[0]
+        for condition in conditions[1:]:
+            if termination.mode == TerminationMode.ALL:
+                termination_condition = termination_condition & condition
+            else:
+                termination_condition = termination_condition | condition
+        return termination_condition
+
+    def get_team(self, agents: List[AssistantAgent], execution_type: str, termination: Optional[AutogenTermination] = None):
+        termination_condition = self.get_termination_condition(termination or AutogenTermination())
+        with tracing.span("team.build", **{"team.type": execution_type, "team.size": len(agents)}):
+            match execution_type.lower():
+                case "round_robin":
+                    return RoundRobinGroupChat(agents, termination_condition=termination_condition)
+                case "selector_group_chat":
+                    return SelectorGroupChat(agents, termination_condition=termination_condition)
+                case _:
+                    raise InvalidTeamTypeException(execution_type)
\ No newline at end of file
@@ -0,0 +1,64 @@
+from typing import Any, Optional, Union
+
+from autogen_core import CancellationToken
+from autogen_ext.tools.mcp import SseMcpToolAdapter, SseServerParams, StdioMcpToolAdapter, StdioServerParams
+from mcp.types import Tool as McpToolDefinition
+from pydantic import BaseModel
+
+from core.metrics.server_metrics import track_mcp_session
+from models.workflow_models.workflow import Sse, Stdio
+from shared.mcp_tool_calls import get_cache_scope, get_server_key, observe_tool_call
+from shared.tool_result_cache import get_tool_result_key
+
+
+class TracedStdioMcpToolAdapter(StdioMcpToolAdapter):
+    def __init__(self, server_key: str, server_params: StdioServerParams, tool: McpToolDefinition, cache_scope: str, cache_ttl_seconds: Optional[float] = None):
+        super().__init__(server_params=server_params, tool=tool)
+        self.server_key = server_key
+        self.cache_scope = cache_scope
+        self.cache_ttl_seconds = cache_ttl_seconds
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        run = super().run
+        cache_key = (
+            get_tool_result_key("autogen", self.cache_scope, self.name, args.model_dump(exclude_unset=True))
+            if self.cache_ttl_seconds else None
+        )
+        # Adapters without a session open a new MCP session for every call.
+        with track_mcp_session():
+            return await observe_tool_call(
+                self.server_key, self.name, lambda: run(args, cancellation_token), cache_key, self.cache_ttl_seconds
+            )
+
+
+class TracedSseMcpToolAdapter(SseMcpToolAdapter):
+    def __init__(self, server_key: str, server_params: SseServerParams, tool: McpToolDefinition, cache_scope: str, cache_ttl_seconds: Optional[float] = None):
+        super().__init__(server_params=server_params, tool=tool)
+        self.server_key = server_key
+        self.cache_scope = cache_scope
+        self.cache_ttl_seconds = cache_ttl_seconds
+
+    async def run(self, args: BaseModel, cancellation_token: CancellationToken) -> Any:
+        run = super().run
+        cache_key = (
+            get_tool_result_key("autogen", self.cache_scope, self.name, args.model_dump(exclude_unset=True))
+            if self.cache_ttl_seconds else None
+        )
+        # Adapters without a session open a new MCP session for every call.
+        with track_mcp_session():
+            return await observe_tool_call(
+                self.server_key, self.name, lambda: run(args, cancellation_token), cache_key, self.cache_ttl_seconds
+            )
+
+
+def get_autogen_mcp_tool(connection: Union[Stdio, Sse], tool_definition: McpToolDefinition, cache_ttl_seconds: Optional[float] = None):
+    """Wrap a discovered MCP tool in the autogen adapter for its transport."""
+    server_key = get_server_key(connection)
+    cache_scope = get_cache_scope(connection)
+    if isinstance(connection, Stdio):
+        server_params = StdioServerParams(command=connection.command, args=connection.arguments)
+        return TracedStdioMcpToolAdapter(server_key, server_params, tool_definition, cache_scope, cache_ttl_seconds)
+
+    headers = {"Authorization": f"Bearer {connection.bearer_token}"} if connection.bearer_token else None
+    server_params = SseServerParams(url=connection.connection_url, headers=headers)
+    return TracedSseMcpToolAdapter(server_key, server_params, tool_definition, cache_scope, cache_ttl_seconds)
@@ -1,82 +1,69 @@
+import asyncio
 from abc import ABC, abstractmethod
 from models.workflow_models.workflow import Agent
 from contextlib import AsyncExitStack
-from typing import Dict, List, Optional, Tuple, Union
-from models.workflow_models.workflow import Stdio, Tool
-from mcp import StdioServerParameters, ClientSession, stdio_client
-from mcp.client.sse import sse_client
+from typing import Any, Dict, List, Optional, Union
+from models.workflow_models.workflow import Sse, Stdio, Tool
+from mcp.types import Tool as McpToolDefinition
+from core.metrics.server_metrics import record_cache_lookup
+from core.tracing.tracing import tracing
+from shared.mcp_tool_calls import get_server_key, open_mcp_session
 
 class BaseAgent(ABC):
     def __init__(self):
-        self._tool_cache: Dict[Tuple[str, Union[str, None]], List] = {}
+        self._tool_cache: Dict[str, List[McpToolDefinition]] = {}
+        self._tool_discoveries: Dict[str, asyncio.Future] = {}
 
     @abstractmethod
     async def register_agent(self, agent: Agent):
         ...
 
-    async def get_tools(self, tools: Optional[List[Tool]] = None) -> List:
-        if tools is None:
-            return []
-        
-        tools_list = []
-
-        for stdio_sse_tool in tools:
-            cache_key = None
-            tools_result = None
-
-            if isinstance(stdio_sse_tool.connection, Stdio):
-                server_params=StdioServerParameters(
-                    command=stdio_sse_tool.connection.command,
-                    args=stdio_sse_tool.connection.arguments,
-                )
+    def to_framework_tool(self, tool: Tool, tool_definition: McpToolDefinition) -> Any:
+        """
+        Convert a discovered MCP tool definition to the tool type of the agent framework.
+        Implementations route tool calls through `shared.mcp_tool_calls` so they are traced.
+        """
+        return tool_definition
 
-                # Create a hashable cache key for stdio
-                cache_key = ("stdio", server_params.command, tuple(server_params.args))
+    async def list_server_tools(self, cache_key: str, connection: Union[Sse, Stdio]) -> List[McpToolDefinition]:
+        with tracing.span("mcp.list_tools", **{"mcp.server": cache_key}):
+            async with AsyncExitStack() as exit_stack:
+                session = await open_mcp_session(exit_stack, connection)
+                result = await session.list_tools()
+        self._tool_cache[cache_key] = result.tools
+        return result.tools
 
-            else:
-                # Create a hashable cache key for SSE
-                cache_key = (
-                    "sse",
-                    stdio_sse_tool.connection.connection_url,
-                )
+    async def discover_tools(self, connection: Union[Sse, Stdio]) -> List[McpToolDefinition]:
+        """
+        The tool definitions of a server, listed once per agent instance. Agents built
+        concurrently wait for the discovery already in flight instead of starting their own.
+        """
+        cache_key = get_server_key(connection)
 
-            # Check the cache
-            if cache_key in self._tool_cache:
-                tools_result = self._tool_cache[cache_key]
-            else:
-                if isinstance(stdio_sse_tool.connection, Stdio):
-                    exit_stack = AsyncExitStack()
-                    stdio_transport = await exit_stack.enter_async_context(
-                        stdio_client(server_params)
-                    )
-                    stdio, write = stdio_transport
-                    session = await exit_stack.enter_async_context(ClientSession(stdio, write))
-                    await session.initialize()
+        # Check the cache
+        record_cache_lookup("mcp_tool_definitions", hit=cache_key in self._tool_cache)
+        if cache_key in self._tool_cache:
+            return self._tool_cache[cache_key]
 
-                    result = await session.list_tools()
-                    tools_result = result.tools
-                    self._tool_cache[cache_key] = tools_result
-                    await exit_stack.aclose()
-                else:
-                    exit_stack = AsyncExitStack()
-                    streams_context = sse_client(url=stdio_sse_tool.connection.connection_url)
-                    streams = await streams_context.__aenter__()
-                    session_context = ClientSession(*streams)
-                    session = await session_context.__aenter__()
-                    await session.initialize()
+        discovery = self._tool_discoveries.get(cache_key)
+        if discovery is None:
+            discovery = asyncio.ensure_future(self.list_server_tools(cache_key, connection))
+            self._tool_discoveries[cache_key] = discovery
+            discovery.add_done_callback(lambda _: self._tool_discoveries.pop(cache_key, None))
+        # A cancelled agent build must not cancel the discovery other builds wait for
+        return await asyncio.shield(discovery)
 
-                    result = await session.list_tools()
-                    tools_result = result.tools
-                    self._tool_cache[cache_key] = tools_result
-
-                    await session_context.__aexit__()
-                    await streams_context.__aexit__()
-                    await exit_stack.aclose()
+    async def get_tools(self, tools: Optional[List[Tool]] = None) -> List:
+        if tools is None:
+            return []
 
+        # Every server of the agent is discovered concurrently
+        tool_definitions = await asyncio.gather(*(self.discover_tools(tool.connection) for tool in tools))
 
-            for tool in tools_result:
+        tools_list = []
+        for stdio_sse_tool, server_tools in zip(tools, tool_definitions):
+            for tool in server_tools:
                 if tool.name == stdio_sse_tool.name:
-                    tools_list.append(tool)
+                    tools_list.append(self.to_framework_tool(stdio_sse_tool, tool))
 
         return tools_list
-    
\ No newline at end of file
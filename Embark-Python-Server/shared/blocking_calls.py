@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import getenv as os_getenv
+from typing import Any, Callable
+
+from core.metrics.server_metrics import blocking_call_duration_seconds, blocking_calls_in_flight
+
+
+class BlockingCallPool:
+    """
+    Sized thread pool for framework calls known to block, such as starting a CrewAI MCP
+    adapter or a crew kickoff. Running them here keeps the event loop free for every other
+    request, and the pool size bounds how many of them run at once instead of sharing the
+    default executor with everything else. Context variables (run id, node, token account)
+    follow the call into the thread.
+    """
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"embark-{name}")
+
+    def submit(self, call_name: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        context = contextvars.copy_context()
+        submitted_at = time.perf_counter()
+        blocking_calls_in_flight.labels(self.name).inc()
+
+        def run():
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                blocking_calls_in_flight.labels(self.name).dec()
+                blocking_call_duration_seconds.labels(call_name).observe(time.perf_counter() - submitted_at)
+
+        return self.executor.submit(run)
+
+    async def run(self, call_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func` on the pool and wait for it without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(call_name, func, *args, **kwargs))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instantiate and use them
+# Short blocking I/O: MCP adapter start and stop
+blocking_io_pool = BlockingCallPool("io", max_workers=int(os_getenv("BLOCKING_IO_THREADS", "8")))
+# A CrewAI crew holds its thread for the whole kickoff, including its LLM and tool calls
+crew_kickoff_pool = BlockingCallPool("crew", max_workers=int(os_getenv("CREW_KICKOFF_THREADS", "16")))
@@ -0,0 +1,42 @@
+import re
+from typing import Optional, Tuple
+
+BYTE_RANGE = re.compile(r"bytes=\s*([0-9]*)\s*-\s*([0-9]*)", re.ASCII)
+
+
+class UnsatisfiableRange(Exception):
+    """The requested range has no bytes in the content, e.g. it starts beyond its end."""
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single-range `Range: bytes=...` header for content of `size`
+    bytes. None when there is no header or it cannot be used (other units, several ranges,
+    malformed), the whole content is sent then. Raises UnsatisfiableRange for a 416.
+    """
+    match = BYTE_RANGE.fullmatch(header.strip()) if header else None
+    if match is None or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range, the last `last` bytes; empty content has no last bytes to send
+        length = int(last)
+        if length == 0 or size == 0:
+            raise UnsatisfiableRange()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise UnsatisfiableRange()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def accepts_encoding(header: Optional[str], encoding: str) -> bool:
+    """Whether an `Accept-Encoding` header lists `encoding` without q=0."""
+    for part in (header or "").split(","):
+        name, _, parameters = part.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return parameters.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
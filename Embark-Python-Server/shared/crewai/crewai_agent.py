@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from contextlib import AsyncExitStack
 from crewai import Agent, Crew, Process, Task
 from crewai.llm import LLM
@@ -9,40 +11,85 @@ from models.workflow_models.workflow import Agent as WorkflowAgent
 from mcp import StdioServerParameters, ClientSession, stdio_client
 from mcp.client.sse import sse_client
 from crewai_tools import MCPServerAdapter
+from core.tracing.tracing import tracing
+from shared.agent_cache import agent_cache, get_agent_cache_key
+from shared.blocking_calls import blocking_io_pool
 from shared.base_agent import BaseAgent
+from shared.crewai.crewai_mcp_tools import get_adapter_server_key, get_traced_crewai_tools
+from os import getenv as os_getenv
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Verbose crews print every step to the console from the kickoff thread
+CREWAI_VERBOSE = os_getenv("CREWAI_VERBOSE", "false").lower() == "true"
+
+# The MCP adapter is shared by every CrewAI node, it never starts while a stop is still running
+mcp_adapter_lock = threading.Lock()
+
+
+def start_mcp_adapter(adapter: MCPServerAdapter):
+    with mcp_adapter_lock:
+        adapter.start()
+
+
+def stop_mcp_adapter(adapter: MCPServerAdapter):
+    with mcp_adapter_lock:
+        adapter.stop()
+
+
 class CrewAIAgent(BaseAgent):
 
     def __init__(self, mcp_adapter: MCPServerAdapter = None):
         self.mcp_server_adapter:MCPServerAdapter = None
         if mcp_adapter:
             self.mcp_server_adapter = mcp_adapter
-        
+        # Started once per run and shared by the agents built concurrently
+        self._adapter_start: Optional[asyncio.Future] = None
+
+    async def start_adapter(self):
+        with tracing.span("mcp.adapter_start"):
+            await blocking_io_pool.run("mcp.adapter_start", start_mcp_adapter, self.mcp_server_adapter)
+        return self.mcp_server_adapter.tools
 
     async def get_tools(self, tools: Optional[List[Tool]] = None) -> List:
         # TODO tool management Just for testing
 
         try:
-            self.mcp_server_adapter.start()
-            mcp_tools = self.mcp_server_adapter.tools
+            if self._adapter_start is None:
+                self._adapter_start = asyncio.ensure_future(self.start_adapter())
+            mcp_tools = await asyncio.shield(self._adapter_start)
             print(f"Available tools (manual SSE): {[tool.name for tool in tools]}")
-            return mcp_tools
+            cache_ttls = {tool.name: tool.cache_ttl_seconds for tool in tools or []}
+            return get_traced_crewai_tools(get_adapter_server_key(self.mcp_server_adapter), mcp_tools, cache_ttls)
         except Exception as e:
             logger.error(str(e))
 
+    def get_agent_template(self, agent: WorkflowAgent) -> Agent:
+        # CrewAI agents keep executor and tool handler state, so the cached agent is only
+        # used as a template and every run receives its own copy.
+        with tracing.span("agent.build", **{"agent.name": agent.name, "agent.framework": "crewai"}) as build_span:
+            cache_key = get_agent_cache_key("crewai", agent)
+            agent_template: Agent = agent_cache.get(cache_key)
+            build_span.set_attribute("agent.cache_hit", agent_template is not None)
+            if agent_template is None:
+                agent_template = Agent(
+                    role=agent.name,
+                    goal=agent.goal,
+                    backstory=agent.detailed_prompt,
+                    llm=CrewAILLMProvider().get_llm_instance(llm=agent.llm),
+                    verbose=False,
+                    tools=[],
+                    config=None
+                )
+                agent_cache.put(cache_key, agent_template)
+            return agent_template
+
     async def register_agent(self, agent: WorkflowAgent):
-        return Agent(
-            role=agent.name,
-            goal=agent.goal,
-            backstory=agent.detailed_prompt,
-            llm=CrewAILLMProvider().get_llm_instance(llm=agent.llm),
-            verbose=False,
-            tools=await self.get_tools(agent.tools),
-            config=None
-        )
+        crew_ai_agent = self.get_agent_template(agent).copy()
+        # The MCP adapter is stopped at the end of every run, so tools are bound per run.
+        crew_ai_agent.tools = await self.get_tools(agent.tools) or []
+        return crew_ai_agent
 
     async def register_task(self, agent_config: WorkflowAgent, crew_ai_agent: Agent, response_format: Optional[Any] = None):
         return Task(
@@ -64,11 +111,12 @@ class CrewAIAgent(BaseAgent):
                 raise InvalidProcessTypeException(process_type=process_type)
             
     async def get_crew(self, crew_agents:List[Agent], tasks:List[Task], crew_ai_process_type=Process.sequential, manager_agent:Agent=None, manager_llm:LLM=None):
-        return Crew(
-            agents=crew_agents,
-            tasks=tasks,
-            process=crew_ai_process_type,
-            verbose=True,
-            manager_agent=manager_agent,
-            manager_llm=manager_llm
-        )
+        with tracing.span("crew.build", **{"crew.size": len(crew_agents), "crew.process": str(crew_ai_process_type)}):
+            return Crew(
+                agents=crew_agents,
+                tasks=tasks,
+                process=crew_ai_process_type,
+                verbose=CREWAI_VERBOSE,
+                manager_agent=manager_agent,
+                manager_llm=manager_llm
+            )
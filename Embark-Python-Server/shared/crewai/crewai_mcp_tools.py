@@ -0,0 +1,56 @@
+from typing import Any, Dict, List, Optional
+
+from crewai.tools import BaseTool
+from crewai_tools import MCPServerAdapter
+from pydantic import ConfigDict
+
+from shared.mcp_tool_calls import observe_tool_call_sync
+from shared.tool_result_cache import get_tool_result_key
+
+
+class TracedCrewAITool(BaseTool):
+    """Delegates to a tool of the crewai MCP adapter and records each call as a tool call span."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner_tool: BaseTool
+    server_key: str
+    cache_ttl_seconds: Optional[float] = None
+
+    def _generate_description(self):
+        # The description of the wrapped tool is already formatted.
+        ...
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        cache_key = (
+            get_tool_result_key("crewai", self.server_key, self.name, kwargs)
+            if self.cache_ttl_seconds and not args else None
+        )
+        return observe_tool_call_sync(
+            self.server_key, self.name, lambda: self.inner_tool._run(*args, **kwargs), cache_key, self.cache_ttl_seconds
+        )
+
+
+def get_adapter_server_key(mcp_server_adapter: MCPServerAdapter) -> str:
+    server_params = mcp_server_adapter._serverparams
+    if isinstance(server_params, dict):
+        return f"sse:{server_params.get('url')}"
+    return "stdio:" + " ".join([server_params.command, *server_params.args])
+
+
+def get_traced_crewai_tools(
+    server_key: str,
+    tools: List[BaseTool],
+    cache_ttls: Optional[Dict[str, Optional[float]]] = None,
+) -> List[BaseTool]:
+    """Wrap the adapter tools, `cache_ttls` holds the `Tool.cache_ttl_seconds` of each tool by name."""
+    return [
+        TracedCrewAITool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            inner_tool=tool,
+            server_key=server_key,
+            cache_ttl_seconds=(cache_ttls or {}).get(tool.name),
+        )
+        for tool in tools
+    ]
@@ -0,0 +1,60 @@
+import json
+from functools import lru_cache
+from typing import Any, List, Sequence, Union
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_default(value: Any) -> Any:
+    """Values neither orjson nor the stdlib encoder handle natively."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps_bytes(value: Any, sort_keys: bool = False) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed and the stdlib encoder otherwise."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(value, default=encode_default, option=option)
+    return json.dumps(
+        value, default=encode_default, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    return dumps_bytes(value, sort_keys=sort_keys).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def get_list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def dump_models_json(model: type, items: Sequence[BaseModel]) -> bytes:
+    """Serialize a list of models straight to JSON with pydantic, without building dicts first."""
+    return get_list_adapter(model).dump_json(items)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with `dumps_bytes` instead of `json.dumps`."""
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+class RawJSONResponse(JSONResponse):
+    """JSON response for a body that is already serialized."""
+    def render(self, content: bytes) -> bytes:
+        return content
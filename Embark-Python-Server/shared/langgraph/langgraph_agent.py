@@ -9,24 +9,37 @@ from core.llm.agent_llm_providers.llm_provider_impl.langgraph_llm_config import
 from core.prompts.manager_prompt import REFLECTION_AGENT_PROMPT
 from models.workflow_models.workflow import LLM, Agent, Stdio, Tool, Workflow
 
+from langchain_core.messages import SystemMessage
 from langgraph.prebuilt import create_react_agent
+from core.llm.prompt_caching import get_system_content
+from core.prompts.prompt_layout import get_agent_system_prompt
+from core.tracing.tracing import tracing
+from shared.agent_cache import agent_cache, get_agent_cache_key
 from shared.base_agent import BaseAgent
+from shared.langgraph.langgraph_mcp_tools import get_langgraph_mcp_tool
 
 class LangGraphAgent(BaseAgent):
 
+    def to_framework_tool(self, tool: Tool, tool_definition):
+        return get_langgraph_mcp_tool(tool.connection, tool_definition, tool.cache_ttl_seconds)
+
     async def register_agent(self, agent: Agent, response_format: Optional[Any] = None):
+        with tracing.span("agent.build", **{"agent.name": agent.name, "agent.framework": "langgraph"}) as build_span:
+            # Compiled graphs without a checkpointer keep no state between invocations,
+            # so a single compiled graph can be shared by every run with the same config.
+            cache_key = get_agent_cache_key("langgraph", agent, response_format)
+            compiled_agent = agent_cache.get(cache_key)
+            build_span.set_attribute("agent.cache_hit", compiled_agent is not None)
+            if compiled_agent is None:
+                compiled_agent = await self.build_agent(agent, response_format)
+                agent_cache.put(cache_key, compiled_agent)
+            return compiled_agent
+
+    async def build_agent(self, agent: Agent, response_format: Optional[Any] = None):
         return create_react_agent(
             name=agent.name,
             response_format=response_format,
             model=LangGraphLLMProvider().get_llm_instance(llm=agent.llm),
             tools= await self.get_tools(agent.tools),
-            prompt=f"""**Goal**: {agent.goal}.
-{agent.detailed_prompt}
-
-**Responsibilities**
-{agent.agent_responsibility}
-
-**Expected Output**
-{agent.expected_output}
-"""
+            prompt=SystemMessage(content=get_system_content(agent.llm.provider, get_agent_system_prompt(agent))),
         )
\ No newline at end of file
@@ -0,0 +1,29 @@
+from typing import Any, Optional, Union
+
+from langchain_core.tools import StructuredTool, ToolException
+from mcp.types import Tool as McpToolDefinition
+
+from models.workflow_models.workflow import Sse, Stdio
+from shared.mcp_tool_calls import call_mcp_tool
+
+
+def get_langgraph_mcp_tool(
+    connection: Union[Stdio, Sse],
+    tool_definition: McpToolDefinition,
+    cache_ttl_seconds: Optional[float] = None,
+) -> StructuredTool:
+    """Expose a discovered MCP tool as a langchain tool usable by the react agent's ToolNode."""
+    async def call_tool(**arguments: Any) -> str:
+        result = await call_mcp_tool(connection, tool_definition.name, arguments, cache_ttl_seconds)
+        text = "\n".join(content.text for content in result.content if hasattr(content, "text"))
+        if result.isError:
+            raise ToolException(text)
+        return text
+
+    return StructuredTool(
+        name=tool_definition.name,
+        description=tool_definition.description or "",
+        args_schema=tool_definition.inputSchema,
+        coroutine=call_tool,
+        handle_tool_error=True,
+    )
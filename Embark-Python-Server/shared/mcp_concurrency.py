@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from os import getenv as os_getenv
+from typing import AsyncIterator, Dict, Iterator
+from weakref import WeakKeyDictionary
+
+
+class ServerConcurrencyLimits:
+    """
+    Bounds the tool calls in flight to each MCP server. Autogen and LangGraph run the tool
+    calls of one model turn concurrently and return their results in call order; this keeps
+    such fan-outs, summed over every run of the process, from overwhelming a server. Calls
+    over the limit wait in arrival order. Calls made from framework threads (crewai) are
+    bounded by a separate limit per server.
+    """
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        # asyncio semaphores belong to the loop they are first used on
+        self._semaphores: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = WeakKeyDictionary()
+        self._thread_semaphores: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def set_max_concurrency(self, max_concurrency: int):
+        """Change the limit, calls holding a slot of the previous limit are not counted against it."""
+        with self._lock:
+            self.max_concurrency = max_concurrency
+            self._semaphores = WeakKeyDictionary()
+            self._thread_semaphores = {}
+
+    @asynccontextmanager
+    async def acquire(self, server_key: str) -> AsyncIterator[float]:
+        """Hold a call slot of the server, yielding how long the call waited for it."""
+        if not self.max_concurrency:
+            yield 0.0
+            return
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        semaphore = semaphores.setdefault(server_key, asyncio.Semaphore(self.max_concurrency))
+        started_at = time.perf_counter()
+        async with semaphore:
+            yield time.perf_counter() - started_at
+
+    @contextmanager
+    def acquire_sync(self, server_key: str) -> Iterator[float]:
+        if not self.max_concurrency:
+            yield 0.0
+            return
+        with self._lock:
+            semaphore = self._thread_semaphores.setdefault(server_key, threading.Semaphore(self.max_concurrency))
+        started_at = time.perf_counter()
+        with semaphore:
+            yield time.perf_counter() - started_at
+
+
+# Instantiate and use them
+# 0 removes the limit
+mcp_server_limits = ServerConcurrencyLimits(max_concurrency=int(os_getenv("MCP_SERVER_MAX_CONCURRENCY", "8")))
@@ -0,0 +1,115 @@
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from mcp import ClientSession, StdioServerParameters, stdio_client
+from mcp.client.sse import sse_client
+from mcp.types import CallToolResult
+
+from core.metrics.server_metrics import track_mcp_session
+from core.runs.run_cancellation import raise_if_cancelled
+from core.tracing.tracing import tracing
+from models.workflow_models.workflow import Sse, Stdio
+from shared.mcp_concurrency import mcp_server_limits
+from shared.tool_result_cache import get_tool_result_key, tool_result_cache
+
+
+def get_server_key(connection: Union[Stdio, Sse]) -> str:
+    """Stable identifier of the MCP server behind a tool connection."""
+    if isinstance(connection, Stdio):
+        return "stdio:" + " ".join([connection.command, *connection.arguments])
+    return f"sse:{connection.connection_url}"
+
+
+def get_cache_scope(connection: Union[Stdio, Sse]) -> str:
+    """Server key plus credentials, cached results are not shared between bearer tokens."""
+    if isinstance(connection, Sse) and connection.bearer_token:
+        return f"{get_server_key(connection)} {connection.bearer_token}"
+    return get_server_key(connection)
+
+
+async def open_mcp_session(exit_stack: AsyncExitStack, connection: Union[Stdio, Sse]) -> ClientSession:
+    """Open and initialise a client session that is closed together with `exit_stack`."""
+    if isinstance(connection, Stdio):
+        server_params = StdioServerParameters(command=connection.command, args=connection.arguments)
+        streams = await exit_stack.enter_async_context(stdio_client(server_params))
+    else:
+        headers = {"Authorization": f"Bearer {connection.bearer_token}"} if connection.bearer_token else None
+        streams = await exit_stack.enter_async_context(sse_client(url=connection.connection_url, headers=headers))
+    session = await exit_stack.enter_async_context(ClientSession(*streams))
+    exit_stack.enter_context(track_mcp_session())
+    await session.initialize()
+    return session
+
+
+def is_error_result(result: Any) -> bool:
+    # Frameworks that raise on tool errors never get here with one
+    return isinstance(result, CallToolResult) and result.isError
+
+
+async def observe_tool_call(
+    server_key: str,
+    tool_name: str,
+    invoke: Callable[[], Awaitable[Any]],
+    cache_key: Optional[str] = None,
+    cache_ttl_seconds: Optional[float] = None,
+) -> Any:
+    """
+    Run an MCP tool call made by any framework inside a tool call span, within the
+    concurrency limit of its server. With a `cache_key` (see `get_tool_result_key`), a
+    cached result is returned without calling the server.
+    """
+    raise_if_cancelled()
+    with tracing.span("mcp.tool_call", **{"mcp.server": server_key, "mcp.tool": tool_name}) as span:
+        if cache_key is not None:
+            found, result = tool_result_cache.get(cache_key)
+            span.set_attribute("mcp.cache_hit", found)
+            if found:
+                return result
+        async with mcp_server_limits.acquire(server_key) as wait_seconds:
+            span.set_attribute("mcp.wait_seconds", wait_seconds)
+            result = await invoke()
+        if cache_key is not None and not is_error_result(result):
+            tool_result_cache.put(cache_key, result, cache_ttl_seconds)
+        return result
+
+
+def observe_tool_call_sync(
+    server_key: str,
+    tool_name: str,
+    invoke: Callable[[], Any],
+    cache_key: Optional[str] = None,
+    cache_ttl_seconds: Optional[float] = None,
+) -> Any:
+    """Synchronous variant of `observe_tool_call` for frameworks running tools in threads."""
+    raise_if_cancelled()
+    with tracing.span("mcp.tool_call", **{"mcp.server": server_key, "mcp.tool": tool_name}) as span:
+        if cache_key is not None:
+            found, result = tool_result_cache.get(cache_key)
+            span.set_attribute("mcp.cache_hit", found)
+            if found:
+                return result
+        with mcp_server_limits.acquire_sync(server_key) as wait_seconds:
+            span.set_attribute("mcp.wait_seconds", wait_seconds)
+            result = invoke()
+        if cache_key is not None and not is_error_result(result):
+            tool_result_cache.put(cache_key, result, cache_ttl_seconds)
+        return result
+
+
+async def call_mcp_tool(
+    connection: Union[Stdio, Sse],
+    tool_name: str,
+    arguments: Dict[str, Any],
+    cache_ttl_seconds: Optional[float] = None,
+) -> CallToolResult:
+    """
+    Call a tool on the MCP server of `connection` using a short lived session. Successful
+    results are cached for `cache_ttl_seconds` when it is set.
+    """
+    async def invoke():
+        async with AsyncExitStack() as exit_stack:
+            session = await open_mcp_session(exit_stack, connection)
+            return await session.call_tool(name=tool_name, arguments=arguments)
+
+    cache_key = get_tool_result_key("call_tool_result", get_cache_scope(connection), tool_name, arguments) if cache_ttl_seconds else None
+    return await observe_tool_call(get_server_key(connection), tool_name, invoke, cache_key, cache_ttl_seconds)
@@ -0,0 +1,93 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class PartialJsonObject:
+    """
+    Incremental parser for a JSON object that arrives in chunks, e.g. the arguments of a
+    streamed structured-output tool call. Top-level fields are available in `fields` as
+    soon as their value is complete, long before the closing brace of the object.
+    Text before the opening brace (such as a markdown fence) is skipped.
+    """
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        # At depth 1: "key", "colon", "value" or "next" (after a value, before ",")
+        self.expecting = "key"
+        self.key_start: Optional[int] = None
+        self.key: Optional[str] = None
+        self.value_start: Optional[int] = None
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+
+    def complete_field(self, value_end: int) -> Optional[str]:
+        key, raw_value = self.key, self.text[self.value_start:value_end]
+        self.value_start = None
+        self.expecting = "next"
+        try:
+            self.fields[key] = json.loads(raw_value)
+        except ValueError:
+            return None
+        return key
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk of text and return the names of the fields it completed."""
+        completed: List[str] = []
+        self.text += chunk
+        text = self.text
+        for index in range(self.position, len(text)):
+            if self.complete:
+                break
+            char = text[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.expecting == "key":
+                        self.key = json.loads(text[self.key_start:index + 1])
+                        self.expecting = "colon"
+                    elif self.depth == 1 and self.expecting == "value":
+                        completed.append(self.complete_field(index + 1))
+                continue
+            if char.isspace():
+                continue
+            if self.depth == 0:
+                if char == "{":
+                    self.depth = 1
+                continue
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expecting == "key":
+                    self.key_start = index
+                elif self.depth == 1 and self.expecting == "value" and self.value_start is None:
+                    self.value_start = index
+            elif char in "{[":
+                if self.depth == 1 and self.expecting == "value" and self.value_start is None:
+                    self.value_start = index
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1 and self.value_start is not None:
+                    completed.append(self.complete_field(index + 1))
+                elif self.depth == 0:
+                    # Closing brace right after a number, boolean or null
+                    if self.value_start is not None:
+                        completed.append(self.complete_field(index))
+                    self.complete = True
+            elif self.depth == 1:
+                if char == ":" and self.expecting == "colon":
+                    self.expecting = "value"
+                elif char == ",":
+                    if self.value_start is not None:
+                        completed.append(self.complete_field(index))
+                    self.expecting = "key"
+                elif self.expecting == "value" and self.value_start is None:
+                    self.value_start = index
+        self.position = len(text)
+        return [key for key in completed if key is not None]
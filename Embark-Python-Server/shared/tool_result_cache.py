@@ -0,0 +1,67 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from os import getenv as os_getenv
+from typing import Any, Dict, Optional, Tuple
+
+from core.metrics.server_metrics import record_cache_lookup
+
+
+def get_tool_result_key(result_kind: str, server_scope: str, tool_name: str, arguments: Optional[Dict[str, Any]]) -> str:
+    """
+    Canonical hash of a tool call. `result_kind` separates the result types the frameworks
+    cache for the same call (e.g. an MCP CallToolResult or autogen content list).
+    """
+    payload = {"kind": result_kind, "server": server_scope, "tool": tool_name, "arguments": arguments or {}}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """
+    Bounded LRU cache of MCP tool call results with a TTL per entry, shared by every run of
+    the process. Only tools that opt in with `Tool.cache_ttl_seconds` are cached, which must
+    be read-only lookups. Errors are never cached. Thread safe, crewai calls tools from
+    kickoff threads.
+    """
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Whether a live entry exists and its value, a tool may return None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        record_cache_lookup("mcp_tool_results", hit=entry is not None)
+        return (True, entry[1]) if entry is not None else (False, None)
+
+    def put(self, key: str, value: Any, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Instantiate and use them
+tool_result_cache = ToolResultCache(max_entries=int(os_getenv("TOOL_RESULT_CACHE_MAX_ENTRIES", "1024")))
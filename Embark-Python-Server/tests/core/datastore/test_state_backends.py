@@ -0,0 +1,276 @@
+import contextlib
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from core.datastore.datastore import StatusInterface
+from core.datastore.redis_state_backend import RedisStateBackend, RespClient
+from core.datastore.state_backend import InMemoryStateBackend, SQLiteStateBackend
+from models.status_models.status import StatusQuery, WorkflowItem, WorkflowStatus
+
+SERVER_ROOT = Path(__file__).resolve().parents[3]
+
+
+def get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise TimeoutError(f"Redis stand-in server did not start on port {port}")
+
+
+@contextlib.contextmanager
+def redis_stand_in(port: int):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmark.redis_stand_in_server", "--port", str(port)],
+        cwd=SERVER_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """The in-repo Redis-protocol stand-in, shared by the tests of this module."""
+    with redis_stand_in(get_free_port()) as url:
+        yield url
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    match request.param:
+        case "memory":
+            yield InMemoryStateBackend()
+        case "sqlite":
+            yield SQLiteStateBackend(str(tmp_path / "state.db"))
+        case "redis":
+            # Every test gets keys of its own on the shared server
+            backend = RedisStateBackend(RespClient.from_url(request.getfixturevalue("redis_url")), prefix=f"test-{uuid4().hex}:")
+            yield backend
+            backend.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_values(backend):
+    assert backend.get("missing") is None
+    backend.set("key", "value")
+    assert backend.get("key") == "value"
+    assert [backend.incr("counter") for _ in range(3)] == [1, 2, 3]
+    backend.delete("key")
+    assert backend.get("key") is None
+
+
+def test_hashes(backend):
+    backend.hset("hash", "a", "1")
+    backend.hset("hash", "b", "2")
+    backend.hset("hash", "a", "3")
+
+    assert backend.hget("hash", "a") == "3"
+    assert backend.hgetall("hash") == {"a": "3", "b": "2"}
+    assert backend.hmget("hash", ["b", "missing", "a"]) == ["2", None, "3"]
+    assert backend.hmget("hash", []) == []
+    backend.hdel("hash", "a")
+    assert backend.hgetall("hash") == {"b": "2"}
+
+
+def test_sorted_sets(backend):
+    for member, score in [("c", 3), ("a", 1), ("b", 2), ("d", 4)]:
+        backend.zadd("set", member, score)
+    backend.zadd("set", "a", 5)
+    backend.zrem("set", "d")
+    backend.zadd_many(["set", "other"], "e", 6)
+
+    assert backend.zrange_by_score("set") == [("b", 2.0), ("c", 3.0), ("a", 5.0), ("e", 6.0)]
+    assert backend.zrange_by_score("set", after=2, before=6) == [("c", 3.0), ("a", 5.0)]
+    assert backend.zrange_by_score("set", reverse=True, limit=2) == [("e", 6.0), ("a", 5.0)]
+    assert backend.zrange_by_score("set", before=5, reverse=True) == [("c", 3.0), ("b", 2.0)]
+    assert backend.zrange_by_score("other") == [("e", 6.0)]
+    assert backend.zrange_by_score("missing") == []
+
+
+def add(status: StatusInterface, run_id: str, name: str, item_status: WorkflowStatus = WorkflowStatus.SCHEDULED):
+    status.add_item(WorkflowItem(run_id=run_id, name=name, status=item_status))
+
+
+def update(status: StatusInterface, run_id: str, name: str, item_status: WorkflowStatus):
+    status.update_item(WorkflowItem(run_id=run_id, name=name, status=item_status))
+
+
+def names(page) -> list:
+    return [(item.run_id, item.name) for item in page.items]
+
+
+def test_items_are_kept_per_run(backend):
+    status = StatusInterface(backend)
+    add(status, "run-1", "report")
+    add(status, "run-2", "report")
+
+    update(status, "run-2", "report", WorkflowStatus.COMPLETED)
+    update(status, "run-3", "report", WorkflowStatus.FAILED)
+
+    assert [(item.run_id, item.status) for item in status.get_status()] == [
+        ("run-1", WorkflowStatus.SCHEDULED),
+        ("run-2", WorkflowStatus.COMPLETED),
+    ]
+
+
+def test_every_change_takes_the_next_version(backend):
+    status = StatusInterface(backend)
+    assert status.get_version() == 0
+
+    add(status, "run-1", "report")
+    update(status, "run-1", "report", WorkflowStatus.RUNNING)
+    page = status.query(StatusQuery())
+
+    assert status.get_version() == 2
+    assert page.version == 2
+    assert page.items[0].version == 2
+    # Reads leave the version, and with it the ETag, unchanged
+    assert status.get_version() == 2
+
+
+def test_query_pages_newest_first(backend):
+    status = StatusInterface(backend)
+    for index in range(5):
+        add(status, f"run-{index}", "report")
+
+    first = status.query(StatusQuery(limit=2))
+    second = status.query(StatusQuery(limit=2, cursor=first.next_cursor))
+    last = status.query(StatusQuery(limit=2, cursor=second.next_cursor))
+
+    assert names(first) == [("run-4", "report"), ("run-3", "report")]
+    assert names(second) == [("run-2", "report"), ("run-1", "report")]
+    assert names(last) == [("run-0", "report")]
+    assert last.next_cursor is None
+
+
+def test_query_filters(backend, clock):
+    status = StatusInterface(backend)
+    add(status, "run-1", "report")
+    add(status, "run-1", "summary")
+    add(status, "run-2", "report")
+    clock[0] += 10
+    update(status, "run-1", "report", WorkflowStatus.COMPLETED)
+    update(status, "run-2", "report", WorkflowStatus.FAILED)
+
+    assert names(status.query(StatusQuery(run_id="run-1"))) == [("run-1", "summary"), ("run-1", "report")]
+    assert names(status.query(StatusQuery(name="report"))) == [("run-2", "report"), ("run-1", "report")]
+    assert names(status.query(StatusQuery(status=[WorkflowStatus.COMPLETED]))) == [("run-1", "report")]
+    assert names(status.query(StatusQuery(status=[WorkflowStatus.COMPLETED, WorkflowStatus.SCHEDULED]))) == [
+        ("run-1", "summary"),
+        ("run-1", "report"),
+    ]
+    assert names(status.query(StatusQuery(name="report", status=[WorkflowStatus.SCHEDULED]))) == []
+    assert names(status.query(StatusQuery(updated_after=clock[0] - 5))) == [("run-2", "report"), ("run-1", "report")]
+    assert names(status.query(StatusQuery(updated_before=clock[0] - 5))) == [("run-1", "summary")]
+
+
+def test_query_since_version_returns_changes_oldest_first(backend):
+    status = StatusInterface(backend)
+    add(status, "run-1", "report")
+    add(status, "run-1", "summary")
+    add(status, "run-2", "report")
+    version = status.get_version()
+    update(status, "run-1", "report", WorkflowStatus.RUNNING)
+    update(status, "run-2", "report", WorkflowStatus.RUNNING)
+    update(status, "run-1", "summary", WorkflowStatus.RUNNING)
+
+    first = status.query(StatusQuery(since_version=version, limit=2))
+    rest = status.query(StatusQuery(since_version=version, limit=2, cursor=first.next_cursor))
+
+    assert names(first) == [("run-1", "report"), ("run-2", "report")]
+    assert names(rest) == [("run-1", "summary")]
+    assert rest.next_cursor is None
+    assert names(status.query(StatusQuery(since_version=version, run_id="run-1"))) == [("run-1", "report"), ("run-1", "summary")]
+    assert status.query(StatusQuery(since_version=status.get_version())).items == []
+
+
+def test_prune_removes_finished_items_past_retention(backend, clock):
+    status = StatusInterface(backend, retention_seconds=3600)
+    add(status, "run-1", "done")
+    add(status, "run-1", "running")
+    update(status, "run-1", "done", WorkflowStatus.COMPLETED)
+    clock[0] += 3600 + 60
+
+    add(status, "run-2", "new")
+
+    assert names(status.query(StatusQuery())) == [("run-2", "new"), ("run-1", "running")]
+    assert names(status.query(StatusQuery(status=[WorkflowStatus.COMPLETED]))) == []
+    assert names(status.query(StatusQuery(run_id="run-1"))) == [("run-1", "running")]
+
+
+class NoReplyServer:
+    """Accepts connections and drops each one after reading a batch, without replying."""
+    def __init__(self):
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        self.batches = []
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            connection, _ = self.listener.accept()
+            with connection:
+                self.batches.append(connection.recv(65536))
+
+
+def test_write_is_not_sent_again_after_a_lost_reply():
+    server = NoReplyServer()
+    client = RespClient(port=server.port)
+
+    with pytest.raises(ConnectionError):
+        client.execute_many([("HSET", "hash", "field", "value"), ("ZADD", "index", 1, "field")])
+    with pytest.raises(ConnectionError):
+        client.execute("INCR", "counter")
+
+    assert len(server.batches) == 2
+    assert b"INCR" in server.batches[1]
+
+
+def test_read_is_sent_again_after_a_lost_reply():
+    server = NoReplyServer()
+    client = RespClient(port=server.port)
+
+    with pytest.raises(ConnectionError):
+        client.execute("GET", "key")
+
+    assert len(server.batches) == 2
+
+
+def test_client_reconnects_before_writing_on_a_dropped_connection():
+    port = get_free_port()
+    client = RespClient(port=port)
+    with redis_stand_in(port):
+        assert client.execute("INCR", "counter") == 1
+
+    # The restarted server dropped the client's connection and has no state
+    with redis_stand_in(port):
+        assert client.execute("INCR", "counter") == 1
+        assert client.execute("GET", "counter") == "1"
+    client.close()
@@ -0,0 +1,117 @@
+"""
+The autogen clients send their requests through the private SDK client of autogen-ext. These
+tests fail when an upgrade stops exposing it, instead of prompt caching silently turning off.
+"""
+import asyncio
+
+import pytest
+from anthropic.types import Message, TextBlock, Usage
+from autogen_core.models import SystemMessage, UserMessage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.completion_usage import CompletionUsage, PromptTokensDetails
+
+from core.llm.agent_llm_providers.llm_provider_impl.autogen_llm_config import AutogenLLMProvider
+from core.llm.llm_call_hooks import LLMCallHook, register_llm_call_hook, unregister_llm_call_hook
+from core.llm.prompt_caching import EPHEMERAL_CACHE_CONTROL, ProviderResource
+from models.workflow_models.workflow import LLM
+
+
+class UsageRecorder(LLMCallHook):
+    name = "test_usage_recorder"
+
+    def __init__(self):
+        self.usages = []
+
+    def after_call(self, call, response):
+        self.usages.append(response.usage)
+
+
+class RecordingResource:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    async def create(self, **request_args):
+        self.requests.append(request_args)
+        return self.response
+
+
+@pytest.fixture
+def usage_recorder(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    recorder = UsageRecorder()
+    register_llm_call_hook(recorder)
+    yield recorder
+    unregister_llm_call_hook(recorder.name)
+
+
+def get_client(provider: str, model: str):
+    return AutogenLLMProvider().get_llm_instance(
+        LLM(model=model, provider=provider, top_probability=1, temperature=0, max_tokens=64)
+    )
+
+
+def get_messages():
+    return [SystemMessage(content="Stable system prompt"), UserMessage(content="Task", source="user")]
+
+
+def test_anthropic_sdk_messages_resource_is_wrapped(usage_recorder):
+    client = get_client("anthropic", "claude-3-5-sonnet-latest")
+
+    assert isinstance(client.client._client.messages, ProviderResource)
+
+
+def test_openai_sdk_completions_resources_are_wrapped(usage_recorder):
+    client = get_client("openai", "gpt-4o")
+
+    assert isinstance(client.client._client.chat.completions, ProviderResource)
+    assert isinstance(client.client._client.beta.chat.completions, ProviderResource)
+
+
+def test_anthropic_request_marks_system_prompt_and_reports_cached_tokens(usage_recorder):
+    client = get_client("anthropic", "claude-3-5-sonnet-latest")
+    resource = RecordingResource(Message(
+        id="msg_1",
+        type="message",
+        role="assistant",
+        model="claude-3-5-sonnet-latest",
+        content=[TextBlock(type="text", text="Done")],
+        stop_reason="end_turn",
+        usage=Usage(input_tokens=12, output_tokens=3, cache_read_input_tokens=900, cache_creation_input_tokens=0),
+    ))
+    client.client._client.messages._resource = resource
+
+    result = asyncio.run(client.create(get_messages()))
+
+    assert result.content == "Done"
+    assert resource.requests[0]["system"] == [
+        {"type": "text", "text": "Stable system prompt", "cache_control": EPHEMERAL_CACHE_CONTROL}
+    ]
+    usage = usage_recorder.usages[-1]
+    assert (usage.prompt_tokens, usage.cached_tokens) == (912, 900)
+
+
+def test_openai_request_reports_cached_tokens(usage_recorder):
+    client = get_client("openai", "gpt-4o")
+    resource = RecordingResource(ChatCompletion(
+        id="chatcmpl_1",
+        object="chat.completion",
+        created=0,
+        model="gpt-4o-2024-08-06",
+        choices=[Choice(index=0, finish_reason="stop", message=ChatCompletionMessage(role="assistant", content="Done"))],
+        usage=CompletionUsage(
+            prompt_tokens=1200, completion_tokens=3, total_tokens=1203,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=1024),
+        ),
+    ))
+    client.client._client.chat.completions._resource = resource
+
+    result = asyncio.run(client.create(get_messages()))
+
+    assert result.content == "Done"
+    # OpenAI caches the unchanged prefix on its own, the system prompt is sent as it is
+    assert resource.requests[0]["messages"][0] == {"role": "system", "content": "Stable system prompt"}
+    usage = usage_recorder.usages[-1]
+    assert (usage.prompt_tokens, usage.cached_tokens) == (1200, 1024)
@@ -0,0 +1,177 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+from pydantic import BaseModel
+
+from core.exception.workflow_execution_exception import RunCancelledException, TokenBudgetExceededException
+from core.llm import model_cascade
+from core.llm.model_cascade import get_cascade_llms, has_confidence, is_valid_answer, run_model_cascade
+from models.workflow_models.workflow import LLM, CascadeAcceptance, CascadeModel, ModelCascade
+
+
+class Answer(BaseModel):
+    answer: str
+    confidence: float
+
+
+def make_llm(acceptance: CascadeAcceptance = CascadeAcceptance.SCHEMA, **cascade_settings) -> LLM:
+    return LLM(
+        model="gpt-4o",
+        provider="openai",
+        top_probability=0.9,
+        temperature=0.2,
+        max_tokens=512,
+        cascade=ModelCascade(
+            models=[CascadeModel(model="gpt-4o-mini", provider="openai"), CascadeModel(model="claude-3-5-haiku", provider="anthropic")],
+            acceptance=acceptance,
+            **cascade_settings,
+        ),
+    )
+
+
+class FakeAttempt:
+    """Answers with a fixed answer per model, exceptions are raised."""
+    def __init__(self, answers: Dict[str, object]):
+        self.answers = answers
+        self.models: List[str] = []
+
+    async def __call__(self, llm: LLM):
+        self.models.append(llm.model)
+        answer = self.answers[llm.model]
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+
+def cascade(llm: LLM, attempt: FakeAttempt, response_format=Answer):
+    return asyncio.run(run_model_cascade(llm, "task", attempt, response_format=response_format))
+
+
+def test_cascade_llms_try_cheaper_models_first():
+    llm = make_llm()
+
+    llms = get_cascade_llms(llm)
+
+    assert [(stage.provider, stage.model) for stage in llms] == [
+        ("openai", "gpt-4o-mini"),
+        ("anthropic", "claude-3-5-haiku"),
+        ("openai", "gpt-4o"),
+    ]
+    assert all(stage.cascade is None and stage.max_tokens == 512 and stage.temperature == 0.2 for stage in llms)
+    plain = llm.model_copy(update={"cascade": None})
+    assert get_cascade_llms(plain) == [plain]
+
+
+def test_first_valid_answer_is_accepted():
+    attempt = FakeAttempt({"gpt-4o-mini": '{"answer": "a", "confidence": 0.1}'})
+
+    assert cascade(make_llm(), attempt) == '{"answer": "a", "confidence": 0.1}'
+    assert attempt.models == ["gpt-4o-mini"]
+
+
+def test_invalid_answers_escalate_to_the_configured_model():
+    attempt = FakeAttempt({
+        "gpt-4o-mini": "not json",
+        "claude-3-5-haiku": {"answer": "missing confidence"},
+        "gpt-4o": "anything",
+    })
+
+    assert cascade(make_llm(), attempt) == "anything"
+    assert attempt.models == ["gpt-4o-mini", "claude-3-5-haiku", "gpt-4o"]
+
+
+def test_low_confidence_escalates():
+    attempt = FakeAttempt({
+        "gpt-4o-mini": Answer(answer="a", confidence=0.5),
+        "claude-3-5-haiku": Answer(answer="b", confidence=0.8),
+    })
+
+    answer = cascade(make_llm(CascadeAcceptance.CONFIDENCE, min_confidence=0.8), attempt)
+
+    assert answer.answer == "b"
+    assert attempt.models == ["gpt-4o-mini", "claude-3-5-haiku"]
+
+
+def test_failed_attempt_escalates():
+    attempt = FakeAttempt({"gpt-4o-mini": TimeoutError("slow"), "claude-3-5-haiku": ValueError("bad"), "gpt-4o": "final"})
+
+    assert cascade(make_llm(), attempt, response_format=None) == "final"
+    assert attempt.models == ["gpt-4o-mini", "claude-3-5-haiku", "gpt-4o"]
+
+
+@pytest.mark.parametrize("error", [RunCancelledException("run-1", "cancelled"), TokenBudgetExceededException("run", 200, 100)])
+def test_fatal_errors_stop_the_cascade(error):
+    attempt = FakeAttempt({"gpt-4o-mini": error})
+
+    with pytest.raises(type(error)):
+        cascade(make_llm(), attempt)
+    assert attempt.models == ["gpt-4o-mini"]
+
+
+def test_failure_of_the_configured_model_propagates():
+    attempt = FakeAttempt({"gpt-4o-mini": "", "claude-3-5-haiku": "", "gpt-4o": ValueError("down")})
+
+    with pytest.raises(ValueError):
+        cascade(make_llm(), attempt, response_format=None)
+
+
+def test_verifier_decides_acceptance(monkeypatch):
+    verified = []
+
+    async def is_verified(answer, task, verifier_llm, cascade_settings):
+        verified.append((answer, verifier_llm.model, verifier_llm.cascade))
+        return answer == "good"
+
+    monkeypatch.setattr(model_cascade, "is_verified", is_verified)
+    attempt = FakeAttempt({"gpt-4o-mini": "bad", "claude-3-5-haiku": "good"})
+
+    assert cascade(make_llm(CascadeAcceptance.VERIFIER), attempt, response_format=None) == "good"
+    # The configured model verifies, without a cascade of its own
+    assert verified == [("bad", "gpt-4o", None), ("good", "gpt-4o", None)]
+
+
+def test_without_a_cascade_the_model_answers_directly():
+    attempt = FakeAttempt({"gpt-4o": "not json"})
+
+    assert cascade(make_llm().model_copy(update={"cascade": None}), attempt) == "not json"
+    assert attempt.models == ["gpt-4o"]
+
+
+@pytest.mark.parametrize("answer, expected", [
+    (Answer(answer="a", confidence=1), True),
+    ({"answer": "a", "confidence": 0.5}, True),
+    ('{"answer": "a", "confidence": 0.5}', True),
+    ('{"answer": "a"}', False),
+    ("[1, 2]", False),
+    ("not json", False),
+    (None, False),
+])
+def test_is_valid_answer_against_a_schema(answer, expected):
+    assert is_valid_answer(answer, Answer) is expected
+
+
+def test_is_valid_answer_without_a_schema():
+    assert is_valid_answer("text", None)
+    assert not is_valid_answer("", None)
+    assert is_valid_answer("text", {"type": "json_object"})
+
+
+@pytest.mark.parametrize("answer, expected", [
+    ({"confidence": 0.7}, True),
+    ({"confidence": 1}, True),
+    ({"confidence": 0.69}, False),
+    ({"confidence": True}, False),
+    ({"confidence": "0.9"}, False),
+    ({}, False),
+    ("not json", False),
+])
+def test_has_confidence(answer, expected):
+    assert has_confidence(answer, make_llm().cascade) is expected
+
+
+def test_has_confidence_reads_the_configured_field():
+    settings = make_llm(confidence_field="certainty", min_confidence=0.9).cascade
+
+    assert has_confidence('{"certainty": 0.95, "confidence": 0}', settings)
+    assert not has_confidence('{"certainty": 0.5, "confidence": 1}', settings)
@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+from core.llm.prompt_caching import (
+    EPHEMERAL_CACHE_CONTROL,
+    ProviderResource,
+    add_anthropic_cache_control,
+    add_system_cache_control,
+    capture_provider_usage,
+    get_anthropic_cache_usage,
+    get_openai_cache_usage,
+    get_system_content,
+    wrap_sdk_resource,
+)
+
+
+class RecordingResource:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    async def create(self, **request_args):
+        self.requests.append(request_args)
+        return self.response
+
+
+def get_anthropic_response(input_tokens=10, cache_read=0, cache_creation=0):
+    return SimpleNamespace(usage=SimpleNamespace(
+        input_tokens=input_tokens, cache_read_input_tokens=cache_read, cache_creation_input_tokens=cache_creation,
+    ))
+
+
+def test_anthropic_system_prompt_gets_cache_breakpoint():
+    request = add_anthropic_cache_control({"model": "claude", "system": "Stable prompt", "messages": []})
+
+    assert request["system"] == [{"type": "text", "text": "Stable prompt", "cache_control": EPHEMERAL_CACHE_CONTROL}]
+    assert request["messages"] == []
+
+
+def test_anthropic_request_without_text_system_prompt_is_unchanged():
+    blocks = [{"type": "text", "text": "Already blocks"}]
+
+    assert add_anthropic_cache_control({"messages": []}) == {"messages": []}
+    assert add_anthropic_cache_control({"system": ""}) == {"system": ""}
+    assert add_anthropic_cache_control({"system": blocks})["system"] is blocks
+
+
+def test_system_messages_of_anthropic_models_are_marked():
+    messages = [
+        {"role": "system", "content": "Stable prompt"},
+        {"role": "user", "content": "Task"},
+        {"role": "system", "content": ""},
+    ]
+
+    marked = add_system_cache_control("Anthropic", messages)
+
+    assert marked[0] == {
+        "role": "system",
+        "content": [{"type": "text", "text": "Stable prompt", "cache_control": EPHEMERAL_CACHE_CONTROL}],
+    }
+    assert marked[1:] == messages[1:]
+    # The caller's messages are not modified
+    assert messages[0]["content"] == "Stable prompt"
+
+
+def test_messages_of_other_providers_are_unchanged():
+    messages = [{"role": "system", "content": "Stable prompt"}]
+
+    assert add_system_cache_control("openai", messages) is messages
+    assert get_system_content("openai", "Stable prompt") == "Stable prompt"
+    assert get_system_content("anthropic", "Stable prompt")[0]["cache_control"] == EPHEMERAL_CACHE_CONTROL
+
+
+def test_cache_usage_is_read_from_sdk_responses():
+    assert get_anthropic_cache_usage(get_anthropic_response(cache_read=900, cache_creation=100)) == (900, 1000)
+    assert get_anthropic_cache_usage(SimpleNamespace(usage=None)) == (0, 0)
+    openai_response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=512)))
+    assert get_openai_cache_usage(openai_response) == (512, 0)
+    assert get_openai_cache_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens_details=None))) == (0, 0)
+
+
+def test_provider_resource_prepares_requests_and_records_usage():
+    resource = RecordingResource(get_anthropic_response(cache_read=900))
+    proxy = ProviderResource(resource, get_anthropic_cache_usage, add_anthropic_cache_control)
+
+    async def call():
+        with capture_provider_usage() as usage:
+            await proxy.create(system="Stable prompt", messages=[])
+        return usage
+
+    usage = asyncio.run(call())
+
+    assert resource.requests[0]["system"][0]["cache_control"] == EPHEMERAL_CACHE_CONTROL
+    assert (usage.cached_tokens, usage.prompt_tokens) == (900, 900)
+
+
+def test_provider_resource_outside_a_capture_only_forwards():
+    resource = RecordingResource(get_anthropic_response(cache_read=900))
+    proxy = ProviderResource(resource, get_anthropic_cache_usage)
+
+    response = asyncio.run(proxy.create(system="Stable prompt"))
+
+    assert response is resource.response
+    assert resource.requests == [{"system": "Stable prompt"}]
+    assert proxy.response is resource.response
+
+
+def test_wrapping_a_missing_sdk_resource_warns(caplog):
+    sdk_client = SimpleNamespace(chat=SimpleNamespace())
+
+    assert not wrap_sdk_resource(sdk_client, "chat.completions", get_openai_cache_usage)
+    assert not wrap_sdk_resource(None, "messages", get_anthropic_cache_usage)
+    assert "Prompt caching is off" in caplog.text
+
+
+def test_wrapping_an_sdk_resource_replaces_it():
+    resource = RecordingResource(None)
+    sdk_client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=resource)))
+
+    assert wrap_sdk_resource(sdk_client, "beta.chat.completions", get_openai_cache_usage)
+    assert isinstance(sdk_client.beta.chat.completions, ProviderResource)
@@ -0,0 +1,55 @@
+from core.prompts.manager_prompt import REFLECTION_AGENT_PROMPT
+from core.prompts.prompt_layout import get_agent_system_prompt, get_reflection_prompt, join_sections
+from models.workflow_models.workflow import LLM, Agent
+
+
+def get_agent(**fields) -> Agent:
+    config = {
+        "name": "researcher",
+        "goal": "Find the warranty",
+        "detailed_prompt": "Use the purchase details.",
+        "agent_responsibility": "Look the product up.",
+        "expected_output": "The warranty end date.",
+        "llm": LLM(model="gpt-4o", provider="openai", top_probability=1, temperature=0, max_tokens=256),
+    }
+    return Agent(**{**config, **fields})
+
+
+def test_sections_are_joined_in_order_without_empty_ones():
+    prompt = join_sections([("First", " one \n"), (None, "untitled"), ("Empty", "  "), ("Missing", None), ("Last", "two")])
+
+    assert prompt == "**First**\n\none\n\nuntitled\n\n**Last**\n\ntwo"
+
+
+def test_agent_system_prompt_follows_the_stable_layout():
+    prompt = get_agent_system_prompt(get_agent())
+
+    assert prompt == (
+        "**Goal**\n\nFind the warranty\n\n"
+        "Use the purchase details.\n\n"
+        "**Your Responsibility**\n\nLook the product up.\n\n"
+        "**Expected Output**\n\nThe warranty end date."
+    )
+
+
+def test_agent_system_prompt_depends_only_on_the_agent_config():
+    # Same config, same prompt: the cached prefix is reused by every call of the agent
+    assert get_agent_system_prompt(get_agent()) == get_agent_system_prompt(get_agent(name="other", tools=[]))
+    assert get_agent_system_prompt(get_agent()) != get_agent_system_prompt(get_agent(goal="Find the invoice"))
+
+
+def test_reflection_prompt_puts_shared_text_first_and_the_task_last():
+    prompt = get_reflection_prompt("Be brief.", "Check order 42")
+
+    assert prompt.startswith(REFLECTION_AGENT_PROMPT.strip())
+    assert prompt.index("**Instructions**\n\nBe brief.") < prompt.index("**TASK**\n\nCheck order 42")
+    assert prompt.endswith("**TASK**\n\nCheck order 42")
+
+
+def test_reflection_prompts_of_a_workflow_share_everything_but_the_task():
+    first = get_reflection_prompt("Be brief.", "Check order 42")
+    second = get_reflection_prompt("Be brief.", "Check order 43")
+
+    shared = get_reflection_prompt("Be brief.")
+    assert first.startswith(shared) and second.startswith(shared)
+    assert get_reflection_prompt(None) == REFLECTION_AGENT_PROMPT.strip()
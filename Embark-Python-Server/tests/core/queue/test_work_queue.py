@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+from core.queue.work_queue import SQLiteWorkQueue
+from models.queue_models.queue import JobKind, JobState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=3, retry_backoff_seconds=5.0)
+
+
+def enqueue(queue: SQLiteWorkQueue, run_id: str = "run-1", **kwargs):
+    return queue.enqueue(JobKind.WORKFLOW, run_id, {"run_id": run_id}, **kwargs)
+
+
+def test_dequeue_leases_a_job_to_one_worker(queue, clock):
+    job = enqueue(queue)
+
+    leased = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+
+    assert leased.id == job.id
+    assert leased.state == JobState.LEASED
+    assert leased.leased_by == "worker-1"
+    assert leased.attempts == 1
+    assert leased.lease_expires_at == clock.now + 30
+    assert leased.payload == {"run_id": "run-1"}
+    assert queue.dequeue("worker-2", visibility_timeout_seconds=30) is None
+
+
+def test_expired_lease_is_picked_up_by_another_worker(queue, clock):
+    enqueue(queue)
+    first = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+
+    clock.now += 30
+    second = queue.dequeue("worker-2", visibility_timeout_seconds=30)
+
+    assert second.id == first.id
+    assert second.leased_by == "worker-2"
+    assert second.attempts == 2
+    # The first worker lost the lease, its acknowledgement is ignored
+    queue.ack(first)
+    assert queue.get(first.id).state == JobState.LEASED
+
+
+def test_extend_lease_keeps_the_job_leased(queue, clock):
+    enqueue(queue)
+    job = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+
+    clock.now += 20
+    assert queue.extend_lease(job, visibility_timeout_seconds=30)
+    clock.now += 20
+
+    assert queue.dequeue("worker-2", visibility_timeout_seconds=30) is None
+    assert queue.get(job.id).lease_expires_at == clock.now + 10
+
+
+def test_extend_lease_fails_once_another_worker_holds_the_job(queue, clock):
+    enqueue(queue)
+    job = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+    clock.now += 30
+    queue.dequeue("worker-2", visibility_timeout_seconds=30)
+
+    assert not queue.extend_lease(job, visibility_timeout_seconds=30)
+
+
+def test_ack_completes_the_job(queue):
+    enqueue(queue)
+    job = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+
+    queue.ack(job)
+
+    assert queue.get(job.id).state == JobState.DONE
+    assert queue.get(job.id).lease_expires_at is None
+    assert queue.dequeue("worker-1", visibility_timeout_seconds=30) is None
+
+
+def test_nack_retries_with_exponential_backoff(queue, clock):
+    enqueue(queue)
+
+    for attempt, backoff in [(1, 5.0), (2, 10.0)]:
+        job = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+        assert job.attempts == attempt
+
+        assert queue.nack(job, "boom") == JobState.QUEUED
+        failed = queue.get(job.id)
+        assert failed.state == JobState.QUEUED
+        assert failed.leased_by is None
+        assert failed.last_error == "boom"
+
+        clock.now += backoff - 1
+        assert queue.dequeue("worker-1", visibility_timeout_seconds=30) is None
+        clock.now += 1
+
+
+def test_nack_dead_letters_the_last_attempt(queue, clock):
+    enqueue(queue, max_attempts=2)
+    queue.nack(queue.dequeue("worker-1", visibility_timeout_seconds=30), "first")
+    clock.now += 5
+    job = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+
+    assert queue.nack(job, "second") == JobState.DEAD
+    assert queue.get(job.id).state == JobState.DEAD
+    assert queue.get(job.id).last_error == "second"
+    clock.now += 3600
+    assert queue.dequeue("worker-1", visibility_timeout_seconds=30) is None
+    assert [dead.id for dead in queue.list_jobs(JobState.DEAD)] == [job.id]
+
+
+def test_expired_lease_on_the_last_attempt_is_dead_lettered(queue, clock):
+    enqueue(queue, max_attempts=1)
+    job = queue.dequeue("worker-1", visibility_timeout_seconds=30)
+
+    clock.now += 30
+    assert queue.dequeue("worker-2", visibility_timeout_seconds=30) is None
+
+    dead = queue.get(job.id)
+    assert dead.state == JobState.DEAD
+    assert dead.last_error == "Lease expired on the last attempt"
+    assert queue.get_counts()[JobState.DEAD] == 1
+
+
+def test_dead_lettering_does_not_hold_back_other_jobs(queue, clock):
+    enqueue(queue, "run-1", max_attempts=1)
+    queue.dequeue("worker-1", visibility_timeout_seconds=30)
+    clock.now += 30
+    other = enqueue(queue, "run-2")
+
+    leased = queue.dequeue("worker-2", visibility_timeout_seconds=30)
+
+    assert leased.id == other.id
+    assert queue.get_counts()[JobState.DEAD] == 1
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.datastore.run_store import RunStore
+from core.datastore.state_backend import InMemoryStateBackend
+from core.exception.workflow_execution_exception import RunCancelledException
+from core.runs import run_cancellation
+from core.runs.run_cancellation import CancelReason, RunRegistry, raise_if_cancelled, run_with_cancellation
+from core.runs.run_context import get_run_id
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = RunRegistry(poll_interval_seconds=0.01)
+    monkeypatch.setattr(run_cancellation, "run_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = RunStore(InMemoryStateBackend())
+    monkeypatch.setattr(run_cancellation, "run_store", store)
+    return store
+
+
+class FakeRequest:
+    """An HTTP request whose client goes away after `connected_polls` checks."""
+    def __init__(self, connected_polls: int):
+        self.connected_polls = connected_polls
+
+    async def is_disconnected(self) -> bool:
+        self.connected_polls -= 1
+        return self.connected_polls < 0
+
+
+async def wait_forever():
+    await asyncio.Event().wait()
+
+
+def test_run_returns_its_result_in_its_run_scope(registry, store):
+    async def run():
+        assert registry.get("run-1") is not None
+        return get_run_id()
+
+    assert asyncio.run(run_with_cancellation("run-1", run())) == "run-1"
+    assert registry.runs == {}
+
+
+def test_run_is_stopped_at_its_deadline(registry, store):
+    with pytest.raises(RunCancelledException) as error:
+        asyncio.run(run_with_cancellation("run-1", wait_forever(), timeout_seconds=0.05))
+
+    assert error.value.reason == CancelReason.TIMEOUT.value
+    assert registry.runs == {}
+
+
+def test_default_timeout_applies_without_one_of_the_run(registry, store):
+    registry.default_timeout_seconds = 0.05
+
+    with pytest.raises(RunCancelledException) as error:
+        asyncio.run(run_with_cancellation("run-1", wait_forever()))
+
+    assert error.value.reason == CancelReason.TIMEOUT.value
+
+
+def test_run_is_cancelled_by_run_id(registry, store):
+    async def run():
+        task = asyncio.create_task(run_with_cancellation("run-1", wait_forever()))
+        await asyncio.sleep(0.01)
+        assert await registry.cancel("run-1")
+        # A run being torn down is not cancelled twice
+        assert not await registry.cancel("run-1")
+        return await task
+
+    with pytest.raises(RunCancelledException) as error:
+        asyncio.run(run())
+
+    assert error.value.reason == CancelReason.CANCELLED.value
+
+
+def test_cancel_of_a_run_in_another_process_is_stored(registry, store):
+    assert not asyncio.run(registry.cancel("unknown"))
+
+    store.schedule("run-1", "workflow", "job-1")
+    assert asyncio.run(registry.cancel("run-1"))
+    assert store.get_cancel_request("run-1") == CancelReason.CANCELLED.value
+
+
+def test_run_polls_the_run_store_for_cancel_requests(registry, store):
+    store.start("run-1", "workflow")
+
+    async def run():
+        task = asyncio.create_task(run_with_cancellation("run-1", wait_forever()))
+        await asyncio.sleep(0.03)
+        # Another server process asks for the cancellation
+        assert store.request_cancel("run-1", CancelReason.CANCELLED.value)
+        return await asyncio.wait_for(task, timeout=5)
+
+    with pytest.raises(RunCancelledException) as error:
+        asyncio.run(run())
+
+    assert error.value.reason == CancelReason.CANCELLED.value
+
+
+def test_run_is_stopped_when_the_client_disconnects(registry, store):
+    with pytest.raises(RunCancelledException) as error:
+        asyncio.run(run_with_cancellation("run-1", wait_forever(), request=FakeRequest(connected_polls=2)))
+
+    assert error.value.reason == CancelReason.CLIENT_DISCONNECTED.value
+
+
+def test_cancellation_of_the_request_itself_is_not_a_stopped_run(registry, store):
+    async def run():
+        task = asyncio.create_task(run_with_cancellation("run-1", wait_forever()))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        return await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(run())
+
+    assert registry.runs == {}
+
+
+def test_threads_of_a_cancelled_run_stop_cooperatively(registry, store):
+    finished = threading.Event()
+    reasons = []
+
+    def blocking_step():
+        try:
+            while not finished.wait(0.01):
+                raise_if_cancelled()
+        except RunCancelledException as error:
+            reasons.append(error.reason)
+        finally:
+            finished.set()
+
+    async def run():
+        task = asyncio.create_task(run_with_cancellation("run-1", asyncio.to_thread(blocking_step)))
+        await asyncio.sleep(0.03)
+        await registry.cancel("run-1")
+        with pytest.raises(RunCancelledException):
+            await task
+        # The thread outlives the cancelled task and notices on its next check
+        assert await asyncio.to_thread(finished.wait, 5)
+
+    asyncio.run(run())
+
+    assert reasons == [CancelReason.CANCELLED.value]
@@ -0,0 +1,103 @@
+import pytest
+
+from core.exception.workflow_execution_exception import TokenBudgetExceededException
+from core.llm.llm_call_hooks import LLMUsage
+from core.runs.token_accounting import RunTokenAccount
+
+
+def usage(tokens: int) -> LLMUsage:
+    return LLMUsage(prompt_tokens=tokens // 2, completion_tokens=tokens - tokens // 2)
+
+
+def test_usage_is_added_to_the_run_and_node():
+    account = RunTokenAccount()
+
+    account.add(usage(100), node="a")
+    account.add(usage(50))
+
+    assert account.total.total_tokens == 150
+    assert account.total.llm_calls == 2
+    assert account.get_node_usage("a").total_tokens == 100
+    assert account.get_node_usage("b").total_tokens == 0
+
+
+def test_node_budget_stops_the_run():
+    account = RunTokenAccount(node_budgets={"a": 100, "b": None})
+
+    account.add(usage(100), node="a")
+    account.raise_if_exceeded()
+    account.add(usage(1), node="a")
+
+    with pytest.raises(TokenBudgetExceededException) as error:
+        account.raise_if_exceeded()
+    assert error.value.scope == "node 'a'"
+
+
+def test_speculative_usage_counts_toward_the_run_but_not_the_node():
+    account = RunTokenAccount(run_budget=1000, node_budgets={"child": 150})
+    speculative = account.speculate("child")
+
+    speculative.add(usage(100), node="child")
+
+    assert account.total.total_tokens == 100
+    assert account.get_node_usage("child").total_tokens == 0
+    assert speculative.usage.total_tokens == 100
+    # The discarded execution does not use up the budget of the node's real run
+    account.add(usage(100), node="child")
+    account.raise_if_exceeded()
+
+
+def test_kept_speculation_is_charged_to_the_node():
+    account = RunTokenAccount(node_budgets={"child": 150})
+    speculative = account.speculate("child")
+    speculative.add(usage(100), node="child")
+
+    speculative.keep()
+    speculative.add(usage(20), node="child")
+
+    assert account.get_node_usage("child").total_tokens == 120
+    assert account.get_node_usage("child").llm_calls == 2
+    assert account.total.total_tokens == 120
+    account.raise_if_exceeded()
+    speculative.add(usage(40), node="child")
+    with pytest.raises(TokenBudgetExceededException):
+        account.raise_if_exceeded()
+
+
+def test_speculation_gets_the_rest_of_the_node_budget():
+    account = RunTokenAccount(node_budgets={"child": 150})
+    account.add(usage(100), node="child")
+    speculative = account.speculate("child")
+
+    speculative.add(usage(60), node="child")
+
+    with pytest.raises(TokenBudgetExceededException):
+        speculative.raise_if_exceeded()
+    account.raise_if_exceeded()
+    speculative.keep()
+    with pytest.raises(TokenBudgetExceededException):
+        account.raise_if_exceeded()
+
+
+def test_run_budget_covers_speculative_usage():
+    account = RunTokenAccount(run_budget=100)
+    speculative = account.speculate("child")
+
+    speculative.add(usage(101), node="child")
+
+    with pytest.raises(TokenBudgetExceededException):
+        account.raise_if_exceeded()
+    with pytest.raises(TokenBudgetExceededException):
+        speculative.raise_if_exceeded()
+
+
+def test_speculation_from_a_speculative_execution_is_charged_to_the_run():
+    account = RunTokenAccount()
+    speculative = account.speculate("child")
+
+    nested = speculative.speculate("grandchild")
+    nested.add(usage(10), node="grandchild")
+    nested.keep()
+
+    assert nested.account is account
+    assert account.get_node_usage("grandchild").total_tokens == 10
@@ -0,0 +1,86 @@
+import contextlib
+
+import pytest
+from fastapi import HTTPException
+
+from core.scheduling.admission import RETRY_AFTER_HEADER, AdmissionController
+from core.scheduling.run_scheduler import RunScheduler
+
+
+def make_controller(max_concurrent_runs=1, **settings) -> AdmissionController:
+    return AdmissionController(RunScheduler(max_concurrent_runs=max_concurrent_runs), **settings)
+
+
+def test_admission_is_held_for_the_block():
+    controller = make_controller(max_cost=10)
+
+    with controller.admit("workflow", 4):
+        assert controller.admitted_runs == 1
+        assert controller.admitted_cost == 4
+    with pytest.raises(RuntimeError):
+        with controller.admit("workflow", 4):
+            raise RuntimeError("run failed")
+
+    assert controller.admitted_runs == 0
+    assert controller.admitted_cost == 0
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = make_controller(max_queued_runs=1, default_run_seconds=5.0)
+
+    with contextlib.ExitStack() as admitted:
+        admitted.enter_context(controller.admit("workflow", 1))
+        admitted.enter_context(controller.admit("workflow", 1))
+        # The first run holds the only slot, the second one waits for it
+        controller.scheduler.running = 1
+
+        with pytest.raises(HTTPException) as error:
+            with controller.admit("workflow", 1):
+                pass
+
+    assert error.value.status_code == 429
+    assert "queue_full" in error.value.detail
+    # One queued run ahead of the retried one, 5 seconds per run on a single slot
+    assert error.value.headers == {RETRY_AFTER_HEADER: "10"}
+
+
+def test_runs_queue_without_limit_when_the_scheduler_is_uncapped():
+    controller = make_controller(max_concurrent_runs=None, max_queued_runs=0)
+
+    with controller.admit("workflow", 1), controller.admit("workflow", 1):
+        assert controller.get_rejection_reason(cost=1) is None
+
+
+def test_cost_limit_is_rejected():
+    controller = make_controller(max_cost=10)
+
+    with controller.admit("workflow", 8):
+        with pytest.raises(HTTPException) as error:
+            with controller.admit("custom_workflow", 3):
+                pass
+        with controller.admit("workflow", 2):
+            pass
+
+    assert error.value.status_code == 429
+    assert "cost_limit" in error.value.detail
+    assert RETRY_AFTER_HEADER in error.value.headers
+
+
+def test_run_above_the_cost_limit_is_accepted_on_an_idle_server():
+    controller = make_controller(max_cost=10)
+
+    with controller.admit("workflow", 20):
+        assert controller.get_rejection_reason(cost=1) == "cost_limit"
+
+
+def test_retry_after_follows_the_run_durations_and_is_capped():
+    controller = make_controller(max_concurrent_runs=2, default_run_seconds=5.0, max_retry_after_seconds=30)
+    assert controller.get_retry_after_seconds() == 3
+
+    with controller.admit("workflow", 1):
+        pass
+    # The instant run pulls the moving average down from 5 seconds
+    assert controller.average_run_seconds == pytest.approx(4.0, abs=0.01)
+
+    controller.average_run_seconds = 1000.0
+    assert controller.get_retry_after_seconds() == 30
@@ -0,0 +1,142 @@
+import asyncio
+from typing import List, Tuple
+
+from core.scheduling.run_scheduler import FairShare, RunScheduler, Ticket, parse_tenant_values
+from models.queue_models.queue import PriorityClass
+
+INTERACTIVE = PriorityClass.INTERACTIVE
+BATCH = PriorityClass.BATCH
+
+
+def schedule(scheduler: RunScheduler, runs: List[Tuple[str, str, PriorityClass]], drain: int = None) -> List[Tuple[str, str]]:
+    """Queue the runs in order and return (tenant, workflow) in the order the scheduler picks them."""
+    async def run():
+        for tenant, workflow, priority in runs:
+            scheduler.enqueue(Ticket(tenant, workflow, priority))
+        order = []
+        for _ in range(drain or len(runs)):
+            ticket = scheduler.next_ticket()
+            if ticket is None:
+                break
+            order.append((ticket.tenant, ticket.workflow))
+        return order
+    return asyncio.run(run())
+
+
+def test_fair_share_charges_by_weight():
+    share = FairShare()
+    share.activate("a")
+    share.activate("b")
+    weights = {"a": 2.0, "b": 1.0}
+
+    picks = []
+    for _ in range(6):
+        key = share.pick(["a", "b"])
+        share.charge(key, weights[key])
+        picks.append(key)
+
+    assert picks.count("a") == 4
+    assert picks.count("b") == 2
+
+
+def test_interactive_runs_go_before_batch_runs():
+    order = schedule(RunScheduler(), [
+        ("a", "wf", BATCH),
+        ("b", "wf", BATCH),
+        ("c", "wf", INTERACTIVE),
+        ("a", "wf", INTERACTIVE),
+    ])
+
+    assert order == [("c", "wf"), ("a", "wf"), ("a", "wf"), ("b", "wf")]
+
+
+def test_tenants_take_turns():
+    order = schedule(RunScheduler(), [("a", "wf", BATCH)] * 4 + [("b", "wf", BATCH)] * 2)
+
+    assert [tenant for tenant, _ in order] == ["a", "b", "a", "b", "a", "a"]
+
+
+def test_tenant_weights_set_their_share():
+    scheduler = RunScheduler(tenant_weights={"a": 3.0})
+    order = schedule(scheduler, [("a", "wf", BATCH)] * 8 + [("b", "wf", BATCH)] * 8, drain=8)
+
+    assert [tenant for tenant, _ in order].count("a") == 6
+
+
+def test_workflows_of_a_tenant_take_turns():
+    order = schedule(RunScheduler(), [("a", "report", BATCH)] * 3 + [("a", "chat", BATCH)] * 2)
+
+    assert [workflow for _, workflow in order] == ["report", "chat", "report", "chat", "report"]
+
+
+def test_idle_tenant_does_not_build_up_credit():
+    scheduler = RunScheduler()
+    schedule(scheduler, [("a", "wf", BATCH)] * 5)
+
+    # b was idle while a ran five times, it does not get five runs in a row now
+    order = schedule(scheduler, [("a", "wf", BATCH)] * 3 + [("b", "wf", BATCH)] * 3)
+
+    assert [tenant for tenant, _ in order] == ["b", "a", "b", "a", "b", "a"]
+
+
+def test_scheduler_state_is_dropped_once_a_tenant_is_drained():
+    scheduler = RunScheduler()
+    schedule(scheduler, [("a", "wf", BATCH), ("b", "wf", INTERACTIVE)])
+
+    assert scheduler.waiting == {INTERACTIVE: {}, BATCH: {}}
+    assert scheduler.workflow_shares == {}
+
+
+def test_slots_respect_the_global_and_tenant_limits():
+    async def run():
+        scheduler = RunScheduler(max_concurrent_runs=2, tenant_max_concurrent_runs=1)
+        started = []
+        release = asyncio.Event()
+
+        async def run_in_slot(tenant: str, name: str):
+            async with scheduler.slot(tenant, "wf", BATCH):
+                started.append(name)
+                await release.wait()
+
+        tasks = [asyncio.create_task(run_in_slot(tenant, name)) for tenant, name in [("a", "a1"), ("a", "a2"), ("b", "b1"), ("c", "c1")]]
+        await asyncio.sleep(0)
+        # a2 waits for a's cap and c1 for the global limit
+        assert started == ["a1", "b1"]
+        assert scheduler.get_stats()["running_by_tenant"] == {"a": 1, "b": 1}
+        assert scheduler.get_stats()["waiting"] == {"interactive": 0, "batch": 2}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert sorted(started) == ["a1", "a2", "b1", "c1"]
+        assert scheduler.get_stats()["running"] == 0
+        assert scheduler.get_stats()["waiting"] == {"interactive": 0, "batch": 0}
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiting_run_leaves_the_queue():
+    async def run():
+        scheduler = RunScheduler(max_concurrent_runs=1)
+        release = asyncio.Event()
+
+        async def run_in_slot():
+            async with scheduler.slot("a", "wf", BATCH):
+                await release.wait()
+
+        running = asyncio.create_task(run_in_slot())
+        waiting = asyncio.create_task(run_in_slot())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+        assert scheduler.get_stats()["waiting"]["batch"] == 0
+        release.set()
+        await running
+        assert scheduler.get_stats()["running"] == 0
+
+    asyncio.run(run())
+
+
+def test_parse_tenant_values():
+    assert parse_tenant_values(" a = 2,b=1,,broken") == {"a": "2", "b": "1"}
+    assert parse_tenant_values("") == {}
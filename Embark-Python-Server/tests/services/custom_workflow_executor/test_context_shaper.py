@@ -0,0 +1,95 @@
+import json
+
+from models.workflow_models.custom_workflow import ContextFormat, ContextShapingConfig
+from services.custom_workflow_executor.context_shaper import (
+    build_child_input,
+    cap_field_sizes,
+    estimate_tokens,
+    fit_to_token_ceiling,
+    project_keys,
+    serialize_context,
+)
+
+RESULT = {
+    "customer": {"name": "Ada", "address": {"city": "London", "zip": "N1"}},
+    "items": [{"name": "lamp", "price": 10}, {"name": "desk", "price": 200}],
+    "notes": "x" * 400,
+}
+
+
+def test_keys_are_projected_by_name_and_nested_path():
+    projected = project_keys(RESULT, ["notes", "customer.address.city", "items.1.name", "items.*.price", "missing.key"])
+
+    assert projected == {
+        "notes": RESULT["notes"],
+        "customer.address.city": "London",
+        "items.1.name": "desk",
+        "items.*.price": [10, 200],
+    }
+
+
+def test_out_of_range_and_wildcard_without_matches_are_skipped():
+    assert project_keys(RESULT, ["items.5.name", "items.*.sku", "customer.name.first"]) == {}
+
+
+def test_long_strings_and_lists_are_capped_with_markers():
+    capped = cap_field_sizes({"text": "abcdef", "values": [1, 2, 3, 4], "nested": {"text": "abc"}}, 3, 2)
+
+    assert capped == {
+        "text": "abc...[3 chars truncated]",
+        "values": [1, 2, "...[2 more items truncated]"],
+        "nested": {"text": "abc"},
+    }
+
+
+def test_context_formats():
+    data = {"customer": {"city": "London"}, "tags": ["a", "b"]}
+
+    assert serialize_context(data, ContextFormat.JSON) == json.dumps(data)
+    assert serialize_context(data, ContextFormat.COMPACT_JSON) == '{"customer":{"city":"London"},"tags":["a","b"]}'
+    assert serialize_context(data, ContextFormat.LINES) == 'customer.city: London\ntags: ["a","b"]'
+
+
+def test_token_ceiling_cuts_fields_before_the_whole_input():
+    config = ContextShapingConfig(max_tokens=60, format=ContextFormat.COMPACT_JSON)
+
+    text = fit_to_token_ceiling("**Task Context:**\n", RESULT, config)
+
+    assert estimate_tokens(text) <= config.max_tokens
+    # Only the long note was cut, the context is still complete JSON
+    context = json.loads(text.removeprefix("**Task Context:**\n"))
+    assert context["customer"] == RESULT["customer"]
+    assert context["notes"].endswith("chars truncated]")
+
+
+def test_token_ceiling_truncates_the_input_when_fields_cannot_shrink_enough():
+    config = ContextShapingConfig(max_tokens=10, format=ContextFormat.COMPACT_JSON)
+
+    text = fit_to_token_ceiling("**Task Context:**\n", {f"key_{index}": index for index in range(50)}, config)
+
+    assert len(text) <= config.max_tokens * 4
+    assert text.endswith("chars truncated]")
+
+
+def test_child_input_without_shaping_keeps_the_original_prompt():
+    child_input = build_child_input("Find the city", RESULT, ["customer.address.city"], share_task_among_agents=True)
+
+    assert child_input == '**Task**:\nFind the city\n\n**Task Context:**\n{"customer.address.city": "London"}'
+
+
+def test_child_input_falls_back_to_the_whole_result_when_no_key_matches():
+    child_input = build_child_input("Task", {"answer": 42}, ["missing"], share_task_among_agents=False)
+
+    assert child_input == '**Task Context:**\n{"answer": 42}'
+
+
+def test_child_input_applies_field_caps_and_format():
+    config = ContextShapingConfig(field_max_chars=5, field_max_items=1, format=ContextFormat.LINES)
+
+    child_input = build_child_input("Task", RESULT, ["notes", "items"], share_task_among_agents=False, config=config)
+
+    assert child_input == (
+        "**Task Context:**\n"
+        "notes: xxxxx...[395 chars truncated]\n"
+        'items: [{"name":"lamp","price":10},"...[1 more items truncated]"]'
+    )
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from services.custom_workflow_executor.custom_workflow_implementation import crewai_executor
+from services.custom_workflow_executor.custom_workflow_implementation.crewai_executor import CrewAIExecutor
+
+
+class FakeAdapter:
+    """Records when the blocking start and stop calls begin and end."""
+    tools = []
+
+    def __init__(self):
+        self.events = []
+
+    def start(self):
+        self.events.append("start")
+        time.sleep(0.05)
+        self.events.append("started")
+
+    def stop(self):
+        self.events.append("stop")
+        time.sleep(0.05)
+        self.events.append("stopped")
+
+
+def test_close_waits_for_the_adapter_to_stop(monkeypatch):
+    adapter = FakeAdapter()
+    monkeypatch.setattr(crewai_executor, "adapter", adapter)
+
+    asyncio.run(CrewAIExecutor().close_mcp_connection())
+
+    assert adapter.events == ["stop", "stopped"]
+
+
+def test_next_node_does_not_start_the_adapter_while_it_stops(monkeypatch):
+    adapter = FakeAdapter()
+    monkeypatch.setattr(crewai_executor, "adapter", adapter)
+
+    async def run():
+        closing = asyncio.create_task(CrewAIExecutor().close_mcp_connection())
+        await asyncio.sleep(0.01)
+        # The next CrewAI node binds its tools while the previous stop is still running
+        await CrewAIExecutor().crew_ai_instance.start_adapter()
+        await closing
+
+    asyncio.run(run())
+
+    assert adapter.events == ["stop", "stopped", "start", "started"]
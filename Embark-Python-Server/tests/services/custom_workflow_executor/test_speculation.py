@@ -0,0 +1,114 @@
+import asyncio
+
+from core.datastore.routing_stats import get_workflow_key, routing_stats
+from core.llm.llm_call_hooks import LLMUsage
+from core.runs.run_context import get_node_id, run_scope
+from core.runs.token_accounting import RunTokenAccount, get_token_account, token_account_scope
+from models.workflow_models.custom_workflow import CustomWorkflowAgentConfig, SpeculationConfig, SpeculationMode
+from models.workflow_models.workflow import LLM, Agent
+from services.custom_workflow_executor.custom_workflow_manager import CustomWorkflowManager
+
+NODE_TOKENS = 100
+LLM_CONFIG = LLM(model="gpt-4o", provider="openai", top_probability=1.0, temperature=0, max_tokens=256)
+
+
+def make_node(name: str, **settings) -> CustomWorkflowAgentConfig:
+    return CustomWorkflowAgentConfig(
+        agent_config=Agent(
+            name=name,
+            goal="Answer",
+            detailed_prompt="Answer the task.",
+            agent_responsibility="Answer the task.",
+            expected_output="An answer.",
+            llm=LLM_CONFIG,
+        ),
+        agent_execution_framework="langgraph",
+        **settings,
+    )
+
+
+def make_workflow(child_budget: int):
+    return [
+        make_node(
+            "router",
+            is_entry_point=True,
+            structured_response_format={"topic": "str", "pick_b": "bool"},
+            child_agent_names=["a", "b"],
+        ),
+        make_node(
+            "a",
+            structured_response_format={"answer": "str"},
+            parent_agent_names=["router"],
+            agent_node_invoke_condition={"pick_b": False},
+            input_keys_required_from_parent=["topic"],
+        ),
+        make_node(
+            "b",
+            structured_response_format={"answer": "str"},
+            parent_agent_names=["router"],
+            agent_node_invoke_condition={"pick_b": True},
+            input_keys_required_from_parent=["topic"],
+            token_budget=child_budget,
+        ),
+    ]
+
+
+class FakeNodeExecutor:
+    """Uses NODE_TOKENS per execution; the router streams a draft topic before its final one."""
+    def __init__(self, final_topic: str):
+        self.final_topic = final_topic
+
+    async def prepare(self, agent, response_format):
+        return None
+
+    async def execute_with_cascade(self, agent, response_format, task_message, on_partial=None):
+        get_token_account().add(LLMUsage(prompt_tokens=NODE_TOKENS // 2, completion_tokens=NODE_TOKENS // 2), node=get_node_id())
+        if agent.name != "router":
+            return {"answer": task_message}
+        if on_partial is not None:
+            on_partial({"topic": "draft"})
+        # Let the speculative child run before the router completes
+        await asyncio.sleep(0.01)
+        return {"topic": self.final_topic, "pick_b": True}
+
+    async def close_mcp_connection(self):
+        return None
+
+
+def run_workflow(final_topic: str, child_budget: int = 150):
+    workflows = make_workflow(child_budget)
+    for _ in range(3):
+        routing_stats.record(get_workflow_key(workflows), "router", "b")
+    manager = CustomWorkflowManager(
+        workflows, speculation=SpeculationConfig(mode=SpeculationMode.EXECUTE, min_samples=3), early_routing=False
+    )
+    executor = FakeNodeExecutor(final_topic)
+    manager.get_node_executor = lambda workflow_node_config: executor
+    account = RunTokenAccount(node_budgets={node.agent_config.name: node.token_budget for node in workflows})
+
+    async def run():
+        with run_scope("run-1"), token_account_scope(account):
+            return await manager.execute_workflow("task", share_task_among_agents=False)
+
+    return asyncio.run(run()), manager, account
+
+
+def test_kept_speculation_is_charged_to_its_node():
+    result, manager, account = run_workflow(final_topic="draft")
+
+    assert "draft" in result["answer"]
+    assert manager.wasted_tokens == 0
+    assert account.get_node_usage("b").total_tokens == NODE_TOKENS
+    assert account.total.total_tokens == 2 * NODE_TOKENS
+
+
+def test_discarded_speculation_does_not_use_up_the_node_budget():
+    # The speculative and the real execution of b together exceed its budget of 150
+    result, manager, account = run_workflow(final_topic="final")
+
+    assert "final" in result["answer"]
+    assert manager.wasted_tokens == NODE_TOKENS
+    assert account.exceeded is None
+    assert account.get_node_usage("b").total_tokens == NODE_TOKENS
+    assert account.total.total_tokens == 3 * NODE_TOKENS
+
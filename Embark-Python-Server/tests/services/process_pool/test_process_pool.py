@@ -0,0 +1,107 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from core.exception.workflow_execution_exception import WorkerProcessException
+from models.process_models.process import JobEvent
+from services.process_pool import process_pool
+from services.process_pool.process_pool import FrameworkProcessPool
+
+MB = 1024 * 1024
+
+
+def run_fake_worker(connection):
+    """
+    Stands in for the framework worker: a job is a dict with the memory the worker reports
+    after it, an optional error or exit, and the result is the worker's pid.
+    """
+    connection.send((JobEvent.READY, os.getpid()))
+    while True:
+        job = connection.recv()
+        if job is None:
+            return
+        if job.get("exit"):
+            os._exit(1)
+        if job.get("usage"):
+            connection.send((JobEvent.USAGE, job["usage"], None))
+        if job.get("status_code"):
+            error = {"type": "HTTPException", "message": "bad request", "status_code": job["status_code"]}
+            connection.send((JobEvent.ERROR, error, job.get("rss_bytes", 0)))
+            continue
+        connection.send((JobEvent.RESULT, os.getpid(), job.get("rss_bytes", 0)))
+
+
+@pytest.fixture(autouse=True)
+def fake_worker(monkeypatch):
+    # Spawned workers import this module by name to find the target
+    monkeypatch.setattr(process_pool, "run_process_worker", run_fake_worker)
+
+
+def run_jobs(pool: FrameworkProcessPool, *jobs: dict) -> list:
+    """Execute the jobs one after the other and return their results or errors."""
+    async def run():
+        results = []
+        try:
+            for job in jobs:
+                try:
+                    results.append(await pool.execute(job))
+                except (HTTPException, WorkerProcessException) as e:
+                    results.append(e)
+            return results
+        finally:
+            await pool.stop()
+    return asyncio.run(run())
+
+
+def test_worker_is_reused_until_max_runs():
+    pool = FrameworkProcessPool(size=1, max_runs_per_worker=2)
+
+    first, second, third = run_jobs(pool, {}, {}, {})
+
+    assert first == second
+    assert third != first
+
+
+def test_worker_is_recycled_when_its_memory_grows_too_large():
+    pool = FrameworkProcessPool(size=1, max_memory_mb=10)
+
+    first, second, third = run_jobs(pool, {"rss_bytes": 5 * MB}, {"rss_bytes": 11 * MB}, {})
+
+    assert first == second
+    assert third != second
+
+
+def test_job_errors_are_raised_and_keep_the_worker():
+    pool = FrameworkProcessPool(size=1)
+
+    first, error, last = run_jobs(pool, {}, {"status_code": 400}, {})
+
+    assert isinstance(error, HTTPException)
+    assert error.status_code == 400
+    assert last == first
+
+
+def test_worker_that_exits_during_a_job_is_replaced():
+    pool = FrameworkProcessPool(size=1)
+
+    first, error, last = run_jobs(pool, {}, {"exit": True}, {})
+
+    assert isinstance(error, WorkerProcessException)
+    assert last != first
+
+
+def test_job_events_are_passed_to_the_caller():
+    pool = FrameworkProcessPool(size=1)
+    events = []
+
+    async def run():
+        try:
+            await pool.execute({"usage": {"total_tokens": 3}}, on_event=lambda *event: events.append(event))
+        finally:
+            await pool.stop()
+
+    asyncio.run(run())
+
+    assert events == [(JobEvent.USAGE, {"total_tokens": 3}, None)]
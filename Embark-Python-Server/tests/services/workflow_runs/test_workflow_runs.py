@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core.datastore.datastore import WorkflowStatus as WorkflowStatusStore
+from core.datastore.state_backend import InMemoryStateBackend
+from core.runs.run_context import run_scope
+from core.scheduling.run_scheduler import RunScheduler
+from models.api_models.workflow import WorkflowModel
+from models.result_models.result import ResultCodec, ResultReference, RunOutput
+from models.status_models.status import WorkflowStatus
+from models.workflow_models.workflow import LLM, Agent, Workflow
+from services.workflow_runs import workflow_runs
+
+LLM_CONFIG = LLM(model="gpt-4o", provider="openai", top_probability=1.0, temperature=0, max_tokens=256)
+
+
+def make_request(*names: str):
+    return [
+        WorkflowModel(
+            workflow=Workflow(
+                name=name,
+                description="Test workflow",
+                agents=[Agent(
+                    name="agent",
+                    goal="Answer",
+                    detailed_prompt="Answer the task.",
+                    agent_responsibility="Answer the task.",
+                    expected_output="An answer.",
+                    tools=[],
+                    llm=LLM_CONFIG,
+                )],
+                agent_execution_framework="autogen",
+                execution_type="round_robin",
+                reflection_additional_instruction=None,
+                reflection_llm_config=LLM_CONFIG,
+            ),
+            task="task",
+        )
+        for name in names
+    ]
+
+
+class FakeExecutor:
+    stop_reason = "done"
+
+    async def execute(self, workflow, workflow_task):
+        return RunOutput(final=f"{workflow.name} answer", transcript=[])
+
+
+@pytest.fixture
+def status(monkeypatch):
+    status = WorkflowStatusStore(InMemoryStateBackend())
+    monkeypatch.setattr(workflow_runs, "workflow_status", status)
+    monkeypatch.setattr(workflow_runs, "run_scheduler", RunScheduler())
+
+    async def get_executor(framework: str):
+        return FakeExecutor()
+
+    async def store_result(run_id: str, output: RunOutput) -> ResultReference:
+        return ResultReference(run_id=run_id, url="", codec=ResultCodec.GZIP, final_bytes=0, full_bytes=0, stored_bytes=0)
+
+    monkeypatch.setattr(workflow_runs.WorkflowExecutorManager, "get_executor", get_executor)
+    monkeypatch.setattr(workflow_runs, "store_result", store_result)
+    return status
+
+
+def get_statuses(status: WorkflowStatusStore):
+    return {item.name: item.status for item in status.get_status()}
+
+
+def run_workflows(request):
+    async def run():
+        with run_scope("run-1"):
+            return await workflow_runs.run_workflows("run-1", request)
+    return asyncio.run(run())
+
+
+def test_empty_request_completes(status):
+    result = run_workflows([])
+
+    assert result["status"] == "Execution completed"
+    assert result["framework"] is None
+    assert result["stop_reasons"] == {}
+
+
+def test_workflows_complete(status):
+    result = run_workflows(make_request("first", "second"))
+
+    assert result["framework"] == "autogen"
+    assert result["stop_reasons"] == {"first": "done", "second": "done"}
+    assert get_statuses(status) == {"first": WorkflowStatus.COMPLETED, "second": WorkflowStatus.COMPLETED}
+
+
+def test_cancelled_before_the_first_slot(status, monkeypatch):
+    scheduler = RunScheduler(max_concurrent_runs=1)
+    monkeypatch.setattr(workflow_runs, "run_scheduler", scheduler)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold_slot():
+            async with scheduler.slot("other", "busy"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold_slot())
+        await asyncio.sleep(0)
+        with run_scope("run-1"):
+            task = asyncio.create_task(workflow_runs.run_workflows("run-1", make_request("first", "second")))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+        await holder
+
+    asyncio.run(run())
+
+    assert get_statuses(status) == {"first": WorkflowStatus.CANCELLED, "second": WorkflowStatus.CANCELLED}
+
+
+def test_cancelled_while_adding_the_status_items(status, monkeypatch):
+    add_item = status.add_item
+
+    def cancel_second_add(item):
+        if status.get_status():
+            # Cancellation arrives while the blocking I/O pool writes the item
+            raise asyncio.CancelledError()
+        add_item(item)
+
+    monkeypatch.setattr(status, "add_item", cancel_second_add)
+
+    with pytest.raises(asyncio.CancelledError):
+        run_workflows(make_request("first", "second"))
+
+    assert get_statuses(status) == {"first": WorkflowStatus.CANCELLED}
+
+
+def test_state_backend_failure_before_the_first_workflow_fails_every_workflow(status, monkeypatch):
+    add_item = status.add_item
+    added = []
+
+    def fail_second_add(item):
+        if added:
+            raise ConnectionError("state backend down")
+        added.append(item.name)
+        add_item(item)
+
+    monkeypatch.setattr(status, "add_item", fail_second_add)
+
+    with pytest.raises(HTTPException) as error:
+        run_workflows(make_request("first", "second"))
+
+    assert error.value.status_code == 500
+    assert "state backend down" in error.value.detail
+    assert get_statuses(status) == {"first": WorkflowStatus.FAILED}
+
+
+def test_failed_workflow_leaves_the_next_ones_scheduled(status, monkeypatch):
+    class FailingExecutor(FakeExecutor):
+        async def execute(self, workflow, workflow_task):
+            raise RuntimeError("model error")
+
+    async def get_executor(framework: str):
+        return FailingExecutor()
+
+    monkeypatch.setattr(workflow_runs.WorkflowExecutorManager, "get_executor", get_executor)
+
+    with pytest.raises(HTTPException) as error:
+        run_workflows(make_request("first", "second"))
+
+    assert error.value.status_code == 500
+    assert get_statuses(status) == {"first": WorkflowStatus.FAILED, "second": WorkflowStatus.SCHEDULED}
+
+
+def test_result_store_failure_keeps_completed_workflows(status, monkeypatch):
+    async def store_result(run_id: str, output: RunOutput):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(workflow_runs, "store_result", store_result)
+
+    with pytest.raises(HTTPException) as error:
+        run_workflows(make_request("first", "second"))
+
+    assert "disk full" in error.value.detail
+    assert get_statuses(status) == {"first": WorkflowStatus.COMPLETED, "second": WorkflowStatus.COMPLETED}
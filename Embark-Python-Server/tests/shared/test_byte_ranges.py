@@ -0,0 +1,60 @@
+import pytest
+
+from shared.byte_ranges import UnsatisfiableRange, accepts_encoding, parse_byte_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=90-200", (90, 99)),
+    ("bytes=99-99", (99, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes= 5 - 6 ", (5, 6)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "items=0-9",
+    "bytes=0-9,20-29",
+    "bytes=-",
+    "bytes=a-9",
+    "bytes=0-b",
+    "bytes=--5",
+    "bytes=+1-5",
+    "bytes=1-2-3",
+    "bytes=9-0",
+    "bytes=١-5",
+])
+def test_unusable_headers_send_the_whole_content(header):
+    assert parse_byte_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=150-200", 100),
+    ("bytes=-0", 100),
+    ("bytes=0-", 0),
+    ("bytes=0-0", 0),
+    ("bytes=-1", 0),
+    ("bytes=-0", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(UnsatisfiableRange):
+        parse_byte_range(header, size)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, zstd", True),
+    ("GZIP;q=0.5", True),
+    ("br, gzip; q=0", False),
+    ("gzip;q=0.000", False),
+    ("br", False),
+    (None, False),
+])
+def test_accepts_encoding(header, expected):
+    assert accepts_encoding(header, "gzip") is expected
@@ -0,0 +1,103 @@
+import json
+
+from shared.partial_json import PartialJsonObject
+
+DOCUMENT = {
+    "title": "Say \"hi\" {not an object}",
+    "count": 12,
+    "ratio": -0.5e3,
+    "tags": ["a", "b]", {"nested": [1, 2]}],
+    "meta": {"ok": True, "none": None, "text": "a,b}"},
+    "done": False,
+    "path": "C:\\temp\\",
+    "last": None,
+}
+
+
+def feed_by_char(text: str):
+    parser = PartialJsonObject()
+    completed_at = {}
+    for index, char in enumerate(text):
+        for key in parser.feed(char):
+            completed_at[key] = index
+    return parser, completed_at
+
+
+def test_whole_object_in_one_chunk():
+    parser = PartialJsonObject()
+
+    assert parser.feed(json.dumps(DOCUMENT)) == list(DOCUMENT)
+    assert parser.fields == DOCUMENT
+    assert parser.complete
+
+
+def test_fields_complete_as_soon_as_their_value_ends():
+    text = '{"name": "Ada", "age": 36, "tags": ["x"], "active": true}'
+    parser, completed_at = feed_by_char(text)
+
+    assert parser.fields == {"name": "Ada", "age": 36, "tags": ["x"], "active": True}
+    # Strings, arrays and objects end on their closing character
+    assert completed_at["name"] == text.index('"Ada"') + 4
+    assert completed_at["tags"] == text.index("]")
+    # Numbers and literals end on the following comma or closing brace
+    assert completed_at["age"] == text.index(", \"tags\"")
+    assert completed_at["active"] == len(text) - 1
+    assert parser.complete
+
+
+def test_every_split_point_gives_the_same_fields():
+    text = json.dumps(DOCUMENT, indent=2)
+    for split in range(len(text) + 1):
+        parser = PartialJsonObject()
+        completed = parser.feed(text[:split]) + parser.feed(text[split:])
+
+        assert completed == list(DOCUMENT), split
+        assert parser.fields == DOCUMENT, split
+
+
+def test_escaped_quote_split_across_chunks():
+    parser = PartialJsonObject()
+
+    assert parser.feed('{"quote": "a \\') == []
+    assert parser.feed('" b", ') == ["quote"]
+    assert parser.fields == {"quote": 'a " b'}
+    assert not parser.complete
+
+
+def test_text_around_the_object_is_ignored():
+    parser = PartialJsonObject()
+
+    parser.feed('Here you go:\n```json\n{"answer": 42}\n```\n{"other": 1}')
+
+    assert parser.fields == {"answer": 42}
+    assert parser.complete
+
+
+def test_unfinished_object_keeps_only_completed_fields():
+    parser = PartialJsonObject()
+
+    assert parser.feed('{"a": "done", "b": [1, 2') == ["a"]
+    assert parser.fields == {"a": "done"}
+    assert not parser.complete
+
+
+def test_invalid_value_is_skipped():
+    parser = PartialJsonObject()
+
+    assert parser.feed('{"bad": tru, "good": 1}') == ["good"]
+    assert parser.fields == {"good": 1}
+    assert parser.complete
+
+
+def test_empty_object():
+    parser = PartialJsonObject()
+
+    assert parser.feed("{ }") == []
+    assert parser.fields == {}
+    assert parser.complete
+
+
+def test_escaped_key():
+    parser = PartialJsonObject()
+
+    assert parser.feed('{"a\\"b\\u00e9": 1}') == ['a"bé']
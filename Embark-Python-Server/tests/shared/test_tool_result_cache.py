@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+from shared import mcp_tool_calls
+from shared.tool_result_cache import ToolResultCache, get_tool_result_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ToolResultCache(max_entries=8)
+    monkeypatch.setattr(mcp_tool_calls, "tool_result_cache", cache)
+    return cache
+
+
+def make_result(text: str, is_error: bool = False) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)], isError=is_error)
+
+
+def test_key_is_canonical_per_call():
+    key = get_tool_result_key("call_tool_result", "sse:http://tools", "search", {"query": "a", "limit": 5})
+
+    assert key == get_tool_result_key("call_tool_result", "sse:http://tools", "search", {"limit": 5, "query": "a"})
+    assert get_tool_result_key("call_tool_result", "sse:http://tools", "search", None) == (
+        get_tool_result_key("call_tool_result", "sse:http://tools", "search", {})
+    )
+    assert key != get_tool_result_key("autogen_content", "sse:http://tools", "search", {"query": "a", "limit": 5})
+    assert key != get_tool_result_key("call_tool_result", "sse:http://tools token", "search", {"query": "a", "limit": 5})
+    assert key != get_tool_result_key("call_tool_result", "sse:http://tools", "search", {"query": "b", "limit": 5})
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ToolResultCache()
+    cache.put("key", "value", ttl_seconds=10)
+
+    clock[0] += 9.9
+    assert cache.get("key") == (True, "value")
+    clock[0] += 0.1
+    assert cache.get("key") == (False, None)
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_none_results_are_cached(clock):
+    cache = ToolResultCache()
+    cache.put("key", None, ttl_seconds=10)
+
+    assert cache.get("key") == (True, None)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ToolResultCache(max_entries=2)
+    cache.put("a", 1, ttl_seconds=10)
+    cache.put("b", 2, ttl_seconds=10)
+    cache.get("a")
+
+    cache.put("c", 3, ttl_seconds=10)
+
+    assert len(cache) == 2
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+
+
+def test_tool_is_called_once_while_its_result_is_cached(cache, clock):
+    calls = []
+
+    async def invoke():
+        calls.append("search")
+        return make_result(f"result {len(calls)}")
+
+    async def call():
+        return await mcp_tool_calls.observe_tool_call("sse:http://tools", "search", invoke, "key", cache_ttl_seconds=10)
+
+    first = asyncio.run(call())
+    second = asyncio.run(call())
+    clock[0] += 10
+    third = asyncio.run(call())
+
+    assert second is first
+    assert third.content[0].text == "result 2"
+    assert len(calls) == 2
+
+
+def test_error_results_are_not_cached(cache, clock):
+    results = [make_result("server busy", is_error=True), make_result("found")]
+
+    def invoke():
+        return results.pop(0)
+
+    def call():
+        return mcp_tool_calls.observe_tool_call_sync("sse:http://tools", "search", invoke, "key", cache_ttl_seconds=10)
+
+    assert call().isError
+    assert call().content[0].text == "found"
+    assert call().content[0].text == "found"
+    assert results == []
+
+
+def test_calls_without_a_cache_key_are_not_cached(cache, clock):
+    calls = []
+
+    async def invoke():
+        calls.append("search")
+        return make_result("found")
+
+    for _ in range(2):
+        asyncio.run(mcp_tool_calls.observe_tool_call("sse:http://tools", "search", invoke))
+
+    assert len(calls) == 2
+    assert len(cache) == 0
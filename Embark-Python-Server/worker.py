@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import signal
+from os import getenv as os_getenv, environ as os_environ
+from dotenv import load_dotenv
+from core.llm.cassette.llm_cassette import configure_llm_cassette
+from core.tracing.tracing import configure_tracing
+from core.metrics.llm_metrics_hook import register_llm_metrics_hook
+from core.runs.token_accounting_hook import register_token_accounting_hook
+from core.runs.run_cancellation_hook import register_run_cancellation_hook
+from core.queue.work_queue import work_queue
+from services.queue_worker.queue_worker import QueueWorker
+from models.process_models.process import ExecutionMode
+from services.process_pool.process_pool import EXECUTION_MODE, framework_process_pool
+load_dotenv()
+
+# Same LLM call hooks as the API process (main.py)
+register_run_cancellation_hook()
+configure_llm_cassette()
+configure_tracing()
+register_llm_metrics_hook()
+register_token_accounting_hook()
+
+
+async def run_worker():
+    worker = QueueWorker(
+        work_queue,
+        concurrency=int(os_getenv("WORKER_CONCURRENCY", "4")),
+        visibility_timeout_seconds=float(os_getenv("WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS", "60")),
+        poll_interval_seconds=float(os_getenv("WORKER_POLL_INTERVAL_SECONDS", "1.0")),
+    )
+    loop = asyncio.get_running_loop()
+    # Stop taking jobs and finish the running ones
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(stop_signal, worker.stop)
+    if EXECUTION_MODE == ExecutionMode.PROCESS:
+        await framework_process_pool.start()
+    try:
+        await worker.run()
+    finally:
+        await framework_process_pool.stop()
+
+
+if __name__ == "__main__":
+    # SETUP THE ENV VARIABLES FOR LLM EXECUTION
+    gemini_key = os_getenv("GEMINI_API_KEY")
+    if gemini_key:
+        os_environ["GEMINI_API_KEY"] = gemini_key
+        os_environ["GOOGLE_API_KEY"] = gemini_key
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())